@@ -18,6 +18,8 @@ from casadi import casadi
 from typing import Callable, Union
 
 import constants
+import telemetry
+import time
 import unit_conversion as units
 
 class Aircraft():
@@ -386,15 +388,21 @@ class Optimizer():
         Aerosandbox optimizer.
     aircraft : Aircraft
         Aircraft object.
+    log : telemetry.Log
+        If set, every mission solve appends its telemetry record to it.
+    trace : telemetry.Trace
+        If set, every mission solve streams its iterations to it.
     **kwargs
         Key word arguments to pass to aircraft.
     """
-    def __init__(self, **kwargs):
+    def __init__(self, log:telemetry.Log=None, trace:telemetry.Trace=None, **kwargs):
         """
         Optimizer __init__ method.
         """
         self.opti = None
         self.aircraft = None
+        self.log = log
+        self.trace = trace
 
         self.kwargs = kwargs
 
@@ -429,13 +437,50 @@ class Optimizer():
         # solve
         self.opti.maximize(score)
 
-        sol = self.opti.solve(
-            max_iter=500,
-            behavior_on_failure='return_last'
-        )
+        callback = None
+        if self.trace is not None:
+            self.trace.variables = {
+                'span': self.aircraft.span,
+                'chord': self.aircraft.chords,
+                'banner_length': self.aircraft.banner_length,
+                'ducks': self.aircraft.passengers,
+            }
+            self.trace.start(mission_function.__name__)
+            callback = self.trace_iteration
+
+        start = time.time()
+        # the trace is ended (and its file closed) even if the solve raises
+        stats = {'success': False, 'return_status': 'Exception', 'iter_count': None}
+        try:
+            sol = self.opti.solve(
+                max_iter=500,
+                behavior_on_failure='return_last',
+                callback=callback
+            )
+            stats = sol.stats()
+        finally:
+            if self.trace is not None:
+                self.trace.end(stats)
+
+        if self.log is not None:
+            self.log.append(telemetry.record(sol.stats(), self.opti.nx, self.opti.ng, self.opti.np,
+                                             sol(self.opti.f), time.time() - start, mission_function.__name__))
 
         # return aircraft
         return sol(score), sol(self.aircraft)
+
+    def trace_iteration(self, iteration:int) -> None:
+        """
+        Opti callback writing the current iterate to the trace.
+        """
+        value = self.opti.debug.value
+        self.trace.iteration(
+            iteration,
+            value(self.opti.x),
+            value(self.opti.f),
+            telemetry.infeasibility(value(self.opti.g), value(self.opti.lbg), value(self.opti.ubg)),
+            {name: value(variable) for name, variable in self.trace.variables.items()}
+        )
     
     def solve_missions(self, constraint_function:Callable[[asb.Opti, Aircraft], None], *mission_functions:list[Callable[[asb.Opti, Aircraft], casadi.MX]]) -> tuple[list[float], list[Aircraft]]:
         """
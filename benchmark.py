@@ -0,0 +1,169 @@
+"""
+Scaling benchmark of the lap discretization.
+
+Builds and solves the optimization.py model (four normalization stages and the net score) over
+a grid of `lap_breakdown` x `lap_breakdown_turn` and appends one JSON line per grid point. Each
+point runs in a fresh process so its peak RSS is its own.
+
+Every record holds wall time per phase, the function evaluation times summed over the stages
+(`t_wall_nlp_*` wall clock, `t_proc_nlp_*` CPU), peak RSS, problem dimensions, Jacobian and
+Hessian nonzeros and iterations per stage. `--compare` prints the ratios against an earlier file, to
+catch regressions.
+
+Example
+-------
+    python benchmark.py -s 10 20 50 -t 4 8 -o benchmark.jsonl
+    python benchmark.py -s 10 20 50 -t 4 8 -o new.jsonl --compare benchmark.jsonl
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import time
+
+import casadi as ca
+
+STAGES = ["M1", "M2", "GM", "M3"]
+
+
+def run_point(lap_breakdown:int, lap_breakdown_turn:int, max_iter:int=1000) -> dict:
+    """
+    Build, normalize and net solve the model at one discretization.
+
+    Returns
+    -------
+    dict
+        Benchmark record, see the module docstring.
+    """
+    start = time.time()
+    from model import Model
+    t_import = time.time() - start
+
+    start = time.time()
+    model = Model(1, lap_breakdown, lap_breakdown_turn)
+    t_build = time.time() - start
+    solver = model.solver
+
+    nlpsol = solver.get_nlpsol()
+    record = {
+        'lap_breakdown': lap_breakdown,
+        'lap_breakdown_turn': lap_breakdown_turn,
+        'nx': model.opti.nx,
+        'ng': model.opti.ng,
+        'np': model.opti.np,
+        'jac_g_nnz': nlpsol.get_function('nlp_jac_g').sparsity_out(1).nnz(),
+        'hess_l_nnz': nlpsol.get_function('nlp_hess_l').sparsity_out(0).nnz(),
+        't_import': t_import,
+        't_model': t_build - solver.t_setup,
+        't_setup': solver.t_setup,
+    }
+
+    sols, t_eval = {}, {}
+    for stage in [*STAGES, "net"]:
+        if stage == "net":
+            model.set_normalizers(*(sols[s](model.stage_score(s)) for s in STAGES))
+
+        objective = "net" if stage == "net" else Model.stages[stage]
+        sol = sols[stage] = solver.solve(objective, verbose=False, max_iter=max_iter, behavior_on_failure='return_last')
+        stats = sol.stats()
+
+        record[f'{stage}_success'] = bool(stats['success'])
+        record[f'{stage}_iter'] = int(stats['iter_count'])
+        record[f'{stage}_t_solve'] = stats['t_wall_solve']
+        for key, value in stats.items():
+            if key.startswith(('t_wall_nlp_', 't_proc_nlp_')):
+                t_eval[key] = t_eval.get(key, 0) + value
+
+    record['iter_total'] = sum(record[f'{stage}_iter'] for stage in [*STAGES, "net"])
+    record['t_solve_total'] = sum(record[f'{stage}_t_solve'] for stage in [*STAGES, "net"])
+    record.update(t_eval)
+    record['net_score'] = float(sol(model.netScore)) if record['net_success'] else None
+
+    # kB on Linux
+    record['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return record
+
+
+def _run_point(args:tuple) -> dict:
+    return run_point(*args)
+
+
+def run(grid:list, path:str, max_iter:int=1000, verbose:bool=True) -> list[dict]:
+    """
+    Benchmark every (lap_breakdown, lap_breakdown_turn) of a grid, one fresh process each, and
+    append the records to a JSON lines file as they finish.
+    """
+    environment = {
+        'casadi': ca.__version__,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': multiprocessing.cpu_count(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    records = []
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for record in pool.imap(_run_point, [(*point, max_iter) for point in grid]):
+            record.update(environment)
+            records.append(record)
+
+            with open(path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+            if verbose:
+                print_record(record)
+
+    return records
+
+
+def load(path:str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def print_record(record:dict) -> None:
+    print(f"{record['lap_breakdown']:>4} x {record['lap_breakdown_turn']:<4} | nx {record['nx']:>5} ng {record['ng']:>5}"
+          f" | jac {record['jac_g_nnz']:>7} hess {record['hess_l_nnz']:>7}"
+          f" | build {record['t_model']:>6.2f} s setup {record['t_setup']:>6.2f} s"
+          f" | solve {record['t_solve_total']:>7.2f} s {record['iter_total']:>5} it"
+          f" | {record['peak_rss_mb']:>7.1f} MB | {'ok' if record['net_success'] else 'FAILED'}")
+
+
+def compare(records:list, baseline:list) -> None:
+    """
+    Print new / baseline ratios of time, iterations and memory at the grid points both have.
+    """
+    keys = ['t_model', 't_setup', 't_solve_total', 'iter_total', 'peak_rss_mb']
+    previous = {(r['lap_breakdown'], r['lap_breakdown_turn']): r for r in baseline}
+
+    print("\n=== Ratio to baseline ===")
+    print(f"{'mesh':>11} | " + " | ".join(f"{key:>13}" for key in keys))
+    for record in records:
+        mesh = (record['lap_breakdown'], record['lap_breakdown_turn'])
+        if mesh not in previous:
+            continue
+        ratios = [record[key] / previous[mesh][key] if previous[mesh][key] else float('nan') for key in keys]
+        print(f"{mesh[0]:>4} x {mesh[1]:<4} | " + " | ".join(f"{ratio:>13.2f}" for ratio in ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the model over lap discretizations.")
+    parser.add_argument("-s", "--straights", nargs="+", type=int, default=[10, 20, 50], help="lap_breakdown values")
+    parser.add_argument("-t", "--turns", nargs="+", type=int, default=[8], help="lap_breakdown_turn values")
+    parser.add_argument("-o", "--output", default="benchmark.jsonl", help="JSON lines file to append to")
+    parser.add_argument("--max-iter", type=int, default=1000)
+    parser.add_argument("--compare", help="Earlier benchmark file to print ratios against")
+    args = parser.parse_args()
+
+    records = run(list(itertools.product(args.straights, args.turns)), args.output, args.max_iter)
+
+    if args.compare:
+        compare(records, load(args.compare))
+
+
+if __name__ == "__main__":
+    main()
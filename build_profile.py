@@ -0,0 +1,141 @@
+"""
+Where building the model goes: wall time and problem growth of each subsystem.
+
+`Aircraft.__init__` (and `Scenario.__init__` for extra wind scenarios) runs its subsystems in
+order, `mission_parm`, `fuselage_parm`, ..., `lap_sim`, `turn_drag`. Given a `Profile`, each one
+is timed and the variables, parameters, constraints and MX graph nodes it adds are counted, so
+the parts that bloat the NLP stand out. The rest of `Model.__init__` (missions, constraints and
+solver setup) is reported as one line each.
+
+Counting nodes walks the whole graph after every subsystem, so a profiled build is slower than a
+plain one. The times only cover the subsystems themselves.
+
+Example
+-------
+    python build_profile.py
+    python build_profile.py --lap-breakdown 50 --lap-breakdown-turn 20 --scenarios 3
+"""
+import argparse
+import time
+
+import casadi as ca
+
+
+class Profile():
+    """
+    Build time and problem growth of each subsystem, in build order.
+
+    Attributes
+    ----------
+    records : list[dict]
+        One per subsystem run: its name, owner ("aircraft" or "scenario N"), wall time and the
+        variables (nx), parameters (np), constraints (ng) and MX nodes it added.
+    t_counting : float
+        Time spent counting, part of the build time of the model but of no subsystem.
+    """
+    def __init__(self):
+        self.records = []
+        self.t_counting = 0
+        self._owners = []
+
+    def measure(self, name:str, subsystem, plane, opti) -> None:
+        """
+        Run one subsystem of an Aircraft or Scenario and record what it added.
+        """
+        if not any(plane is owner for owner in self._owners):
+            self._owners.append(plane)
+
+        start = time.time()
+        before = self.size(opti)
+        middle = time.time()
+        subsystem(plane, opti)
+        end = time.time()
+        after = self.size(opti)
+
+        t_build = end - middle
+        self.t_counting += (middle - start) + (time.time() - end)
+
+        owner = self._owners.index(plane)
+        self.records.append({
+            'subsystem': name,
+            'owner': "aircraft" if owner == 0 else f"scenario {owner + 1}",
+            't_build': t_build,
+            **{key: after[key] - before[key] for key in after},
+        })
+
+    def size(self, opti, *others) -> dict:
+        """
+        Variables, parameters, constraints and MX nodes of the problem so far.
+
+        Parameters are counted as declared, `opti.np` only counts those the objective and
+        constraints use so far and would put them under a later subsystem. The nodes are those
+        of every MX attribute of the aircraft and scenarios built so far (and of `others`) and
+        of the constraints, shared subexpressions counted once.
+        """
+        expressions = [ca.vec(value) for owner in [*self._owners, *others] for value in vars(owner).values()
+                       if isinstance(value, ca.MX)]
+        expressions += [opti.g, opti.f]
+        graph = ca.veccat(*expressions)
+
+        return {
+            'nx': opti.nx,
+            'np': sum(symbol.numel() for symbol in opti.advanced.symvar()
+                      if opti.advanced.get_meta(symbol).type == ca.OPTI_PAR),
+            'ng': opti.ng,
+            'nodes': ca.Function('graph', ca.symvar(graph), [graph]).n_nodes(),
+        }
+
+
+def profile_model(scenarios:int=1, lap_breakdown:int=None, lap_breakdown_turn:int=None) -> list[dict]:
+    """
+    Build a `Model` with a `Profile` and account for all of its build.
+
+    Returns
+    -------
+    list[dict]
+        The subsystem records, then "missions" (the rest of `Model.__init__`, mostly mission
+        scores and constraints) and "solver" (NLP and nlpsol setup, no nodes counted).
+    """
+    from model import Model
+
+    profile = Profile()
+    start = time.time()
+    model = Model(scenarios, lap_breakdown, lap_breakdown_turn, profile=profile)
+    t_total = time.time() - start
+
+    aircraft = {key: sum(r[key] for r in profile.records) for key in ['t_build', 'nx', 'np', 'ng', 'nodes']}
+    total = profile.size(model.opti, *model.scenarios)
+    t_missions = t_total - model.solver.t_setup - aircraft['t_build'] - profile.t_counting
+
+    return [
+        *profile.records,
+        {'subsystem': "missions", 'owner': "model", 't_build': t_missions,
+         **{key: total[key] - aircraft[key] for key in total}},
+        {'subsystem': "solver", 'owner': "model", 't_build': model.solver.t_setup, 'nx': 0, 'np': 0, 'ng': 0, 'nodes': 0},
+    ]
+
+
+def print_profile(records:list) -> None:
+    total = {key: sum(r[key] for r in records) for key in ['t_build', 'nx', 'np', 'ng', 'nodes']}
+
+    print("\n=== Model Build Profile ===")
+    print(f"{'Subsystem':>14} | {'Owner':>10} | {'Time':>9} | {'Vars':>6} | {'Params':>6} | {'Constr':>6} | {'Nodes':>8} | {'Nodes %':>7}")
+    print("-" * 88)
+    for r in [*records, {'subsystem': "total", 'owner': "", **total}]:
+        share = 100 * r['nodes'] / total['nodes'] if total['nodes'] else 0
+        print(f"{r['subsystem']:>14} | {r['owner']:>10} | {r['t_build']:>8.3f}s | {r['nx']:>6} | {r['np']:>6}"
+              f" | {r['ng']:>6} | {r['nodes']:>8} | {share:>6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile building the model by subsystem.")
+    parser.add_argument("--scenarios", type=int, default=1, help="Wind scenarios, see Model")
+    parser.add_argument("--lap-breakdown", type=int, help="Segments per straight, constants.py by default")
+    parser.add_argument("--lap-breakdown-turn", type=int, help="Segments per turn, constants.py by default")
+    args = parser.parse_args()
+
+    print_profile(profile_model(args.scenarios, args.lap_breakdown, args.lap_breakdown_turn))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Ahead-of-time compiled NLP of the aircraft model.
+
+The objective, constraints, their Jacobian and the Hessian of the Lagrangian that IPOPT evaluates
+are generated as C with CasADi codegen and compiled to a shared library with the local compiler.
+The library is cached on disk under a hash of the NLP structure and the values in `constants.py`,
+so later runs and sweep workers load it instead of building and interpreting the derivatives.
+
+Example
+-------
+    python codegen.py           # build (or find) the library of the default model
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import time
+
+import casadi as ca
+
+import constants
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".nlp_cache")
+COMPILER = "gcc"
+FLAGS = ["-O1", "-fPIC", "-shared"]
+
+
+def constants_values() -> dict:
+    """
+    Plain values of `constants.py`, the part of the model that is not in the variables.
+    """
+    # compile_nlp only says whether to use the library, it does not change what is in it
+    return {name: value for name, value in sorted(vars(constants).items())
+            if not name.startswith("_") and name != "compile_nlp"
+            and isinstance(value, (bool, int, float, str, list, tuple))}
+
+
+def structure_hash(nlp:dict) -> str:
+    """
+    Hash of an NLP ({'x', 'p', 'f', 'g'}) and of `constants.py`.
+
+    Two models with the same hash evaluate to the same functions, so they can share a library.
+    """
+    function = ca.Function('nlp', [nlp['x'], nlp['p']], [nlp['f'], nlp['g']])
+
+    digest = hashlib.sha256()
+    digest.update(function.serialize().encode())
+    digest.update(repr(constants_values()).encode())
+    digest.update(ca.__version__.encode())
+
+    return digest.hexdigest()[:16]
+
+
+def compile_nlp(nlpsol:ca.Function, path:str, compiler:str=COMPILER, flags:list=None) -> str:
+    """
+    Generate the C of the functions an nlpsol evaluates and compile it to a shared library.
+
+    Parameters
+    ----------
+    nlpsol : casadi.Function
+        Solver whose nlp_f, nlp_g, nlp_grad_f, nlp_jac_g and nlp_hess_l are generated.
+    path : str
+        Library to write. Written under a temporary name first so a concurrent reader never
+        loads half of it.
+
+    Returns
+    -------
+    str
+        Path of the library.
+    """
+    if flags is None:
+        flags = FLAGS
+
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+
+    name, _ = os.path.splitext(os.path.basename(path))
+    source = f"{name}_{os.getpid()}.c"
+    temporary = os.path.join(folder, f"{name}_{os.getpid()}.so")
+
+    # generate_dependencies writes to the working directory
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        nlpsol.generate_dependencies(source)
+    finally:
+        os.chdir(cwd)
+
+    try:
+        subprocess.run([compiler, *flags, os.path.join(folder, source), "-o", temporary], check=True)
+        os.replace(temporary, path)
+    finally:
+        for leftover in [os.path.join(folder, source), temporary]:
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return path
+
+
+def library(nlp:dict, build, cache_dir:str=CACHE_DIR, verbose:bool=False) -> str:
+    """
+    Path of the compiled library of an NLP, compiling it only if it is not cached yet.
+
+    Parameters
+    ----------
+    nlp : dict
+        NLP ({'x', 'p', 'f', 'g'}) the library is for.
+    build : Callable[[], casadi.Function]
+        Builds an nlpsol of the NLP, only called on a cache miss.
+    cache_dir : str
+        Folder of the cached libraries.
+    verbose : bool
+        Report cache misses and how long compiling took.
+    """
+    path = os.path.join(cache_dir, f"nlp_{structure_hash(nlp)}.so")
+
+    if not os.path.exists(path):
+        start = time.time()
+        compile_nlp(build(), path)
+        if verbose:
+            print(f"Compiled {path} in {time.time() - start:.1f} s")
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the aircraft NLP into the on-disk cache.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    from model import Model
+
+    start = time.time()
+    model = Model()
+    path = library(model.solver.nlp, model.solver.get_nlpsol, args.cache_dir, verbose=True)
+    print(f"{path} ready, {time.time() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
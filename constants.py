@@ -69,6 +69,9 @@ zero_lift_correction_factor = 2.38
 
 lap_breakdown = 20 # break the straights into x segments
 lap_breakdown_turn = 8 # break the turns into x segments
+segment_parallelization = "serial" # how lap_sim maps the segment kernel: "serial" (expanded into the SX NLP) or "thread"
+compile_nlp = False # evaluate the NLP from a C library compiled once and cached in .nlp_cache (see codegen.py)
+mirrored_turn = True # one M2 turn curvature variable per mirrored segment pair instead of n_turn_M2 variables and pairwise equalities (False for the latter)
 
 initial_height = 0
 
@@ -0,0 +1,157 @@
+"""
+Columnar export of sweep and Monte Carlo results, streamed to disk as they come.
+
+A `ColumnWriter` buffers one row per finished point and writes the buffer as a chunk
+(`chunk_000000.npz`, `chunk_000001.npz`, ...) to a folder every `chunk_size` rows or
+`flush_seconds`, whichever comes first. Memory stays flat however long the run, a crash loses at
+most the rows since the last chunk, and `read_columns` loads the folder back as one array per
+column for analysis with NumPy, without solving anything again.
+
+The first row fixes the schema: column names, dtypes and shapes, saved to `schema.json`. Every
+later row, also of a later writer on the same folder, must have the same columns, each of the
+same shape and of a dtype that casts safely to the column's (strings of any width), or it is
+refused with a ValueError before anything is written.
+
+Example
+-------
+    with ColumnWriter("wind_sweep") as writer:
+        sweep(model, "wind_speed", np.linspace(-20, 20, 10000), ["netScore"], writer=writer)
+
+    columns = read_columns("wind_sweep")    # {"wind_speed": array([...]), "success": ..., ...}
+"""
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+
+class ColumnWriter():
+    """
+    Rows appended one at a time, written to a folder of .npz chunks in batches.
+
+    Attributes
+    ----------
+    path : str
+        Folder of the chunks, created if needed. Chunks already in it are kept and numbered after.
+    chunk_size : int
+        Rows per chunk.
+    flush_seconds : float
+        Write a (smaller) chunk if the oldest buffered row is this old.
+    schema : dict[str, dict]
+        dtype and shape of every column, set by the first row.
+    rows : int
+        Rows written by this writer, buffered ones included.
+    """
+    def __init__(self, path:str, chunk_size:int=1000, flush_seconds:float=60):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.flush_seconds = flush_seconds
+        self.rows = 0
+
+        os.makedirs(path, exist_ok=True)
+        self.schema = None
+        if os.path.exists(self._schema_path):
+            with open(self._schema_path) as f:
+                self.schema = json.load(f)
+
+        self._chunk = len(chunks(path))
+        self._buffer = []
+        self._since = None
+
+    @property
+    def _schema_path(self) -> str:
+        return os.path.join(self.path, "schema.json")
+
+    def append(self, row:dict) -> None:
+        """
+        Buffer one row of {column: value}, values being numbers, strings, bools or arrays.
+        """
+        row = {key: np.asarray(value) for key, value in row.items()}
+
+        if self.schema is None:
+            self.schema = {key: {'dtype': value.dtype.str, 'shape': list(value.shape)} for key, value in row.items()}
+            with open(self._schema_path, "w") as f:
+                json.dump(self.schema, f, indent=1)
+        elif set(row) != set(self.schema):
+            raise ValueError(f"Row columns {sorted(row)} do not match the schema {sorted(self.schema)}")
+        else:
+            for key, value in row.items():
+                dtype, shape = np.dtype(self.schema[key]['dtype']), tuple(self.schema[key]['shape'])
+                if value.shape != shape:
+                    raise ValueError(f"Column '{key}' has shape {value.shape}, the schema {shape}")
+                if (value.dtype.kind == 'U') != (dtype.kind == 'U') or \
+                        (dtype.kind != 'U' and not np.can_cast(value.dtype, dtype, casting='safe')):
+                    raise ValueError(f"Column '{key}' has dtype {value.dtype}, the schema {dtype}")
+
+        self._buffer.append(row)
+        self.rows += 1
+        if self._since is None:
+            self._since = time.time()
+
+        if len(self._buffer) >= self.chunk_size or time.time() - self._since >= self.flush_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered rows as one chunk.
+        """
+        if not self._buffer:
+            return
+
+        columns = {}
+        for key, column in self.schema.items():
+            values = [row[key] for row in self._buffer]
+            # strings are as wide as the widest one in the chunk, everything else keeps its dtype
+            dtype = None if np.dtype(column['dtype']).kind == 'U' else column['dtype']
+            columns[key] = np.array(values, dtype=dtype)
+
+        # written under a temporary name so a reader never sees half a chunk
+        path = os.path.join(self.path, f"chunk_{self._chunk:06d}.npz")
+        temporary = os.path.join(self.path, f".chunk_{self._chunk:06d}.tmp.npz")
+        np.savez(temporary, **columns)
+        os.replace(temporary, path)
+
+        self._chunk += 1
+        self._buffer = []
+        self._since = None
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ColumnWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def chunks(path:str) -> list[str]:
+    return sorted(glob.glob(os.path.join(path, "chunk_*.npz")))
+
+
+def read_columns(path:str, columns:list=None) -> dict[str, np.ndarray]:
+    """
+    Load a folder written by `ColumnWriter`, one array per column over all its chunks.
+
+    Parameters
+    ----------
+    path : str
+        Folder of the chunks.
+    columns : list[str]
+        Columns to load, all by default.
+    """
+    with open(os.path.join(path, "schema.json")) as f:
+        schema = json.load(f)
+    if columns is None:
+        columns = list(schema)
+
+    parts = {key: [] for key in columns}
+    for chunk in chunks(path):
+        with np.load(chunk) as data:
+            for key in columns:
+                parts[key].append(data[key])
+
+    return {key: np.concatenate(parts[key]) if parts[key] else
+            np.empty((0, *schema[key]['shape']), dtype=schema[key]['dtype']) for key in columns}
@@ -25,14 +25,18 @@ def mission_parm(self, opti):
         self.ducks = opti.variable(init_guess=3, lower_bound=1)
         self.pucks = opti.variable(init_guess=1, lower_bound=1)
 
+def turn_parm(self, opti):
+        # load factors, flown per wind scenario
+        self.n_turn_M1 = opti.variable(init_guess=3, lower_bound=1, upper_bound=constants.n_max)
+        self.n_turn_M2 = opti.variable(init_guess=3, lower_bound=1, upper_bound=constants.n_max)
+        self.n_turn_M3 = opti.variable(init_guess=3, lower_bound=1, upper_bound=constants.n_max)
+
 def airplane_parm(self, opti):
         # Airplane specific parameters
         
         self.span = opti.variable(init_guess=4, lower_bound=0) #global
         self.chord = opti.variable(init_guess=1, lower_bound=0) #global
-        self.n_turn_M1 = opti.variable(init_guess=3, lower_bound=1, upper_bound=constants.n_max)
-        self.n_turn_M2 = opti.variable(init_guess=3, lower_bound=1, upper_bound=constants.n_max)
-        self.n_turn_M3 = opti.variable(init_guess=3, lower_bound=1, upper_bound=constants.n_max)
+        turn_parm(self, opti)
 
         self.S = self.span * self.chord
         self.AR = self.span**2 / self.S
@@ -5,10 +5,53 @@ import aero_functions as aero
 import casadi as ca
 import numpy as np
 
+_segment_kernel = None
+
+def segment_kernel():
+    # SX physics of one lap segment (straight or turn), built once per process:
+    # (ground speed, heading, wind, load factor, length, weight, banner, design)
+    #   -> (airspeed, CL, wing CD0, fuselage CD0, zero-lift CD, CD, drag, power, time, energy)
+    global _segment_kernel
+    if _segment_kernel is not None:
+        return _segment_kernel
+
+    v_ground, cos_heading, sin_heading, Vwx, Vwy, n, distance, weight, banner_length, banner_width, CD0_factor = (
+        ca.SX.sym(name) for name in ["v_ground", "cos_heading", "sin_heading", "Vwx", "Vwy", "n", "distance",
+                                     "weight", "banner_length", "banner_width", "CD0_factor"])
+    S, chord, fuselage_length, effective_diameter, fuselage_wetted_area, CD0_tail, k = (
+        ca.SX.sym(name) for name in ["S", "chord", "fuselage_length", "effective_diameter",
+                                     "fuselage_wetted_area", "CD0_tail", "k"])
+
+    Va_x = v_ground * cos_heading - Vwx
+    Va_y = v_ground * sin_heading - Vwy
+    Va = ca.sqrt(Va_x**2 + Va_y**2) # replacing all aerodynamics with airspeed
+
+    CL = n * weight / (0.5 * constants.rho * S * Va**2)
+
+    wingCD0 = aero.get_wing_cd0(chord, Va)
+    fusCD0 = aero.getFuselageCD0(fuselage_length, effective_diameter, Va, fuselage_wetted_area, S)
+    zero_lift_drag = constants.zero_lift_correction_factor * (wingCD0 + fusCD0 + CD0_tail)
+
+    CD = CD0_factor * zero_lift_drag + k * CL**2
+
+    banner_CD = aero.get_banner_cd(aero.get_Reynolds(banner_length, Va))
+    drag = 0.5 * constants.rho * Va**2 * S * CD + aero.banner_drag(banner_length, banner_width, Va, banner_CD)
+
+    power = drag * Va
+    t = distance / ca.fabs(v_ground)
+    E = power * t
+
+    _segment_kernel = ca.Function('segment', [
+        v_ground, cos_heading, sin_heading, Vwx, Vwy, n, distance, weight, banner_length, banner_width, CD0_factor,
+        S, chord, fuselage_length, effective_diameter, fuselage_wetted_area, CD0_tail, k,
+    ], [Va, CL, wingCD0, fusCD0, zero_lift_drag, CD, drag, power, t, E])
+
+    return _segment_kernel
+
 def lap_sim(self, opti):
 
-    lap_breakdown = constants.lap_breakdown
-    lap_breakdown_turn = constants.lap_breakdown_turn
+    lap_breakdown = self.lap_breakdown
+    lap_breakdown_turn = self.lap_breakdown_turn
     distance_breakdown = 2 * constants.straightDist / lap_breakdown
 
     # --------- Variables ---------
@@ -24,299 +67,125 @@ def lap_sim(self, opti):
 
 
     # self.V_turn_M3     = opti.variable(init_guess=[30]*lap_breakdown_turn, lower_bound=0)
-    self.n_turn_M2     = opti.variable(init_guess=[3]*lap_breakdown_turn, lower_bound=1, upper_bound=constants.n_max)
+    if constants.mirrored_turn:
+        # the turn flies no wind (see the kernel inputs below, whatever the wind parameters), so its
+        # mirrored segments share a radius in every setup: one curvature variable per pair (and the
+        # middle segment of an odd count), the load factor follows from speed and curvature.
+        # Curvature and not radius, a radius variable let the turns open up into straights.
+        # Bounded away from 0 (radius at most 10 km) so the radius stays finite
+        half = (lap_breakdown_turn + 1) // 2
+        curvature = opti.variable(init_guess=[constants.g * np.sqrt(3**2 - 1) / 30**2]*half, lower_bound=1e-4,
+                                  scale=0.03)
+        curvature_M2 = ca.vertcat(curvature, curvature[::-1][lap_breakdown_turn % 2:])
+        self.turn_radius_M2 = 1 / curvature_M2
+        self.n_turn_M2 = ca.sqrt(1 + (self.V_turn_M2**2 * curvature_M2 / constants.g)**2)
+        opti.subject_to(self.n_turn_M2 <= constants.n_max)
+    else:
+        self.n_turn_M2     = opti.variable(init_guess=[3]*lap_breakdown_turn, lower_bound=1, upper_bound=constants.n_max)
     # self.h_turn_M2     = opti.variable(init_guess=[1]*lap_breakdown_turn, lower_bound=-15, upper_bound=15)
 
     # opti.subject_to(self.h_turn_M2[0] == constants.initial_height)
 
-    # --------- Allocate arrays ---------
-    self.M1_CL_list_s        = [None] * lap_breakdown
-    self.M2_CL_list_s        = [None] * lap_breakdown
-    self.M3_CL_list_s        = [None] * lap_breakdown
-    self.wingCD0_M1_s        = [None] * lap_breakdown
-    self.wingCD0_M2_s        = [None] * lap_breakdown
-    self.wingCD0_M3_s        = [None] * lap_breakdown
-    self.fusCD0_M1_s         = [None] * lap_breakdown
-    self.fusCD0_M2_s         = [None] * lap_breakdown
-    self.fusCD0_M3_s         = [None] * lap_breakdown
-    self.zero_lift_drag_M1_s = [None] * lap_breakdown
-    self.zero_lift_drag_M2_s = [None] * lap_breakdown
-    self.zero_lift_drag_M3_s = [None] * lap_breakdown
-    self.CD_straight_M1      = [None] * lap_breakdown
-    self.CD_straight_M2      = [None] * lap_breakdown
-    self.CD_straight_M3      = [None] * lap_breakdown
-    self.Drag_straight_M1    = [None] * lap_breakdown
-    self.Drag_straight_M2    = [None] * lap_breakdown
-    self.Drag_straight_M3    = [None] * lap_breakdown
-    self.power_straight_M1   = [None] * lap_breakdown
-    self.power_straight_M2   = [None] * lap_breakdown
-    self.power_straight_M3   = [None] * lap_breakdown
-    self.t_straight_M1       = [None] * lap_breakdown
-    self.t_straight_M2       = [None] * lap_breakdown
-    self.t_straight_M3       = [None] * lap_breakdown
-    self.E_lap_M1_straight   = [None] * lap_breakdown
-    self.E_lap_M2_straight   = [None] * lap_breakdown
-    self.E_lap_M3_straight   = [None] * lap_breakdown
-    self.Banner_CD           = [None] * lap_breakdown
-    self.altitude_gain       = [None] * lap_breakdown
-
-    # turn parameters
-    self.CD_turn_M2          = [None] * lap_breakdown_turn
-    self.CL_turn_M2          = [None] * lap_breakdown_turn
-    self.wingCD0_M2_t        = [None] * lap_breakdown_turn
-    self.fusCD0_M2_t         = [None] * lap_breakdown_turn
-    self.zero_lift_drag_M2_t = [None] * lap_breakdown_turn
-    self.Drag_turn_M2        = [None] * lap_breakdown_turn
-    self.turn_radius_M2      = [None] * lap_breakdown_turn
-    self.power_turn_M2       = [None] * lap_breakdown_turn
-    self.t_turn_M2           = [None] * lap_breakdown_turn
-    self.e_turn_M2           = [None] * lap_breakdown_turn
-    self.delta_PE            = [None] * lap_breakdown_turn
+    # every segment of every mission goes through the same SX kernel, mapped over all of them,
+    # so the expression graph holds one call instead of the physics of each segment
 
     # Induced drag factor
     self.k = constants.inducedDragFactor / (np.pi * self.oswaldEff * self.AR)
 
-
-    for i in range(lap_breakdown_turn):
-
-        
-
-
-        v_t_M2 = self.V_turn_M2[i]
-        n_turn_M2 = self.n_turn_M2[i]
-        self.turn_radius_M2[i] = v_t_M2 ** 2 / (constants.g * ca.sqrt(n_turn_M2**2 - 1))
-        self.CL_turn_M2[i] = n_turn_M2 * mass.get_weight(self.span, self.chord, self.ducks
-                                                                 , self.pucks, 0, 0, self.restraint_weight
-                                                                 , self.fuselage_area) / (0.5
-                                                                                           * constants.rho * self.S * v_t_M2**2)
-        self.wingCD0_M2_t[i] = aero.get_wing_cd0(self.chord, v_t_M2)
-        self.fusCD0_M2_t[i] = aero.getFuselageCD0(self.fuselage_length, self.effective_diameter, v_t_M2, self.fuselage_wetted_area, self.S)
-        self.zero_lift_drag_M2_t[i] = constants.zero_lift_correction_factor * (
-            self.wingCD0_M2_t[i] +
-            self.fusCD0_M2_t[i] +
-            self.CD0_tail
-        )
-
-        self.CD_turn_M2[i] = self.zero_lift_drag_M2_t[i] + self.k * self.CL_turn_M2[i] ** 2
-
-        self.Drag_turn_M2[i] = (
-            0.5 * constants.rho * v_t_M2**2 * self.S * self.CD_turn_M2[i]
-        )
-
-        self.power_turn_M2[i] = self.Drag_turn_M2[i] * v_t_M2
-        
-        distance = (ca.pi * 4 * self.turn_radius_M2[i]) / lap_breakdown_turn
-
-        # if i > 0:
-        #     dh = self.h_turn_M2[i] - self.h_turn_M2[i-1]
-        # else:
-        #     dh = 0
-
-        mass_total = mass.get_weight(self.span, self.chord, self.ducks
-                                                                 , self.pucks, 0, 0, self.restraint_weight
-                                                                 , self.fuselage_area)
-
-        # self.delta_PE[i] = mass_total * constants.g * dh
-
-
-        self.t_turn_M2[i] = (distance) / (v_t_M2)
-
-        self.e_turn_M2[i] = self.power_turn_M2[i] * self.t_turn_M2[i] # + self.delta_PE[i]
-
-    for i in range(1, lap_breakdown_turn):
-        # _i     = self.V_turn_M2[i-1]
-        # v_next  = self.V_turn_M2[i]
-       # drag_i  = self.Drag_turn_M2[i-1]
-        # dPE_i   = self.delta_PE[i-1]
-        opti.subject_to(self.V_turn_M2[i] >= 0.9 * self.V_turn_M2[i-1])
-        opti.subject_to(self.V_turn_M2[i] <= 1.1 * self.V_turn_M2[i-1])
-        opti.subject_to(self.CL_turn_M2[i] <= constants.CLmax)
-
-        # opti.subject_to(
-        #     0.5 * mass_total * v_next**2
-        #    ==
-        #     0.5 * mass_total * v_i**2
-        #     - dPE_i
-        #     - drag_i * distance_breakdown
-        # )
-
-
-        # opti.subject_to(self.turn_radius_M2[i] >= 5)
-
-    left  = 0
-    right = lap_breakdown_turn - 1
-
-    while left < right:
-        opti.subject_to(self.turn_radius_M2[left] == self.turn_radius_M2[right])
-        left  += 1
-        right -= 1
-
-
-    self.t_turn_total_M2 = sum(self.t_turn_M2)
-    self.e_turn_total_M2 = sum(self.e_turn_M2)
-
-    # --------- Loop through straight segments ---------
-    for i in range(lap_breakdown):
-
-        # Example: self.straight_heading[i] = heading of segment in radians
-
-
-        if i > 9:
-            # write in the wind direction
-            heading = -ca.pi
-
-        else:
-            heading = 0
-            # write in the wind direction opposite
-
-        
-        v_s_ground_M1 = self.V_straight_M1[i]
-        v_s_ground_M2 = self.V_straight_M2[i]
-        v_s_ground_M3 = self.V_straight_M3[i]
-
-        Vg_x_M2 = v_s_ground_M2 * ca.cos(heading)
-        Vg_y_M2 = v_s_ground_M2 * ca.sin(heading)
-
-        Va_x_M1 = v_s_ground_M1 * ca.cos(heading) - Vwx
-        Va_y_M1 = v_s_ground_M1 * ca.sin(heading) - Vwy
-
-        Va_M1 = ca.sqrt(Va_x_M1**2 + Va_y_M1**2) # replacing all aerodynamics with airspeed
-
-        Va_x_M2 = Vg_x_M2 - Vwx
-        Va_y_M2 = Vg_y_M2 - Vwy
-        Va_M2 = ca.sqrt(Va_x_M2**2 + Va_y_M2**2) # replacing all aerodynamics with airspeed
-
-        Va_x_M3 = v_s_ground_M3 * ca.cos(heading) - Vwx
-        Va_y_M3 = v_s_ground_M3 * ca.sin(heading) - Vwy
-
-        Va_M3 = ca.sqrt(Va_x_M3**2 + Va_y_M3**2) # replacing all aerodynamics with airspeed
-
-        self.M1_CL_list_s[i] = (
-            mass.get_weight(self.span, self.chord, 0, 0,
-                            0, 0, self.restraint_weight, self.fuselage_area)
-            / (0.5 * constants.rho * self.S * Va_M1**2)
-        )
-
-        self.M2_CL_list_s[i] = (
-            mass.get_weight(self.span, self.chord, self.ducks, self.pucks,
-                            0, 0, self.restraint_weight, self.fuselage_area)
-            / (0.5 * constants.rho * self.S * Va_M2**2)
-        )
-
-        self.M3_CL_list_s[i] = (
-            (mass.get_weight(self.span, self.chord, 0, 0,
-                              self.banner_length, self.banner_width, 0, self.fuselage_area))
-                                / (0.5 * constants.rho * self.S * Va_M3**2)
-        )
-
-        self.wingCD0_M1_s[i] = aero.get_wing_cd0(self.chord, Va_M1)
-        self.wingCD0_M2_s[i] = aero.get_wing_cd0(self.chord, Va_M2)
-        self.wingCD0_M3_s[i] = aero.get_wing_cd0(self.chord, Va_M3)
-        
-        self.fusCD0_M1_s[i]  = aero.getFuselageCD0(
-            self.fuselage_length, self.effective_diameter,  
-            Va_M1, self.fuselage_wetted_area, self.S
-        )
-
-        self.fusCD0_M2_s[i]  = aero.getFuselageCD0(
-            self.fuselage_length, self.effective_diameter,
-            Va_M2, self.fuselage_wetted_area, self.S
-        )
-        self.fusCD0_M3_s[i]  = aero.getFuselageCD0(
-            self.fuselage_length, self.effective_diameter,
-            Va_M3, self.fuselage_wetted_area, self.S
-        )
-
-        self.zero_lift_drag_M1_s[i] = constants.zero_lift_correction_factor * (
-            self.wingCD0_M1_s[i] + 
-            self.fusCD0_M1_s[i] +
-            self.CD0_tail
-        )
-
-        self.zero_lift_drag_M2_s[i] = constants.zero_lift_correction_factor * (
-            self.wingCD0_M2_s[i] +
-            self.fusCD0_M2_s[i] +
-            self.CD0_tail
-        )
-
-        self.zero_lift_drag_M3_s[i] = constants.zero_lift_correction_factor * (
-            self.wingCD0_M3_s[i] +
-            self.fusCD0_M3_s[i] +
-            self.CD0_tail
-        )
-
-        self.CD_straight_M1[i] = (
-            self.CD0_factor * self.zero_lift_drag_M1_s[i] + self.k * self.M1_CL_list_s[i]**2
-        )
-
-        self.CD_straight_M2[i] = (
-            self.CD0_factor * self.zero_lift_drag_M2_s[i] + self.k * self.M2_CL_list_s[i]**2
-        )
-
-        self.CD_straight_M3[i] = (
-            self.CD0_factor * self.zero_lift_drag_M3_s[i] + self.k * self.M3_CL_list_s[i]**2
-        )
-
-        self.Drag_straight_M1[i] = (
-            0.5 * constants.rho * Va_M1**2 * self.S * self.CD_straight_M1[i]
-        )
-
-        self.Drag_straight_M2[i] = (
-            0.5 * constants.rho * Va_M2**2 * self.S * self.CD_straight_M2[i]
-        )
-
-        self.Banner_CD[i] = aero.get_banner_cd(aero.get_Reynolds(self.banner_length, Va_M3))
-
-        self.Drag_straight_M3[i] = (
-            0.5 * constants.rho * Va_M3**2 * self.S * self.CD_straight_M3[i] + aero.banner_drag(self.banner_length, self.banner_width, Va_M3, self.Banner_CD[i])
-        )
-
-        self.power_straight_M1[i] = self.Drag_straight_M1[i] * Va_M1
-
-        self.power_straight_M2[i] = self.Drag_straight_M2[i] * Va_M2
-
-        self.power_straight_M3[i] = self.Drag_straight_M3[i] * Va_M3
-
-        self.t_straight_M1[i] = distance_breakdown / ca.fabs(v_s_ground_M1)
-
-        self.t_straight_M2[i] = distance_breakdown / ca.fabs(v_s_ground_M2)
-
-        self.t_straight_M3[i] = distance_breakdown / ca.fabs(v_s_ground_M3)
-
-        self.E_lap_M1_straight[i] = (
-            self.power_straight_M1[i] * self.t_straight_M1[i]
-        )
-
-        self.E_lap_M2_straight[i] = (
-            self.power_straight_M2[i] * self.t_straight_M2[i]
-        )
-
-        self.E_lap_M3_straight[i] = (
-            self.power_straight_M3[i] * self.t_straight_M3[i]
-        )
+    weight_M1 = mass.get_weight(self.span, self.chord, 0, 0,
+                                0, 0, self.restraint_weight, self.fuselage_area)
+    weight_M2 = mass.get_weight(self.span, self.chord, self.ducks, self.pucks,
+                                0, 0, self.restraint_weight, self.fuselage_area)
+    weight_M3 = mass.get_weight(self.span, self.chord, 0, 0,
+                                self.banner_length, self.banner_width, 0, self.fuselage_area)
+
+    # first half of the segments fly heading 0, the second half back at heading -pi (into the wind direction)
+    heading = np.where(np.arange(lap_breakdown) >= lap_breakdown // 2, -np.pi, 0)
+
+    # M2 turn segments: no wind, load factor n, length of the segment's share of two circles
+    if not constants.mirrored_turn:
+        self.turn_radius_M2 = self.V_turn_M2 ** 2 / (constants.g * ca.sqrt(self.n_turn_M2**2 - 1))
+    distance_turn = (ca.pi * 4 * self.turn_radius_M2) / lap_breakdown_turn
+
+    straight, turn = np.ones(lap_breakdown), np.ones(lap_breakdown_turn)
+    n_segments = 3 * lap_breakdown + lap_breakdown_turn
+
+    # one row per kernel input, one column per segment: M1, M2, M3 straights then M2 turns
+    segments = segment_kernel().map(n_segments, constants.segment_parallelization)(
+        ca.horzcat(self.V_straight_M1.T, self.V_straight_M2.T, self.V_straight_M3.T, self.V_turn_M2.T),
+        ca.DM(np.concatenate([np.tile(np.cos(heading), 3), turn])).T,
+        ca.DM(np.concatenate([np.tile(np.sin(heading), 3), 0 * turn])).T,
+        ca.horzcat(Vwx * np.tile(straight, 3)[None, :], ca.DM.zeros(1, lap_breakdown_turn)),
+        ca.horzcat(Vwy * np.tile(straight, 3)[None, :], ca.DM.zeros(1, lap_breakdown_turn)),
+        ca.horzcat(ca.DM.ones(1, 3 * lap_breakdown), self.n_turn_M2.T),
+        ca.horzcat(distance_breakdown * ca.DM.ones(1, 3 * lap_breakdown), distance_turn.T),
+        ca.horzcat(ca.repmat(weight_M1, 1, lap_breakdown), ca.repmat(weight_M2, 1, lap_breakdown),
+                   ca.repmat(weight_M3, 1, lap_breakdown), ca.repmat(weight_M2, 1, lap_breakdown_turn)),
+        ca.horzcat(ca.DM.zeros(1, 2 * lap_breakdown), ca.repmat(self.banner_length, 1, lap_breakdown), ca.DM.zeros(1, lap_breakdown_turn)),
+        ca.horzcat(ca.DM.zeros(1, 2 * lap_breakdown), ca.repmat(self.banner_width, 1, lap_breakdown), ca.DM.zeros(1, lap_breakdown_turn)),
+        ca.horzcat(ca.repmat(self.CD0_factor, 1, 3 * lap_breakdown), ca.DM.ones(1, lap_breakdown_turn)),
+        self.S, self.chord, self.fuselage_length, self.effective_diameter, self.fuselage_wetted_area,
+        self.CD0_tail, self.k,
+    )
+
+    # split each output row back into per-mission column vectors
+    offsets = [0, lap_breakdown, 2 * lap_breakdown, 3 * lap_breakdown, n_segments]
+    Va, CL, wingCD0, fusCD0, zero_lift_drag, CD, Drag, power, t, E = (
+        [output[:, offsets[j]:offsets[j + 1]].T for j in range(4)] for output in segments)
+
+    # --------- Turn segments (M2) ---------
+    self.CL_turn_M2 = CL[3]
+    self.wingCD0_M2_t = wingCD0[3]
+    self.fusCD0_M2_t = fusCD0[3]
+    self.zero_lift_drag_M2_t = zero_lift_drag[3]
+    self.CD_turn_M2 = CD[3]
+    self.Drag_turn_M2 = Drag[3]
+    self.power_turn_M2 = power[3]
+    self.t_turn_M2 = t[3]
+    self.e_turn_M2 = E[3] # + self.delta_PE
+
+    opti.subject_to(self.V_turn_M2[1:] >= 0.9 * self.V_turn_M2[:-1])
+    opti.subject_to(self.V_turn_M2[1:] <= 1.1 * self.V_turn_M2[:-1])
+    opti.subject_to(self.CL_turn_M2[1:] <= constants.CLmax)
+
+    # symmetric turn: radius of each segment equals that of its mirror segment
+    if not constants.mirrored_turn:
+        half = lap_breakdown_turn // 2
+        opti.subject_to(self.turn_radius_M2[:half] == self.turn_radius_M2[::-1][:half])
+
+    self.t_turn_total_M2 = ca.sum1(self.t_turn_M2)
+    self.e_turn_total_M2 = ca.sum1(self.e_turn_M2)
+
+    # --------- Straight segments ---------
+    self.M1_CL_list_s, self.M2_CL_list_s, self.M3_CL_list_s = CL[:3]
+    self.wingCD0_M1_s, self.wingCD0_M2_s, self.wingCD0_M3_s = wingCD0[:3]
+    self.fusCD0_M1_s, self.fusCD0_M2_s, self.fusCD0_M3_s = fusCD0[:3]
+    self.zero_lift_drag_M1_s, self.zero_lift_drag_M2_s, self.zero_lift_drag_M3_s = zero_lift_drag[:3]
+    self.CD_straight_M1, self.CD_straight_M2, self.CD_straight_M3 = CD[:3]
+    self.Drag_straight_M1, self.Drag_straight_M2, self.Drag_straight_M3 = Drag[:3]
+    self.power_straight_M1, self.power_straight_M2, self.power_straight_M3 = power[:3]
+    self.t_straight_M1, self.t_straight_M2, self.t_straight_M3 = t[:3]
+    self.E_lap_M1_straight, self.E_lap_M2_straight, self.E_lap_M3_straight = E[:3]
+
+    self.Banner_CD = aero.get_banner_cd(aero.get_Reynolds(self.banner_length, Va[2]))
 
     # --------- Velocity adjacency constraints ---------
     #    v[i] must be within 90–110% of v[i-1]
     mid  = lap_breakdown // 2
     last = lap_breakdown - 1
-    
+
     first = 0
     last_turn = lap_breakdown_turn - 1
-    
-
-    for i in range(1, lap_breakdown):
-        opti.subject_to(self.V_straight_M1[i] >= 0.9 * self.V_straight_M1[i-1])
-        opti.subject_to(self.V_straight_M1[i] <= 1.1 * self.V_straight_M1[i-1])
-        opti.subject_to(self.V_straight_M2[i] >= 0.9 * self.V_straight_M2[i-1])
-        opti.subject_to(self.V_straight_M2[i] <= 1.1 * self.V_straight_M2[i-1])
-        opti.subject_to(self.V_straight_M3[i] >= 0.9 * self.V_straight_M3[i-1])
-        opti.subject_to(self.V_straight_M3[i] <= 1.1 * self.V_straight_M3[i-1])
-        # opti.subject_to(self.V_straight_M3[i] >= 20)  # min speed for M3
-        opti.subject_to(self.M1_CL_list_s[i] <= constants.CLmax)
-        opti.subject_to(self.M2_CL_list_s[i] <= constants.CLmax)
-        opti.subject_to(self.M3_CL_list_s[i] <= constants.CLmax)
-        # opti.subject_to(self.V_straight_M3[i] >= 16)
-        # opti.subject_to(self.V_straight_M3[i] >= 16)
+
+    opti.subject_to(self.V_straight_M1[1:] >= 0.9 * self.V_straight_M1[:-1])
+    opti.subject_to(self.V_straight_M1[1:] <= 1.1 * self.V_straight_M1[:-1])
+    opti.subject_to(self.V_straight_M2[1:] >= 0.9 * self.V_straight_M2[:-1])
+    opti.subject_to(self.V_straight_M2[1:] <= 1.1 * self.V_straight_M2[:-1])
+    opti.subject_to(self.V_straight_M3[1:] >= 0.9 * self.V_straight_M3[:-1])
+    opti.subject_to(self.V_straight_M3[1:] <= 1.1 * self.V_straight_M3[:-1])
+    opti.subject_to(self.M1_CL_list_s[1:] <= constants.CLmax)
+    opti.subject_to(self.M2_CL_list_s[1:] <= constants.CLmax)
+    opti.subject_to(self.M3_CL_list_s[1:] <= constants.CLmax)
 
     # straight ↔ turn velocity consistency
     opti.subject_to(self.V_straight_M1[mid] >= 0.9 * self.V_turn_M1)
@@ -344,24 +213,24 @@ def lap_sim(self, opti):
 
     # --------- Lap time & laps flown ---------
 
-    self.e_straight_total_M1 = sum(self.E_lap_M1_straight)
-    self.t_straight_total_M1 = sum(self.t_straight_M1)
+    self.e_straight_total_M1 = ca.sum1(self.E_lap_M1_straight)
+    self.t_straight_total_M1 = ca.sum1(self.t_straight_M1)
 
-    self.t_straight_total_M2 = sum(self.t_straight_M2)
-    self.e_straight_total_M2 = sum(self.E_lap_M2_straight)
+    self.t_straight_total_M2 = ca.sum1(self.t_straight_M2)
+    self.e_straight_total_M2 = ca.sum1(self.E_lap_M2_straight)
 
-    self.average_load_M1 = (sum(p**2 for p in self.power_straight_M1) / lap_breakdown)**0.5
+    self.average_load_M1 = (ca.sumsqr(self.power_straight_M1) / lap_breakdown)**0.5
 
-    self.average_load_M2 = (sum(p**2 for p in self.power_straight_M2) / lap_breakdown)**0.5
+    self.average_load_M2 = (ca.sumsqr(self.power_straight_M2) / lap_breakdown)**0.5
 
-    self.t_straight_total_M3 = sum(self.t_straight_M3)
-    self.e_straight_total_M3 = sum(self.E_lap_M3_straight)
+    self.t_straight_total_M3 = ca.sum1(self.t_straight_M3)
+    self.e_straight_total_M3 = ca.sum1(self.E_lap_M3_straight)
 
-    self.average_load_M3 = sum(self.power_straight_M3) / lap_breakdown
+    self.average_load_M3 = ca.sum1(self.power_straight_M3) / lap_breakdown
 
-    self.average_M2_drag_straight = sum(self.Drag_straight_M2) / lap_breakdown
-    self.average_M3_drag_straight = sum(self.Drag_straight_M3) / lap_breakdown
+    self.average_M2_drag_straight = ca.sum1(self.Drag_straight_M2) / lap_breakdown
+    self.average_M3_drag_straight = ca.sum1(self.Drag_straight_M3) / lap_breakdown
 
     self.average_velocity_M1 = ca.sum1(self.V_straight_M1) / lap_breakdown
     self.average_velocity_M2 = ca.sum1(self.V_straight_M2) / lap_breakdown
-    self.average_velocity_M3 = ca.sum1(self.V_straight_M3) / lap_breakdown
\ No newline at end of file
+    self.average_velocity_M3 = ca.sum1(self.V_straight_M3) / lap_breakdown
\ No newline at end of file
@@ -9,6 +9,7 @@ import Optimization
 import constants
 import constraints
 import missions
+import telemetry
 import argparse
 
 import unit_conversion as units
@@ -20,6 +21,16 @@ parser.add_argument(
     action="store_true",
     help="Flag to perform optimizations on airfoil. Very slow"
 )
+parser.add_argument(
+    "--telemetry",
+    metavar="PATH",
+    help="Append a record of every solve to this JSON lines file"
+)
+parser.add_argument(
+    "--trace",
+    metavar="PATH",
+    help="Stream every IPOPT iteration to this JSON lines file, e.g. to follow with tail -f"
+)
 args = parser.parse_args()
 
 
@@ -29,7 +40,10 @@ mission_2 = missions.mission_2
 mission_3 = missions.mission_3
 
 # optimize
+log = telemetry.Log(args.telemetry) if args.telemetry else None
 optimizer = Optimization.Optimizer(
+    log=log,
+    trace=telemetry.Trace(args.trace) if args.trace else None,
     airfoil= "opti" if args.optimize_airfoil else "e216", 
     fuse_weight=20, 
     wing_density=constants.PINK_FOAM_DENSITY,
@@ -59,4 +73,7 @@ for mission, score, craft in zip(["MISSION 2", "MISSION 3", "OPTIMIAL"], scores,
     print("Banner Length: ", craft.banner_length)
     print("Banner Width: ", craft.banner_width)
     craft.plot_vlm()
-    craft.wing.draw()
\ No newline at end of file
+    craft.wing.draw()
+
+if log is not None:
+    telemetry.print_summary(log.summary())
\ No newline at end of file
@@ -0,0 +1,285 @@
+# aircraft optimization problem: design variables, mission scoring, constraints and solver
+# building a Model has no side effects, so worker processes can each build their own
+
+import aerosandbox as asb
+import aerosandbox.numpy as np
+import constants
+import aero_functions as aero
+import initialization as in_
+import casadi as ca
+import mass_buildup as mass
+import lap_simulator
+from solver import Solver
+
+
+class Aircraft():
+
+    def __init__(self, opti, lap_breakdown=None, lap_breakdown_turn=None, profile=None):
+        # segments per straight and per turn of the lap simulation, constants.py by default
+        self.lap_breakdown = constants.lap_breakdown if lap_breakdown is None else lap_breakdown
+        self.lap_breakdown_turn = constants.lap_breakdown_turn if lap_breakdown_turn is None else lap_breakdown_turn
+
+        build(self, opti, self.subsystems, profile)
+
+    def turn_drag(self, opti):
+        self.banner_turn = aero.get_banner_cd(aero.get_Reynolds(self.banner_length, self.V_turn_M3))
+
+        self.Drag_turn_M1 = constants.inducedDragFactor * 0.5 * constants.rho * self.V_turn_M1**2 * self.S * self.CD_turn_M1
+
+        self.Drag_turn_M3 = constants.inducedDragFactor * 0.5 * constants.rho * self.V_turn_M3**2 * self.S * self.CD_turn_M3 + constants.banner_turn_drag_factor * aero.banner_drag(self.banner_length, self.banner_width, self.V_turn_M3, self.banner_turn)
+
+        self.CD_turn_M3     += self.CD0_tail
+
+        # fuselage optimization
+
+
+        self.fusdragM3_t = constants.fuselage_drag_factor * 0.5 * constants.rho * self.V_turn_M3**2 * self.S * aero.getFuselageCD0(self.fuselage_length, self.effective_diameter, self.V_turn_M3, self.fuselage_wetted_area, self.S)
+
+        self.Drag_turn_M3 += self.fusdragM3_t
+        in_.powerParm(self, opti)
+
+    # built in this order, profile with build_profile.py
+    subsystems = [
+        ("mission_parm", in_.mission_parm),
+        ("fuselage_parm", in_.fuselage_parm),
+        ("sweepParm", in_.sweepParm),
+        ("velocity_parm", in_.velocity_parm),
+        ("airplane_parm", in_.airplane_parm),
+        ("CD_planform", in_.CD_planform),
+        ("lap_sim", lap_simulator.lap_sim),
+        ("turn_drag", turn_drag),
+    ]
+
+
+class Scenario(Aircraft):
+    # the same aircraft flown in another wind: its own wind parameters, speeds and load factors,
+    # everything else (span, chord, fuselage, banner, cargo, parameters) is the shared aircraft's
+
+    subsystems = [
+        ("velocity_parm", in_.velocity_parm),
+        ("turn_parm", in_.turn_parm),
+        ("CD_planform", in_.CD_planform),
+        ("lap_sim", lap_simulator.lap_sim),
+        ("turn_drag", Aircraft.turn_drag),
+    ]
+
+    def __init__(self, plane, opti, profile=None):
+        self.plane = plane
+        build(self, opti, self.subsystems, profile)
+
+    def __getattr__(self, name):
+        # only called for attributes the scenario does not have itself
+        if name == "plane":
+            raise AttributeError(name)
+        return getattr(self.plane, name)
+
+
+def build(plane, opti, subsystems, profile=None):
+    # run the subsystems of an Aircraft or Scenario in order, through the profiler if given one
+    for name, subsystem in subsystems:
+        if profile is None:
+            subsystem(plane, opti)
+        else:
+            profile.measure(name, subsystem, plane, opti)
+
+
+class Mission():
+    # flight and scoring of the three missions by one aircraft (or wind scenario of it)
+
+    def __init__(self, plane):
+        self.plane = plane
+
+        self.weight_M1 = mass.get_weight(plane.span, plane.chord, 0, 0, 0, 0, plane.restraint_weight, plane.fuselage_area)
+        self.weight_M2 = mass.get_weight(plane.span, plane.chord, plane.ducks, plane.pucks, 0, 0, plane.restraint_weight, plane.fuselage_area)
+        self.weight_M3 = mass.get_weight(plane.span,  plane.chord, 0, 0, plane.banner_length, plane.banner_width, 0, plane.fuselage_area) + plane.extra_weight
+
+        self.V_stall = ((2 * self.weight_M2 / constants.g)/(constants.rho * plane.S * constants.CLmax))**0.5
+
+        self.turn_radius_M1 = plane.V_turn_M1**2 / (constants.g * np.sqrt(plane.n_turn_M1**2 - 1))
+        self.turn_radius_M3 = plane.V_turn_M3**2 / (constants.g * np.sqrt(plane.n_turn_M3**2 - 1))
+
+        circumfrence_M1 = np.pi * 2 * self.turn_radius_M1
+
+        circumfrence_M3 = np.pi * 2 * self.turn_radius_M3
+
+        self.t_turn_M1 = circumfrence_M1 / plane.V_turn_M1
+        self.t_turn_M3 = circumfrence_M3 / plane.V_turn_M3
+
+        self.E_lap_M1 = plane.power_turn_M1 * self.t_turn_M1 * 2 + plane.e_straight_total_M1 #
+        self.E_lap_M2 = plane.e_turn_total_M2 + plane.e_straight_total_M2 #
+        self.E_lap_M3 = plane.power_turn_M3 * self.t_turn_M3 * 2 + plane.e_straight_total_M3 #
+
+        self.t_lap_M1 = plane.t_straight_total_M1 + 2 * self.t_turn_M1 #
+        self.t_lap_M2 = plane.t_straight_total_M2 + plane.t_turn_total_M2 #
+        self.t_lap_M3 = plane.t_straight_total_M3 + 2 * self.t_turn_M3 #
+
+        self.laps_flown_M1 = 300 / self.t_lap_M1
+        self.laps_flown_M2 = 300 / self.t_lap_M2
+        self.laps_flown_M3 = 300 / self.t_lap_M3
+
+    def flight_constraints(self):
+        plane = self.plane
+
+        M1energyusable = aero.energy_usable(plane.average_load_M1, plane.M1_battery) #
+        M2energyusable = aero.energy_usable(plane.average_load_M2, plane.M2_battery) #
+        M3energyusable = aero.energy_usable(plane.average_load_M3, plane.M3_battery) #
+
+        return [
+            plane.n_turn_M2 <= plane.max_g,
+            plane.n_turn_M1 <= plane.max_g,
+            plane.n_turn_M3 <= plane.max_g,
+            plane.CL_turn_M3 <= plane.CLmax,
+            self.E_lap_M1 * self.laps_flown_M1 <= M1energyusable,
+            self.E_lap_M2 * self.laps_flown_M2 <= M2energyusable,
+            self.E_lap_M3 * self.laps_flown_M3 <= M3energyusable,
+        ]
+
+    def GM_Score(self):
+        return 1/((1.667 * (self.plane.ducks + self.plane.pucks)) + 11.57)
+
+    def M1_Score(self):
+
+        return np.where(self.laps_flown_M1 >= 7, 1, 0) * 1/(self.t_lap_M1)
+
+    def M_2Score(self):
+        plane = self.plane
+        Income = (plane.ducks * (constants.lp1 + (constants.lp2 * self.laps_flown_M2))) + (plane.pucks * (constants.lc1 + (constants.lc2 * self.laps_flown_M2)))
+        Cost = (self.laps_flown_M2) * (constants.Ce + (plane.ducks * constants.Cp) + (plane.pucks * constants.Cc)) * (plane.M2_battery / constants.batteryCapacity)
+        Net_Income = Income - Cost
+        return Net_Income
+
+    def M_3Score(self):
+        RAC = 0.75 + 0.05 * self.plane.span * 3.28
+       #  RAC = 1
+        M3 = (self.laps_flown_M3) * self.plane.banner_length / RAC
+        return M3
+
+    def real_M_3Score(self):
+        RAC = 0.75 + 0.05 * self.plane.span * 3.28
+       #  RAC = 1
+        M3 = ca.floor(self.laps_flown_M3) * self.plane.banner_length / RAC
+        return M3
+
+    def Net_Score(self, normalizedM1, normalizedM2, normalizedGM, normalizedM3):
+        return (self.GM_Score() / normalizedGM) + (self.M1_Score() / normalizedM1) + (1 + self.M_2Score() / normalizedM2) + (2 + self.M_3Score() / normalizedM3)
+
+
+class Model(Mission):
+
+    # single mission solves whose optimum normalizes the net score
+    stages = {
+        "M1": "M1",
+        "M2": "M2",
+        "GM": "GM",
+        "M3": {"M3": 1, "ducks_penalty": 1},
+    }
+
+    def __init__(self, scenarios=1, lap_breakdown=None, lap_breakdown_turn=None, profile=None):
+        # scenarios > 1 flies the shared design in that many winds (set_winds) and the objectives
+        # become their averages, one NLP for the expected score instead of a solve per wind
+        # profile: build_profile.Profile to time the subsystems of the aircraft and scenarios
+        self.opti = opti = asb.Opti()
+        self.plane = plane = Aircraft(opti, lap_breakdown, lap_breakdown_turn, profile)
+
+        super().__init__(plane)
+        self.scenarios = [self] + [Mission(Scenario(plane, opti, profile)) for _ in range(scenarios - 1)]
+
+        opti.set_value(plane.PropEff, 0.7)
+
+        # constraints
+        constraints = [
+            plane.AR >= 4,
+            plane.AR <= 20,
+            plane.ducks <= constants.duck_constraint,
+            plane.banner_length == 5 * plane.banner_width,
+            plane.ducks >= 3 * plane.pucks,
+            plane.span >= constants.minSpan,
+            plane.span <= constants.maxSpan,
+            plane.fuselage_box_length < 2,
+            plane.fuselage_box_length > 0.07,
+            plane.fuselage_width > 0.085,
+            plane.fuselage_height > 0.1,
+            plane.fuselage_height * plane.fuselage_width > plane.total_volume,  # fus constraints
+            plane.fuselage_box_length * plane.fuselage_width > plane.total_area,
+        ]
+        for scenario in self.scenarios:
+            constraints += scenario.flight_constraints()
+
+        opti.set_value(plane.CLmax, 1.1)
+
+        for c in constraints:
+            opti.subject_to(c)
+
+
+        opti.set_value(plane.ground_tax, 0)
+        for scenario in self.scenarios:
+            opti.set_value(scenario.plane.wind_speed, 0)
+            opti.set_value(scenario.plane.wing_direction, 0)
+
+        opti.set_value(plane.max_g, 5.65)
+        opti.set_value(plane.min_V3_speed, 5)
+        opti.set_value(plane.skin_friction_drag, constants.CD0)
+        opti.set_value(plane.oswaldEff, 0.7)
+
+        # normalizers are parameters so the net score objective is compiled along with the others
+        self.normalizer_M1 = opti.parameter(value=1)
+        self.normalizer_M2 = opti.parameter(value=1)
+        self.normalizer_GM = opti.parameter(value=1)
+        self.normalizer_M3 = opti.parameter(value=1)
+
+        self.banner_target = opti.parameter(value=0)
+
+        self.netScore = self.expected_Net_Score(self.normalizer_M1, self.normalizer_M2, self.normalizer_GM, self.normalizer_M3)
+
+        self.solver = Solver(opti, {
+            "M1": self.expected(Mission.M1_Score),
+            "M2": self.expected(Mission.M_2Score),
+            "GM": self.expected(Mission.GM_Score),
+            "M3": self.expected(Mission.M_3Score),
+            "net": self.netScore,
+            "ducks_penalty": -(plane.ducks - 3)**2,
+            "span_penalty": -(plane.span - constants.maxSpan)**2,
+            "banner_target": -(plane.banner_length - self.banner_target)**2,
+        }, expand=constants.segment_parallelization == "serial", compiled=constants.compile_nlp)
+
+        # parameters named after their attributes, extra wind scenarios as "scenario2.wind_speed"
+        self.solver.name_parameters(vars(plane))
+        self.solver.name_parameters(vars(self))
+        for k, scenario in enumerate(self.scenarios[1:], 2):
+            self.solver.name_parameters({f"scenario{k}.{name}": value for name, value in vars(scenario.plane).items()})
+
+    def expected(self, score, *args):
+        # average of a Mission score over the wind scenarios, the score itself for one scenario
+        if len(self.scenarios) == 1:
+            return score(self, *args)
+        return sum(score(scenario, *args) for scenario in self.scenarios) / len(self.scenarios)
+
+    def expected_Net_Score(self, normalizedM1, normalizedM2, normalizedGM, normalizedM3):
+        return self.expected(Mission.Net_Score, normalizedM1, normalizedM2, normalizedGM, normalizedM3)
+
+    def stage_score(self, stage):
+        # unweighted score a normalization stage maximizes
+        return self.expected({"M1": Mission.M1_Score, "M2": Mission.M_2Score, "GM": Mission.GM_Score, "M3": Mission.M_3Score}[stage])
+
+    def set_normalizers(self, normalizedM1, normalizedM2, normalizedGM, normalizedM3):
+        self.opti.set_value(self.normalizer_M1, normalizedM1)
+        self.opti.set_value(self.normalizer_M2, normalizedM2)
+        self.opti.set_value(self.normalizer_GM, normalizedGM)
+        self.opti.set_value(self.normalizer_M3, normalizedM3)
+
+    def normalize(self, **kwargs):
+        # solve the single mission stages in turn and use their optimum as the net score normalizers
+        solutions = {stage: self.solver.solve(objective, **kwargs) for stage, objective in self.stages.items()}
+        self.set_normalizers(*(solutions[stage](self.stage_score(stage)) for stage in ["M1", "M2", "GM", "M3"]))
+        return solutions
+
+    def set_winds(self, wind_speeds, wind_directions):
+        # one wind per scenario
+        for scenario, speed, direction in zip(self.scenarios, wind_speeds, wind_directions, strict=True):
+            self.opti.set_value(scenario.plane.wind_speed, speed)
+            self.opti.set_value(scenario.plane.wing_direction, direction)
+
+    def set_parameters(self, **values):
+        # set Aircraft parameters by attribute name, e.g. set_parameters(wind_speed=5)
+        for name, value in values.items():
+            self.opti.set_value(getattr(self.plane, name), value)
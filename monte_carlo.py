@@ -0,0 +1,227 @@
+"""
+Wind Monte Carlo of the net score design.
+
+Wind samples from `normalDistribution.sample_wind` are solved in worker processes, each with its
+own model, and every result is appended to a JSON lines file as soon as it comes back. Running
+again with the same file skips the samples already in it, so a killed run picks up where it
+stopped.
+
+The first line of the file records the run (seed, number of samples, wind distribution,
+objective, normalizers), every following line one sample. A sample whose worker raised is
+recorded as failed with the exception as its return status.
+
+Example
+-------
+    python monte_carlo.py monte_carlo.jsonl -n 300 --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import normalDistribution as nd
+import parallel
+from export import ColumnWriter
+from model import Model
+
+OUTPUTS = ["banner_length", "V_straight_M3"]
+
+
+def load(path:str) -> tuple[dict, list]:
+    """
+    Read a result file.
+
+    Returns
+    -------
+    dict
+        Run header, None if the file does not exist yet.
+    list[dict]
+        Finished samples. A line cut short by a killed run is dropped.
+    """
+    if not os.path.exists(path):
+        return None, []
+
+    header, records = None, []
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if header is None:
+                header = record
+            else:
+                records.append(record)
+
+    return header, records
+
+
+def statistics(records:list) -> dict:
+    """
+    Mean and standard deviation of the banner length and mean M3 speed over the converged samples.
+    """
+    solved = [r for r in records if r['success']]
+    banner = np.array([r['banner'] for r in solved])
+    V_M3 = np.array([r['V_M3_mean'] for r in solved])
+
+    return {
+        'solved': len(solved),
+        'failed': len(records) - len(solved),
+        'banner_mean': banner.mean() if solved else np.nan,
+        'banner_std': banner.std() if solved else np.nan,
+        'V_M3_mean': V_M3.mean() if solved else np.nan,
+        'V_M3_std': V_M3.std() if solved else np.nan,
+    }
+
+
+def print_statistics(stats:dict, total:int) -> None:
+    print(f"[{stats['solved'] + stats['failed']}/{total}] {stats['failed']} failed | "
+          f"banner {stats['banner_mean']:.4f} +/- {stats['banner_std']:.4f} m | "
+          f"V_M3 {stats['V_M3_mean']:.3f} +/- {stats['V_M3_std']:.3f} m/s")
+
+
+def run(path:str, N:int=300, seed:int=0, workers:int=None, objective:dict=None, model:Model=None,
+        report_every:int=10, writer:ColumnWriter=None) -> list:
+    """
+    Solve the net design over N wind samples, resuming from `path` if it already has results.
+
+    Parameters
+    ----------
+    path : str
+        JSON lines result file.
+    N : int
+        Number of wind samples.
+    seed : int
+        Seed of the wind samples, a resumed run must use the same one, the same
+        `normalDistribution.WIND_DISTRIBUTION` and the same objective.
+    workers : int
+        Number of worker processes, defaults to the CPU count.
+    objective : dict
+        Objective, see `Solver.set_objective`. Defaults to net score with the ducks penalty.
+    model : Model
+        Model whose normalizers are used, normalized here if not given. Ignored on resume, the
+        normalizers in the file are used.
+    report_every : int
+        Print the running statistics every this many samples.
+    writer : ColumnWriter
+        Also stream every new sample to it, failed outputs as NaN.
+
+    Returns
+    -------
+    list[dict]
+        Every sample of the run, in sample order.
+    """
+    if objective is None:
+        objective = {"net": 1, "ducks_penalty": 1}
+
+    header, records = load(path)
+
+    if header is None:
+        if model is None:
+            model = Model()
+            model.normalize(verbose=False)
+        normalizers = [float(model.opti.value(n)) for n in
+                       [model.normalizer_M1, model.normalizer_M2, model.normalizer_GM, model.normalizer_M3]]
+
+        header = {'seed': seed, 'samples': N, 'distribution': nd.WIND_DISTRIBUTION, 'objective': objective,
+                  'normalizers': normalizers}
+        with open(path, 'w') as f:
+            f.write(json.dumps(header) + "\n")
+
+    elif (header['seed'], header['samples']) != (seed, N):
+        raise ValueError(f"{path} holds a run with seed {header['seed']} and {header['samples']} samples, "
+                         f"not seed {seed} and {N} samples")
+
+    elif header.get('distribution') != json.loads(json.dumps(nd.WIND_DISTRIBUTION)):
+        raise ValueError(f"{path} holds a run drawn from the wind distribution {header.get('distribution')}, "
+                         f"not {nd.WIND_DISTRIBUTION}")
+
+    elif header['objective'] != json.loads(json.dumps(objective)):
+        raise ValueError(f"{path} holds a run with the objective {header['objective']}, not {objective}")
+
+    wind_speeds, wind_dirs = nd.sample_wind(header['samples'], seed=header['seed'])
+
+    done = {r['index'] for r in records}
+    pending = [i for i in range(header['samples']) if i not in done]
+
+    if done:
+        print(f"Resuming {path}: {len(done)} of {header['samples']} samples done")
+        print_statistics(statistics(records), header['samples'])
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=parallel.init_worker,
+                                 initargs=(tuple(header['normalizers']),)) as pool, open(path, 'a') as f:
+            futures = {
+                pool.submit(parallel.solve_point, {"wind_speed": wind_speeds[i], "wing_direction": wind_dirs[i]},
+                            header['objective'], OUTPUTS): i
+                for i in pending
+            }
+
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    stats, outputs = future.result()
+                except BrokenProcessPool:
+                    # the pool is gone, the samples not written yet are solved on resume
+                    raise
+                except Exception as e:
+                    stats = {'success': False, 'return_status': f"{type(e).__name__}: {e}", 'iter_count': 0}
+                    outputs = dict.fromkeys(OUTPUTS)
+
+                record = {
+                    'index': i,
+                    'wind_speed': float(wind_speeds[i]),
+                    'wind_dir': float(wind_dirs[i]),
+                    'success': stats['success'],
+                    'return_status': stats['return_status'],
+                    'iter_count': stats['iter_count'],
+                    'banner': outputs['banner_length'],
+                    'V_M3_mean': None if outputs['V_straight_M3'] is None else float(np.mean(outputs['V_straight_M3'])),
+                }
+                records.append(record)
+
+                # one complete line per sample, flushed so a kill loses at most the one being written
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+
+                if writer is not None:
+                    writer.append({key: np.nan if value is None else value for key, value in record.items()})
+
+                if len(records) % report_every == 0 or len(records) == header['samples']:
+                    print_statistics(statistics(records), header['samples'])
+
+    return sorted(records, key=lambda r: r['index'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wind Monte Carlo of the net score design.")
+    parser.add_argument("path", help="JSON lines result file, resumed if it exists")
+    parser.add_argument("-n", "--samples", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--report-every", type=int, default=10)
+    parser.add_argument("--export", metavar="FOLDER", help="Also stream every sample to chunked .npz files in this folder")
+    args = parser.parse_args()
+
+    writer = ColumnWriter(args.export) if args.export else None
+    records = run(args.path, args.samples, args.seed, args.workers, report_every=args.report_every, writer=writer)
+    if writer is not None:
+        writer.close()
+    stats = statistics(records)
+
+    print("Optimal weighted banner:", stats['banner_mean'])
+    print("Std deviation:", stats['banner_std'])
+    print("Mean M3 speed:", stats['V_M3_mean'])
+    print("M3 speed std:", stats['V_M3_std'])
+
+
+if __name__ == "__main__":
+    main()
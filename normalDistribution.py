@@ -2,13 +2,23 @@
 
 import numpy as np
 
-def sample_wind(num_samples):
+# what sample_wind draws from, recorded by a Monte Carlo run so it is only resumed with the same draws
+WIND_DISTRIBUTION = {
+    'speed': 'rayleigh',
+    'speed_mean_mph': 12.9, # average wind speed in mph
+    'direction': 'uniform',
+    'direction_range': [-np.pi, np.pi],
+}
+
+def sample_wind(num_samples, seed=None):
     # Example: Rayleigh distribution for speed, uniform for direction
     # Choose scale so mean ~ 10 mph (convert to m/s)
-    mean_mph = 12.9 # average wind speed in mph
+    mean_mph = WIND_DISTRIBUTION['speed_mean_mph']
     mean_ms = mean_mph * 0.44704
     # Rayleigh scale parameter so that E[V] = scale * sqrt(pi/2)
     scale = mean_ms / np.sqrt(np.pi/2)
-    speeds = np.random.rayleigh(scale, size=num_samples)
-    directions = np.random.uniform(-np.pi, np.pi, size=num_samples)
+    # a seed gives the same draws every time, e.g. to resume a Monte Carlo run
+    rng = np.random if seed is None else np.random.RandomState(seed)
+    speeds = rng.rayleigh(scale, size=num_samples)
+    directions = rng.uniform(*WIND_DISTRIBUTION['direction_range'], size=num_samples)
     return speeds, directions
\ No newline at end of file
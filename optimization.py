@@ -1,800 +1,541 @@
 # this will serve as the optimization for the entire aircraft
+# importing it has no side effects: the model is built and solved when a Design is first asked for,
+# and the report, sensitivities and wind sweep of a full run are separate functions (see main)
+
+import argparse
+import os
 
 import aerosandbox as asb
 import aerosandbox.numpy as np
 import constants
 import aero_functions as aero
 import matplotlib.pyplot as plt
-import initialization as in_
 import casadi as ca
 import mass_buildup as mass
-import lap_simulator
 import normalDistribution as nd
+import parallel
+import sweep as sw
+import sensitivity
+import telemetry
+from model import Model
+from report import Report
+from export import ColumnWriter
+from solver import Solution, print_warm_start_report
+from store import Store
+from retry import RUNGS, Ladder
+from supervised import Watchdog
 
 
 load_voltage = 22.2
 
-opti = asb.Opti()
-
-class Aircraft():
-
-    def __init__(self):
-        in_.mission_parm(self, opti)
-        in_.fuselage_parm(self, opti)
-        in_.sweepParm(self, opti)
-        in_.velocity_parm(self, opti)
-        in_.airplane_parm(self, opti)
-        in_.CD_planform(self, opti) 
-        lap_simulator.lap_sim(self, opti)
-
-        self.banner_turn = aero.get_banner_cd(aero.get_Reynolds(self.banner_length, self.V_turn_M3))
-
-        self.Drag_turn_M1 = constants.inducedDragFactor * 0.5 * constants.rho * self.V_turn_M1**2 * self.S * self.CD_turn_M1
-
-        self.Drag_turn_M3 = constants.inducedDragFactor * 0.5 * constants.rho * self.V_turn_M3**2 * self.S * self.CD_turn_M3 + constants.banner_turn_drag_factor * aero.banner_drag(self.banner_length, self.banner_width, self.V_turn_M3, self.banner_turn)
-        
-        self.CD_turn_M3     += self.CD0_tail
-
-        # fuselage optimization
-
-    
-        self.fusdragM3_t = constants.fuselage_drag_factor * 0.5 * constants.rho * self.V_turn_M3**2 * self.S * aero.getFuselageCD0(self.fuselage_length, self.effective_diameter, self.V_turn_M3, self.fuselage_wetted_area, self.S)
-    
-        self.Drag_turn_M3 += self.fusdragM3_t
-        in_.powerParm(self, opti)
-
-def GM_Score():
-    return 1/((1.667 * (plane.ducks + plane.pucks)) + 11.57)
-
-def M1_Score():
-
-    return np.where(laps_flown_M1 >= 7, 1, 0) * 1/(t_lap_M1)
-
-def M_2Score():
-    Income = (plane.ducks * (constants.lp1 + (constants.lp2 * laps_flown_M2))) + (plane.pucks * (constants.lc1 + (constants.lc2 * laps_flown_M2)))
-    Cost = (laps_flown_M2) * (constants.Ce + (plane.ducks * constants.Cp) + (plane.pucks * constants.Cc)) * (plane.M2_battery / constants.batteryCapacity)
-    Net_Income = Income - Cost
-    return Net_Income
-
-def M_3Score():
-    RAC = 0.75 + 0.05 * plane.span * 3.28
-   #  RAC = 1
-    M3 = (laps_flown_M3) * plane.banner_length / RAC
-    return M3
-
-def real_M_3Score():
-    RAC = 0.75 + 0.05 * plane.span * 3.28
-   #  RAC = 1
-    M3 = ca.floor(laps_flown_M3) * plane.banner_length / RAC
-    return M3
-
-plane = Aircraft()
-
-
-weight_M1 = mass.get_weight(plane.span, plane.chord, 0, 0, 0, 0, plane.restraint_weight, plane.fuselage_area)
-weight_M2 = mass.get_weight(plane.span, plane.chord, plane.ducks, plane.pucks, 0, 0, plane.restraint_weight, plane.fuselage_area)
-weight_M3 = mass.get_weight(plane.span,  plane.chord, 0, 0, plane.banner_length, plane.banner_width, 0, plane.fuselage_area) + plane.extra_weight
-
-V_stall = ((2 * weight_M2 / constants.g)/(constants.rho * plane.S * constants.CLmax))**0.5
-
-turn_radius_M1 = plane.V_turn_M1**2 / (constants.g * np.sqrt(plane.n_turn_M1**2 - 1))
-turn_radius_M3 = plane.V_turn_M3**2 / (constants.g * np.sqrt(plane.n_turn_M3**2 - 1))
-
-circumfrence_M1 = np.pi * 2 * turn_radius_M1
-
-circumfrence_M3 = np.pi * 2 * turn_radius_M3
-
-t_turn_M1 = circumfrence_M1 / plane.V_turn_M1
-t_turn_M3 = circumfrence_M3 / plane.V_turn_M3
-
-E_lap_M1 = plane.power_turn_M1 * t_turn_M1 * 2 + plane.e_straight_total_M1 #
-E_lap_M2 = plane.e_turn_total_M2 + plane.e_straight_total_M2 # 
-E_lap_M3 = plane.power_turn_M3 * t_turn_M3 * 2 + plane.e_straight_total_M3 # 
-
-t_lap_M1 = plane.t_straight_total_M1 + 2 * t_turn_M1 #
-t_lap_M2 = plane.t_straight_total_M2 + plane.t_turn_total_M2 # 
-t_lap_M3 = plane.t_straight_total_M3 + 2 * t_turn_M3 # 
-
-laps_flown_M1 = 300 / t_lap_M1
-laps_flown_M2 = 300 / t_lap_M2
-laps_flown_M3 = 300 / t_lap_M3
-
-opti.set_value(plane.PropEff, 0.7)
-
-M1energyusable = aero.energy_usable(plane.average_load_M1, plane.M1_battery) #
-M2energyusable = aero.energy_usable(plane.average_load_M2, plane.M2_battery) # 
-M3energyusable = aero.energy_usable(plane.average_load_M3, plane.M3_battery) # 
-
-
-# constraints
-constraints = [
-    plane.n_turn_M2 <= plane.max_g,
-    plane.AR >= 4,
-    plane.AR <= 20,
-    plane.n_turn_M1 <= plane.max_g,
-    plane.n_turn_M3 <= plane.max_g,
-    plane.ducks <= constants.duck_constraint,
-    plane.banner_length == 5 * plane.banner_width,
-    plane.CL_turn_M3 <= plane.CLmax,
-    plane.ducks >= 3 * plane.pucks,
-    E_lap_M1 * laps_flown_M1 <= M1energyusable,
-    E_lap_M2 * laps_flown_M2 <= M2energyusable,
-    E_lap_M3 * laps_flown_M3 <= M3energyusable,
-    plane.span >= constants.minSpan,
-    plane.span <= constants.maxSpan,
-    plane.fuselage_box_length < 2,
-    plane.fuselage_box_length > 0.07,
-    plane.fuselage_width > 0.085,
-    plane.fuselage_height > 0.1,
-    plane.fuselage_height * plane.fuselage_width > plane.total_volume,  # fus constraints
-    plane.fuselage_box_length * plane.fuselage_width > plane.total_area,
-]
-
-opti.set_value(plane.CLmax, 1.1)
-
-for c in constraints:
-    opti.subject_to(c)
-
-
-opti.set_value(plane.ground_tax, 0)
-opti.set_value(plane.wind_speed, 0)
-opti.set_value(plane.wing_direction, 0)
-
-# opti.set_value(plane.wind_speed, 2)
-# opti.set_value(plane.wing_direction, 0)
-
-opti.set_value(plane.max_g, 5.65)
-opti.set_value(plane.min_V3_speed, 5)
-opti.set_value(plane.skin_friction_drag, constants.CD0)
-opti.set_value(plane.oswaldEff, 0.7)
-# opti.set_value(plane.banner_length, 7)
-
-#M1 
-
-m1_ma = opti.maximize(M1_Score())
-
-solm1 = opti.solve(verbose=False)
-
-normalizedM1 = solm1(M1_Score())
-
-#M2
-m2_ma = opti.maximize(M_2Score())
-
-solm2 = opti.solve(verbose=False)
-
-print("solm2 ducks" + str(solm2(plane.ducks)))
-print("laps flown m2 " + str(solm2(laps_flown_M2)))
-
-normalizedM2 = solm2(M_2Score())
-
-#GM
-
-gm_ma = opti.maximize(GM_Score())
-
-solgm = opti.solve(verbose=False)
-
-normalizedGM = solgm(GM_Score())
-
-#M3
-m3_ma = opti.maximize(M_3Score() - (plane.ducks - 3)**2)
-
-solM3 = opti.solve(verbose=False)
-
-print("Plane span", solM3(plane.span))
-print("Plane banner", solM3(plane.banner_length))
-
-normalizedM3 = solM3(M_3Score())
-realnormalizedM3 = solM3(real_M_3Score())
-
-netScore = (GM_Score() / normalizedGM) + (M1_Score() / normalizedM1) + (1 + M_2Score() / normalizedM2) + (2 + M_3Score() / normalizedM3)
-
-print("M3 Net: ", solM3(netScore))
-print("M3 mass (kg): ", solM3(weight_M3) / constants.g)
-
-"""
-
-N = 300  # number of Monte Carlo draws
-wind_speeds, wind_dirs = nd.sample_wind(N)
-
-results = []
-
-for ws, wd in zip(wind_speeds, wind_dirs):
-    try:
-        
-        opti.set_value(plane.wind_speed, ws)
-        opti.set_value(plane.wing_direction, wd)
-        net_ma = opti.maximize(netScore - (plane.ducks - 3)**2)
-        solNet = opti.solve()        # run CasADi solve
-
-        V_M3 = np.array(solNet(plane.V_straight_M3)).squeeze()
-        V_M3_mean = V_M3.mean()
-
-        results.append({
-            'wind_speed': ws,
-            'wind_dir': wd,
-            'banner': solNet(plane.banner_length),
-            'V_M3_mean': V_M3_mean
-        })
-    except RuntimeError as e:
-        # e.g., optimizer didn't converge
-        print("Failed here")
-
-print(results)
-
-
-
-# Extract banner lengths for all successful optimizations
-banner_lengths = np.array([r['banner'] for r in results])
-V_M3_means     = np.array([r['V_M3_mean'] for r in results])
-
-optimal_weighted_banner = banner_lengths.mean()
-banner_std = banner_lengths.std()
-
-optimal_M3_speed = V_M3_means.mean()
-M3_speed_std = V_M3_means.std()
-
-print("Optimal weighted banner:", optimal_weighted_banner)
-print("Std deviation:", banner_std)
-print("Mean M3 speed:", optimal_M3_speed)
-print("M3 speed std:", M3_speed_std)
 
-"""
+class Design():
+    """
+    Net score design of the aircraft model, built and solved lazily.
+
+    Nothing is built until `model` is used and nothing is solved until `normalize` or `solve`
+    is called, each only once.
+
+    Attributes
+    ----------
+    warm_start : bool
+        Seed each stage (M1 -> M2 -> GM -> M3 -> Net) with the previous solution and its
+        multipliers, solving a stage again from the initial guess if that fails. The stages have
+        different objectives, so this takes more iterations than cold solves and the net score
+        can end in another local optimum (5.06 against 5.92 on the nominal case). It is off by
+        default, see `compare_warm_start`.
+    compare_warm_start : bool
+        Also solve each stage cold and record what warm starting saves in `warm_start_savings`.
+    parallel_normalization : bool
+        Solve the M1, M2, GM and M3 normalizers in worker processes.
+    log : telemetry.Log
+        Telemetry of every solve, worker solves included.
+    trace : telemetry.Trace
+        Iterations of every solve in this process, with the span, chord, banner length and ducks.
+    store : Store
+        Run store every solve in this process is saved to and answered from when already solved.
+    stages : dict[str, Solution]
+        Solution of each normalization stage, once normalized.
+    net : Solution
+        Net score solution, once solved.
+    report : Report
+        The quantities of the design report (see `report_quantities`), compiled on first use.
+    """
+    def __init__(self, model:Model=None, warm_start:bool=False, compare_warm_start:bool=False,
+                 parallel_normalization:bool=False, log:telemetry.Log=None, trace:telemetry.Trace=None,
+                 store:Store=None):
+        self._model = model
+        self.warm_start = warm_start
+        self.compare_warm_start = compare_warm_start
+        self.parallel_normalization = parallel_normalization
+        self.log = log
+        self.trace = trace
+        self.store = store
+
+        self.warm_start_savings = {}
+        self.stages = None
+        self.net = None
+        self._report = None
+
+    @property
+    def model(self) -> Model:
+        if self._model is None:
+            if self.parallel_normalization:
+                self._model, self.stages = parallel.normalize_in_parallel()
+                if self.log is not None:
+                    for stage, sol in self.stages.items():
+                        self.log.append(sol.record(stage))
+            else:
+                self._model = Model()
+            self._model.solver.log = self.log
+            self._model.solver.store = self.store
+            if self.trace is not None:
+                plane = self._model.plane
+                self.trace.variables = {'span': plane.span, 'chord': plane.chord,
+                                        'banner_length': plane.banner_length, 'ducks': plane.ducks}
+                self._model.solver.trace = self.trace
+        return self._model
+
+    @property
+    def report(self) -> Report:
+        if self._report is None:
+            self._report = Report(self.model.opti, report_quantities(self.model))
+        return self._report
+
+    @property
+    def normalizers(self) -> tuple:
+        """
+        (M1, M2, GM, M3) net score normalizers, normalizing first if needed.
+        """
+        stages = self.normalize()
+        model = self.model
+        return tuple(stages[stage](model.stage_score(stage)) for stage in ["M1", "M2", "GM", "M3"])
+
+    def solve_stage(self, stage:str, objective, **kwargs) -> Solution:
+        solver = self.model.solver
+        if self.compare_warm_start:
+            sol, self.warm_start_savings[stage] = solver.compare_warm_start(objective, **kwargs)
+            return sol
+        if not self.warm_start:
+            return solver.solve(objective, **kwargs)
+
+        # a stage the previous one is a poor start for is solved again from the initial guess
+        sol = solver.solve(objective, warm_start=True, behavior_on_failure='return_last',
+                           **{key: value for key, value in kwargs.items() if key != 'behavior_on_failure'})
+        if not sol.stats()['success']:
+            sol = solver.solve(objective, **kwargs)
+        return sol
+
+    def normalize(self) -> dict:
+        """
+        Solve the single mission stages and set the model's net score normalizers from them.
+
+        Returns
+        -------
+        dict[str, Solution]
+            Solution of each stage.
+        """
+        model = self.model
+        if self.stages is None:
+            self.stages = {stage: self.solve_stage(stage, objective, verbose=False)
+                           for stage, objective in Model.stages.items()}
+
+        model.set_normalizers(*(self.stages[stage](model.stage_score(stage)) for stage in ["M1", "M2", "GM", "M3"]))
+        return self.stages
+
+    def solve(self) -> Solution:
+        """
+        Solve the net score at no wind, normalizing first if needed.
+        """
+        if self.net is None:
+            self.normalize()
+
+            model = self.model
+            model.opti.set_value(model.plane.wind_speed, 0)
+            model.opti.set_value(model.plane.wing_direction, 0)
+
+            self.net = self.solve_stage("Net", "net")
+
+        return self.net
+
+
+def report_quantities(model:Model) -> dict:
+    """
+    Everything the design report shows, by name, as expressions of the model.
+
+    The scores are normalized with the model's normalizer parameters, so they are right at any
+    solution solved after `set_normalizers`.
+    """
+    plane = model.plane
+
+    return {
+        # airplane
+        'average_velocity_M1': plane.average_velocity_M1,
+        'CD_straight_M1': plane.CD_straight_M1,
+        'average_velocity_M2': plane.average_velocity_M2,
+        'average_velocity_M3': plane.average_velocity_M3,
+        'laps_flown_M1': model.laps_flown_M1,
+        't_lap_M1': model.t_lap_M1,
+        'V_turn_M3': plane.V_turn_M3,
+        'turn_radius_M3': model.turn_radius_M3,
+        'span': plane.span,
+        'chord': plane.chord,
+        'V_straight_M2': plane.V_straight_M2,
+        'V_straight_M3': plane.V_straight_M3,
+        'AR': plane.AR,
+        'weight_M1': model.weight_M1,
+        'weight_M2': model.weight_M2,
+        'weight_M3': model.weight_M3,
+        'S_ht': plane.S_ht,
+        'S_vt': plane.S_vt,
+        'M2_battery': plane.M2_battery,
+        'M3_battery': plane.M3_battery,
+
+        # M2
+        'ducks': plane.ducks,
+        'pucks': plane.pucks,
+        't_lap_M2': model.t_lap_M2,
+        't_lap_M3': model.t_lap_M3,
+        'laps_flown_M2': model.laps_flown_M2,
+        'laps_flown_M3': model.laps_flown_M3,
+        'E_lap_M2': model.E_lap_M2,
+        'E_lap_M3': model.E_lap_M3,
+
+        # performance
+        'turn_radius_M2': plane.turn_radius_M2,
+        'n_turn_M2': plane.n_turn_M2,
+        'V_stall': model.V_stall,
+
+        # mass breakdown, kg
+        'wing_mass': mass.wing_weight(plane.span, plane.chord),
+        'fuselage_mass': mass.fuselage_weight(plane.fuselage_area),
+        'cargo_mass': mass.cargo_mass(plane.ducks, plane.pucks),
+        'banner_mass': mass.banner_weight(plane.banner_length, plane.banner_width),
+        'towbar_mass': mass.towbar_weight(plane.banner_length),
+        'empennage_mass': mass.empenagge_mass(),
+        'nose_section_mass': mass.nose_section_mass(),
+        'additional_ap_mass': mass.additional_ap_mass(),
+        'fus_additional_mass': mass.fus_additional_mass(plane.ducks, plane.pucks),
+
+        # scoring
+        'GM_score': model.GM_Score() / model.normalizer_GM,
+        'M2_score': model.M_2Score() / model.normalizer_M2,
+        'M3_score': model.M_3Score() / model.normalizer_M3,
+        'normalizer_M2': model.normalizer_M2,
+        'GM_raw_score': model.GM_Score(),
+        'M1_raw_score': model.M1_Score(),
+        'M2_raw_score': model.M_2Score(),
+        'M3_raw_score': model.M_3Score(),
+        'net_score': model.netScore,
+
+        # banner
+        'banner_length': plane.banner_length,
+        'banner_width': plane.banner_width,
+
+        # drag
+        'CD_straight_M2': plane.CD_straight_M2,
+
+        # fuselage
+        'fuselage_length': plane.fuselage_length,
+        'fuselage_width': plane.fuselage_width,
+        'fuselage_height': plane.fuselage_height,
+        'fuselage_wetted_area': plane.fuselage_wetted_area,
+
+        # design report data
+        'average_load_M2': plane.average_load_M2,
+        'average_M2_drag_straight': plane.average_M2_drag_straight,
+    }
+
+
+def print_normalization(design:Design) -> None:
+    stages = design.normalize()
+    m2, M3 = design.report(stages["M2"]), design.report(stages["M3"])
+    normalizedM1, normalizedM2, normalizedGM, normalizedM3 = design.normalizers
+
+    print("solm2 ducks" + str(m2['ducks']))
+    print("laps flown m2 " + str(m2['laps_flown_M2']))
+
+    print("Plane span", M3['span'])
+    print("Plane banner", M3['banner_length'])
+
+    # the M3 stage was solved before the normalizers were set, so its net score is put together here
+    net_M3 = (M3['GM_raw_score'] / normalizedGM) + (M3['M1_raw_score'] / normalizedM1) \
+        + (1 + M3['M2_raw_score'] / normalizedM2) + (2 + M3['M3_raw_score'] / normalizedM3)
+    print("M3 Net: ", net_M3)
+    print("M3 mass (kg): ", M3['weight_M3'] / constants.g)
+
+
+def print_report(design:Design) -> None:
+    plane = design.model.plane
+    net = design.report(design.solve())
+    m2, M3 = design.report(design.stages["M2"]), design.report(design.stages["M3"])
+
+    print("Wing weight ", net['wing_mass'])
+
+    print("Optimized M2 Ducks: ", m2['ducks'])
+
+    lap_breakdown = plane.lap_breakdown
+    segment_dist = 2 * constants.straightDist / lap_breakdown
+
+    # Distance at the *center* of each segment
+    segment_centers = np.linspace(
+        segment_dist/2,
+        2 * constants.straightDist - segment_dist/2,
+        lap_breakdown
+    )
+
+    V = net['V_straight_M2']   # length = lap_breakdown
+
+    plt.plot(segment_centers, V, marker='o')  # connected dots
+    plt.xlabel("Distance along straight (m)")
+    plt.ylabel("Speed (m/s)")
+    plt.grid(True)
+    # plt.show()
+
+
+    print("\n=== Airplane Numbers ===")
+
+
+
+    print("Velocity M1: ", net['average_velocity_M1'])
+    print("CD Straight M1: ", net['CD_straight_M1'])
+    print("Average Velocity M2: ", net['average_velocity_M2'])
+    print("Velocity M3: ", net['average_velocity_M3'])
+    print("Laps Flown M1, ", net['laps_flown_M1'])
+    print("Lap time M1: ", net['t_lap_M1'])
+
+    print("Velocity turn M3: ", net['V_turn_M3'])
+
+    print("Turn radius M3 ", net['turn_radius_M3'])
+    print(f"Span:                {net['span']:.3f} m")
+    print(f"Chord:               {net['chord']:.3f} m")
+    print("Velocities M3:  ", net['V_straight_M3'])
+    print("Velocities M2: ", net['V_straight_M2'])
+    print(f"Aspect Ratio (AR):   {net['AR']:.2f}")
+    print(f"Weight M1:             {net['weight_M1'] / constants.g:.2f} kg")
+    print(f"Weight M2:              {net['weight_M2'] / constants.g:.2f} kg")
+    print(f"Weight M3:              {net['weight_M3'] / constants.g:.2f} kg")
+    print("Weight M3, " + str(M3['weight_M3'] / constants.g))
+    print(f"H-Stab Wing Area:  {net['S_ht']}")
+    print(f"V-Stab Wing Area:  {net['S_vt']}")
+    print(f"M2 battery energy: ", net['M2_battery'])
+    print(f"M3 battery energy: ", net['M3_battery'])
+
+    print("\n=== M2 Parameters ===")
+    print(f"Ducks:               {net['ducks']}")
+    print(f"Pucks:               {net['pucks']}")
+    print(f"Lap Time M2:            {net['t_lap_M2']:.2f} s")
+    print(f"Lap Time M3:            {net['t_lap_M3']:.2f} s")
+    print(f"Laps Flown M2:          {net['laps_flown_M2']}")
+    print(f"Laps Flown M3:          {net['laps_flown_M3']}")
+    print(f"Energy Used per lap M2:         {net['E_lap_M2']:.2f} J")
+    print(f"Energy Used per lap M3:         {net['E_lap_M3']:.2f} J")
+    print(f"Total Energy Used M2:   {(net['E_lap_M2'] * net['laps_flown_M2'])/270000*100:.1f} %")
+    print(f"Total Energy Used M3:   {(net['E_lap_M3'] * net['laps_flown_M3'])/270000*100:.1f} %")
+
+    print("\n--- Performance ---")
+    print("Turn Radius M2: " + str(net['turn_radius_M2']))
+    print("Load Factor M2:, " + str(net['n_turn_M2']))
+    print(f"V_stall:             {net['V_stall']:.2f} m/s")
+    print(f"M2 battery energy: ", net['M2_battery'])
+    print(f"M3 battery energy: ", net['M3_battery'])
+
+    print("\n=== Mass Breakdown ===")
+    print(f"Wing Mass:           {net['wing_mass']:.2f} kg")
+    print(f"Fuselage Mass:       {net['fuselage_mass']:.2f} kg")
+    print(f"Cargo Mass:          {net['cargo_mass']:.2f} kg")
+    print(f"Banner Mass:         {net['banner_mass']:.2f} kg")
+    print(f"Towbar Mass:         {net['towbar_mass']:.2f} kg")
+    print(f"Empennage Mass:      {net['empennage_mass']:.2f} kg")
+    print(f"Nose Section Mass:   {net['nose_section_mass']:.2f} kg")
+    print(f"Additional AP Mass:  {net['additional_ap_mass']:.2f} kg")
+    print(f"Fuselage Additional Mass:  {net['fus_additional_mass']:.2f} kg")
+
+
+    print("\n=== Scoring ===")
+    print(f"GM Score:          {net['GM_score']:.2f}")
+    print(f"M2 Score:          {net['M2_score']:.2f}")
+    print(f"M3 Score:          {net['M3_score']:.2f}")
+    print(f"Max M2 Score:     {net['normalizer_M2']:.2f}")
+
+    print(f"GM Raw Score:          {net['GM_raw_score']:.2f}")
+    print(f"M2 Raw Score:          {net['M2_raw_score']:.2f}")
+    print(f"M3 Raw Score:          {net['M3_raw_score']:.2f}")
+    print("Net Score: ", net['net_score'])
+
+    print("\n=== Banner ===")
+    print(f"Banner Length:       {net['banner_length']:.2f} m")
+    print(f"Banner Width:        {net['banner_width']:.2f} m")
+
+    print("\n=== Drag Breakdown ===")
+
+    print("CD Straight Overall M2 ", net['CD_straight_M2'])
+    print("Velocities in M2 ", net['V_straight_M2'])
+
+
+    print("\n=== Fuselage Parameters")
+    print("Fuselage Length MAX (m) ", net['fuselage_length'])
+    print("Fuselage Length M3 ", M3['fuselage_length'])
+    print("Fuselage Width (m) ", net['fuselage_width'])
+    print("Fuselage Width M3 ", M3['fuselage_width'])
+    print("Fuselage Height (m) ", net['fuselage_height'])
+    print("Fuselage Height M3 ", M3['fuselage_height'])
+    print("Fuselage Wetted Area (m^2) ", net['fuselage_wetted_area'])
+    print("Fuselage Wetted Area M3 (m^2) ", M3['fuselage_wetted_area'])
+
+    print("\n--- Design Report Data ---")
+    print("mass M2 (lbs): ", net['weight_M2'] / constants.g * 2.20462)
+    print("mass M3 (lbs): ", net['weight_M3'] / constants.g * 2.20462)
+    print("Takeoff Disance M2 (ft): ", 3.28 * aero.get_takeoff_distance(net['weight_M2'], constants.mu_r, constants.static_thrust, constants.CLmax_takeoff, net['span'], net['chord'], 0.2))
+    print("Takeoff Disance M3 (ft): ", 3.28 * aero.get_takeoff_distance(net['weight_M3'], constants.mu_r, constants.static_thrust, constants.CLmax_takeoff, net['span'], net['chord'], 0.2))
+    print("M2 battery efficiency: ", aero.battery_efficiency(net['M2_battery'], load_voltage, net['average_load_M2']))
+    print("average load M2: ", net['average_load_M2'])
+    print("average drag M2: ", net['average_M2_drag_straight'])
 
 
-
-opti.set_value(plane.wind_speed, 0)
-opti.set_value(plane.wing_direction, 0)
-
-net_ma = opti.maximize(netScore)
-solNet = opti.solve()
-
-ducks_val = float(solNet.value(plane.ducks))
-pucks_val = float(solNet.value(plane.pucks))
-S_ref_val = float(solNet.value(plane.S))
-
-fusCD0 = solNet(aero.getFuselageCD0(plane.fuselage_length, plane.effective_diameter, plane.V_straight_M2, plane.fuselage_wetted_area, plane.S))
-
-print("Wing weight ", mass.wing_weight(solNet(plane.span), solNet(plane.chord)))
-
-print("Optimized M2 Ducks: ", solm2(plane.ducks))
-
-lap_breakdown = constants.lap_breakdown
-segment_dist = 2 * constants.straightDist / lap_breakdown
-
-# Distance at the *center* of each segment
-segment_centers = np.linspace(
-    segment_dist/2,
-    2 * constants.straightDist - segment_dist/2,
-    lap_breakdown
-)
-
-V = solNet(plane.V_straight_M2)   # length = lap_breakdown
-
-plt.plot(segment_centers, V, marker='o')  # connected dots
-plt.xlabel("Distance along straight (m)")
-plt.ylabel("Speed (m/s)")
-plt.grid(True)
-# plt.show()
-
-
-print("\n=== Airplane Numbers ===")
-
-
-
-print("Velocity M1: ", solNet(plane.average_velocity_M1))
-print("CD Straight M1: ", solNet(plane.CD_straight_M1))
-print("Average Velocity M2: ", solNet(plane.average_velocity_M2))
-print("Velocity M3: ", solNet(plane.average_velocity_M3))
-print("Laps Flown M1, ", solNet(laps_flown_M1))
-print("Lap time M1: ", solNet(t_lap_M1))
-
-print("Velocity turn M3: ", solNet(plane.V_turn_M3))
-
-print("Turn radius M3 ", solNet(turn_radius_M3))
-print(f"Span:                {solNet(plane.span):.3f} m")
-print(f"Chord:               {solNet(plane.chord):.3f} m")
-print("Velocities M3:  ", solNet(plane.V_straight_M3))
-print("Velocities M2: ", solNet(plane.V_straight_M2))
-print(f"Aspect Ratio (AR):   {solNet(plane.AR):.2f}")
-print(f"Weight M1:             {solNet(weight_M1) / constants.g:.2f} kg")
-print(f"Weight M2:              {solNet(weight_M2) / constants.g:.2f} kg")
-print(f"Weight M3:              {solNet(weight_M3) / constants.g:.2f} kg")
-print("Weight M3, " + str(solM3(weight_M3) / constants.g))
-print(f"H-Stab Wing Area:  {solNet(plane.S_ht)}")
-print(f"V-Stab Wing Area:  {solNet(plane.S_vt)}")
-print(f"M2 battery energy: ", solNet(plane.M2_battery))
-print(f"M3 battery energy: ", solNet(plane.M3_battery))
-
-print("\n=== M2 Parameters ===")
-print(f"Ducks:               {solNet(plane.ducks)}")
-print(f"Pucks:               {solNet(plane.pucks)}")
-print(f"Lap Time M2:            {solNet(t_lap_M2):.2f} s")
-print(f"Lap Time M3:            {solNet(t_lap_M3):.2f} s")
-print(f"Laps Flown M2:          {solNet(laps_flown_M2)}")
-print(f"Laps Flown M3:          {solNet(laps_flown_M3)}")
-print(f"Energy Used per lap M2:         {solNet(E_lap_M2):.2f} J")
-print(f"Energy Used per lap M3:         {solNet(E_lap_M3):.2f} J")
-print(f"Total Energy Used M2:   {(solNet(E_lap_M2) * solNet(laps_flown_M2))/270000*100:.1f} %")
-print(f"Total Energy Used M3:   {(solNet(E_lap_M3) * solNet(laps_flown_M3))/270000*100:.1f} %")
-
-print("\n--- Performance ---")
-print("Turn Radius M2: " + str(solNet(plane.turn_radius_M2)))
-print("Load Factor M2:, " + str(solNet(plane.n_turn_M2)))
-print(f"V_stall:             {solNet(V_stall):.2f} m/s")
-print(f"M2 battery energy: ", solNet(plane.M2_battery))
-print(f"M3 battery energy: ", solNet(plane.M3_battery))
-
-print("\n=== Mass Breakdown ===")
-print(f"Wing Mass:           {solNet(mass.wing_weight(plane.span, plane.chord)):.2f} kg")
-print(f"Fuselage Mass:       {solNet(mass.fuselage_weight(plane.fuselage_area)):.2f} kg")
-print(f"Cargo Mass:          {solNet(mass.cargo_mass(plane.ducks, plane.pucks)):.2f} kg")
-print(f"Banner Mass:         {solNet(mass.banner_weight(plane.banner_length,    plane.banner_width)):.2f} kg") 
-print(f"Towbar Mass:         {solNet(mass.towbar_weight(plane.banner_length)):.2f} kg")
-print(f"Empennage Mass:      {solNet(mass.empenagge_mass()):.2f} kg")
-print(f"Nose Section Mass:   {solNet(mass.nose_section_mass()):.2f} kg")
-print(f"Additional AP Mass:  {solNet(mass.additional_ap_mass()):.2f} kg")
-print(f"Fuselage Additional Mass:  {solNet(mass.fus_additional_mass(plane.ducks, plane.pucks)):.2f} kg")
-
-
-print("\n=== Scoring ===")
-print(f"GM Score:          {solNet(GM_Score() / normalizedGM):.2f}")
-print(f"M2 Score:          {solNet(M_2Score() / normalizedM2):.2f}")
-print(f"M3 Score:          {solNet(M_3Score() / normalizedM3):.2f}")
-print(f"Max M2 Score:     {solNet(normalizedM2):.2f}")
-
-print(f"GM Raw Score:          {solNet(GM_Score()):.2f}")
-print(f"M2 Raw Score:          {solNet(M_2Score()):.2f}")
-print(f"M3 Raw Score:          {solNet(M_3Score()):.2f}")
-print("Net Score: ", solNet(netScore))
-
-print("\n=== Banner ===")
-print(f"Banner Length:       {solNet(plane.banner_length):.2f} m")
-print(f"Banner Width:        {solNet(plane.banner_width):.2f} m")
-
-print("\n=== Drag Breakdown ===")
-
-print("CD Straight Overall M2 ", (solNet(plane.CD_straight_M2)))
-print("Velocities in M2 ", solNet(plane.V_straight_M2))
-
-
-print("\n=== Fuselage Parameters")
-print("Fuselage Length MAX (m) ", solNet(plane.fuselage_length))
-print("Fuselage Length M3 ", solM3(plane.fuselage_length))
-print("Fuselage Width (m) ", solNet(plane.fuselage_width))
-print("Fuselage Width M3 ", solM3(plane.fuselage_width))
-print("Fuselage Height (m) ", solNet(plane.fuselage_height))
-print("Fuselage Height M3 ", solM3(plane.fuselage_height))
-print("Fuselage Wetted Area (m^2) ", solNet(plane.fuselage_wetted_area))
-print("Fuselage Wetted Area M3 (m^2) ", solM3(plane.fuselage_wetted_area))
-
-print("\n--- Design Report Data ---")
-print("mass M2 (lbs): ", solNet(weight_M2) / constants.g * 2.20462)
-print("mass M3 (lbs): ", solNet(weight_M3) / constants.g * 2.20462)
-print("Takeoff Disance M2 (ft): ", 3.28 * aero.get_takeoff_distance(solNet(weight_M2), constants.mu_r, constants.static_thrust, constants.CLmax_takeoff, solNet(plane.span), solNet(plane.chord), 0.2))
-print("Takeoff Disance M3 (ft): ", 3.28 * aero.get_takeoff_distance(solNet(weight_M3), constants.mu_r, constants.static_thrust, constants.CLmax_takeoff, solNet(plane.span), solNet(plane.chord), 0.2))
-print("M2 battery efficiency: ", aero.battery_efficiency(solNet(plane.M2_battery), load_voltage, solNet(plane.average_load_M2)))
-print("average load M2: ", solNet(plane.average_load_M2))
-print("average drag M2: ", solNet(plane.average_M2_drag_straight))
-
-
-
-
-def to_percent_change(val):
-    return (val - 1) * 100 
-
-opti.set_value(plane.wing_direction, 0)
-wind_speeds = np.linspace(-20, 20, 35) 
-
-plt.close()
-
-banner_vals = []
-banner_list = np.linspace(5.5, 6.0, 6)
-
-# Store excess lap data as a dict: {banner_size: {wind_speed: excess_lap}}
-excess_lap_data = {}
-
-true_score = (GM_Score() / normalizedGM) + 1 + (1 + 0.02) + (2 + real_M_3Score() / realnormalizedM3)
-
-for k in banner_list:
-
-    x_vals = []
-    y_vals = []
-    excess_lap_data[k] = {}  # init nested dict for this banner size
-
-    for i in wind_speeds: 
-        opti.set_value(plane.wind_speed, i)
-        try:
-            opti.maximize(netScore - (plane.banner_length - k)**2)
-            sol = opti.solve(verbose=False, max_iter=100)
-
-            laps = sol(laps_flown_M3)
-            excess = float(laps) % 1.0  # fractional part = excess lap
-            excess_lap_data[k][i] = excess  # store by banner size + wind speed
-
-            x_vals.append(sol(plane.wind_speed))
-            y_vals.append(sol(true_score))
-            banner_vals.append(sol(plane.banner_length))
-
-            print(sol(netScore))
-            print("Banner Length: ", sol(plane.banner_length))
-            print(f"  Excess Lap: {excess:.4f}")
-            print(sol(M_3Score() / normalizedM3))
-
-        except RuntimeError as e:
-            print(f"Solver failed for wind speed {i:.1f} m/s")
-            excess_lap_data[k][i] = None  # mark failed cases explicitly
-            continue
-
-    plt.plot(x_vals, y_vals, marker='o', label=f"Banner = {k:.1f} m")
-
-# --- Report excess laps for every banner + wind speed ---
-print("\n=== Excess Lap Report ===")
-print(f"{'Banner':>8} | {'Wind Speed':>12} | {'Excess Lap':>12}")
-print("-" * 40)
-for banner, wind_dict in excess_lap_data.items():
-    for wind, excess in wind_dict.items():
-        if excess is not None:
-            print(f"{banner:>8.1f} | {wind:>12.1f} | {excess:>12.4f}")
-        else:
-            print(f"{banner:>8.1f} | {wind:>12.1f} | {'FAILED':>12}")
-
-plt.xlabel("Wind Speed (m/s)")
-plt.ylabel("Net Score")
-plt.title("Net Score vs Wind Speed")
-plt.grid(True)
-plt.legend()
-plt.show()
-
-"""
-
-opti.set_value(plane.wing_direction, 0)
-wind_speeds = np.linspace(-20, 20, 35) 
-
-# x_vals = []
-# y_vals = []
-
-plt.close()
-
-banner_vals = []
-
-banner_list = np.linspace(5.5,6.0,6)
-
-excess_lap = [] # this should be calculated by taking laps_flown_M3 - ca.floor(laps_flown_M3)
-
-true_score = (GM_Score() / normalizedGM) + 1 + (1 + 0.02) + (2 + real_M_3Score() / realnormalizedM3)
-
-for k in banner_list:
-
-    x_vals = []
-    y_vals = []
-
-    for i in wind_speeds: 
-        opti.set_value(plane.wind_speed, i)
-        try:
-           # opti.maximize(netScore - (plane.banner_length - k)**2)
-            opti.maximize(netScore - (plane.banner_length - k)**2)
-            sol = opti.solve(verbose=False, max_iter=100)
-            x_vals.append(sol(plane.wind_speed))
-            # y_vals.append(sol(netScore) + 1 - sol(M1_Score() / normalizedM1) - sol(M_2Score() / normalizedM2) + 0.02)
-            y_vals.append(sol(true_score))
-            banner_vals.append(sol(plane.banner_length))
-            print(sol(netScore))
-            print("Banner Length: ", sol(plane.banner_length))
-            print(sol(M_3Score() / normalizedM3))
-            # print(f"Wind Speed: {i:.1f} m/s, Banner Length: {sol(plane.banner_length):.2f} m, M3 Speed: {sol(plane.V_straight_M3):.2f} m/s")
-        except RuntimeError as e:
-            print(f"Solver failed for wind speed {i:.1f} m/s")
-            continue
-
-    # plot THIS banner’s curve
-    plt.plot(x_vals, y_vals, marker='o', label=f"Banner = {k:.1f} m")
-
-plt.xlabel("Wind Speed (m/s)")
-plt.ylabel("Net Score")
-plt.title("Net Score vs Wind Speed")
-plt.grid(True)
-plt.legend()
-plt.show()
-
-plt.figure()
-plt.plot(x_vals, banner_vals, marker='o')
-plt.xlabel("Wind Speed (m/s)")
-plt.ylabel("Banner Length (m)")
-plt.title("Banner Length vs Wind Speed")
-plt.grid(True)
-plt.show()
-"""
-"""
-
-sweep_passengers = np.linspace(3, constants.duck_constraint, constants.duck_constraint - 2)
-duck_target = opti.parameter()
-mass_target = opti.parameter()
-opti.maximize(netScore - (plane.ducks - duck_target)**2)
-# sweep_passengers = np.linspace(3, 3, 1)
-x_vals = []
-y_vals = []
-
-for i in sweep_passengers:
-    print("Ducks: ", i)
-
-    #opti.set_value(duck_target, i)
-    opti.set_value(duck_target, i)
-
-    try:
-        sol = opti.solve(verbose=False)
-        y_vals.append(sol.value(netScore))
-        x_vals.append(sol.value(plane.ducks))
-    except RuntimeError as e:
-        print(f"Solver failed for {i} passengers ")
-
-plt.plot(x_vals, y_vals, marker="o", linestyle= 'none')
-plt.xlabel("Passengers")
-plt.ylabel("Score (0-7)")
-plt.title("Score vs Passengers")
-plt.grid(True)
-plt.show()
-
-"""
-
-"""
-
-# optimal framework
-
-denom = 3.5 * (plane.ducks + plane.pucks) + 20 + plane.ground_tax
-
-x_vals = []
-y_vals = []
-netScore = (GM_Score() / normalizedGM) + 1 + (1 + M_2Score() / normalizedM2) + (2 + M_3Score() / normalizedM3)
-
-
-sweep_basic_skin_friction = np.linspace(0.6, 1.4, 20)
-
-normbanner = solNet(plane.banner_length)
-sweep_length = np.linspace(normbanner*0.6, normbanner*1.4, 20)
-
-normskin = solNet(plane.skin_friction_drag)
-sweep_skin_friction = np.linspace(normskin*0.6, normskin*1.4, 20)
-normspeed = solNet(plane.min_V3_speed)
-sweep_speed = np.linspace(normspeed*0.6, normspeed*1.4, 20)
-maxg = solNet(plane.max_g)
-sweep_g = np.linspace(maxg*0.6, maxg*1.4, 20)
-windspeed = solNet(plane.wind_speed)
-sweep_wind = np.linspace(windspeed*0.6, windspeed*1.4, 20)
-totalweight = solNet(weight_M3) #2.37 * constants.g
-bannerCde = solNet(plane.banner_CD_e)
-gmtime = solNet(GM_Score())
-
-oswaldDefaultEff = solNet(plane.oswaldEff)
-sweep_oswald = np.linspace(oswaldDefaultEff*0.6, oswaldDefaultEff*1.4, 20)
-
-propDefault = solNet(plane.PropEff)
-sweep_prop = np.linspace(propDefault*0.6, propDefault*1.4, 20)
-
-defaultClmax = solNet(plane.CLmax)
-sweep_Clmax = np.linspace(defaultClmax*0.6, defaultClmax*1.4, 20)
-
-sweep_weight = np.linspace(-totalweight*1.03, totalweight*0.132, 20)
-sweep_drag = np.linspace(bannerCde*0.6, bannerCde*1.4, 20)
-sweep_gm = np.linspace(-14, 12.7, 20)
-
-totaldrag = 42
-sweep_f_drag = np.linspace(-0.8*totaldrag, totaldrag*0.6, 20)
-
-opti.maximize(netScore - (plane.ducks - 3)**2 - (plane.span - 1.524)**2)
-
-def run_sweep(value, sweep, middle_x, middle_y, extra):
-    x_vals = []
-    y_vals = []
-
-    for w in sweep:
-        opti.set_value(value, w)
-
-        try:
-            sol = opti.solve(verbose=False)
-            x_vals.append(to_percent_change((sol(extra) / middle_x)))
-            y_vals.append(to_percent_change((sol(netScore)) / middle_y))
-            # y_vals.append(sol(netScore))
-        except RuntimeError as e:
-            print(f"Error for {w} vals")
-
-    return x_vals, y_vals
-
-x_weight = np.linspace(-40, 40, 20)
-m = -1.73 / 40
-b = 0
-y_weight = m * x_weight + b
-
-# x_prop, y_prop = run_sweep(plane.PropEff, sweep_prop, propDefault, 6.0088, plane.PropEff)
-# x_Cl, y_Cl = run_sweep(plane.CLmax, sweep_Clmax, defaultClmax, 6.1423, plane.CLmax)
-# x_oswald, y_oswald = run_sweep(plane.oswaldEff, sweep_oswald, oswaldDefaultEff, 6.2116, plane.oswaldEff)
-# Run sweeps for each variable you want to plot
-# x_gm, y_gm = run_sweep(plane.ground_tax, sweep_gm, 33.33, 6.2418, denom)       # Ground maneuver, this ones good
-# x_wind, y_wind = run_sweep(plane.wind_speed, sweep_wind, windspeed, 5.70298, plane.wind_speed)  # Wind speed
-# x_g, y_g = run_sweep(plane.max_g, sweep_g, maxg, 5.651107, plane.max_g)        # Turn performance
-# x_speed, y_speed = run_sweep(plane.min_V3_speed, sweep_speed, normspeed, 5.5, plane.min_V3_speed)  # Min speed
-x_skin, y_skin = run_sweep(plane.CD0_factor, sweep_skin_friction, normskin, 5.9493, plane.CD0_factor)  # Skin friction
-x_weight, y_weight = run_sweep(plane.extra_weight, sweep_weight, totalweight, 6.034, weight_M3)
-# x_banner, y_banner = run_sweep(plane.banner_CD_e, sweep_drag, bannerCde, 5.920429, plane.banner_CD_e)
-# x_drag, y_drag = run_sweep(plane.extra_Drag_M3_s, sweep_f_drag, totaldrag, 5, plane.Drag_straight_M3_f)
-# x_ban, y_ban = run_sweep(plane.banner_length, sweep_length, normbanner, 5, plane.banner_length)
-
-x_weight = np.linspace(-40, 40, 20)
-m = -1.73 / 40
-b = 0
-y_weight = m * x_weight + b
-
-# plt.plot(x_ban, y_ban, label="Banner Length")
-# Plot all lines on the same axes
-# plt.plot(x_gm, y_gm, label="Ground Mission Time")
-#plt.plot(x_wind, y_wind, label="Wind Speed") 
-# plt.plot(x_g, y_g, label="Turn Performance")
-# plt.plot(x_speed, y_speed, label="Min Speed")
-plt.plot(x_skin, y_skin, label="Skin Friction Drag")
-# mask = (x_weight >= -40) & (x_weight <= 40)
-# plt.plot(x_weight[mask], y_weight[mask], label="Weight")
-plt.plot(x_weight, y_weight, label="Weight")
-print("Total weight is: ", totalweight)
-# plt.plot(x_banner, y_banner, label="Banner CD")
-# plt.plot(x_oswald, y_oswald, label="Oswald Efficiency")
-#plt.plot(x_Cl, y_Cl, label="CLmax")
-# plt.plot(x_prop, y_prop, label="Propulsive Efficiency")
-
-# Add labels, grid, and legend
-# plt.xlim(-40, 40)
-# Labels with larger font
-# Labels with larger font
-# Labels with larger font
-plt.xlabel("% Change in Variable (+/-)", fontsize=18)
-plt.ylabel("% Change in Score (+/-)", fontsize=18)
-
-# Title with larger font
-# plt.title("Score Sensitivity to Parameters: M3", fontsize=16)
-
-# Grid
-plt.grid(True)
-plt.gca().set_box_aspect(1)
-
-
-# Legend: outside the plot, top right, larger font + box
-plt.legend(
-    loc='upper right',  # inside top-right corner
-    fontsize=13,
-    frameon=True
-)
-
-plt.tight_layout()  # adjust plot so labels/legend don’t overlap
-plt.show()
-
-"""
-
-"""
-for w in sweep_gm: # for w in sweep_weight (sweep_drag)
-    # opti.set_value(plane.banner_CD_e, w) # opti.set_value(plane.extra_weight, w)
-    opti.set_value(plane.ground_tax, w)
-    try:
-        sol = opti.solve(verbose=False)
-        
-        # x_vals.append(to_percent_change(sol(plane.banner_CD_e) / bannerCde)) #x_vals.append(to_percent_change((sol(weight_M3) / constants.g) / 2.37))
-        x_vals.append(to_percent_change((sol(denom) / 33.33)))
-        y_vals.append(to_percent_change((sol(netScore)) / 6.032)) # 6.0078 for weight 6.0832 for banner CD
-    except RuntimeError as e:
-        print(f"error for {w} drag")
-print(x_vals)
-"""
-#plt.plot(x_vals, y_vals)
-#plt.xlabel("% Change in Variable (+/-)")
-#plt.ylabel("% Change in Score (+/-)")
-#plt.title("Score vs Skin Friction Drag")
-#plt.grid(True)
-#plt.show()
-
-"""
-
-totalweight = 2.37
-
-totalDrag = 42 #N
-sweep_drag = np.linspace(-totalDrag*0.8, totalDrag*0.6, 20)
-sweep_weight = np.linspace(-totalweight*0.2, totalweight*0.2, 20)
-
-weight_tot_targ = opti.parameter()
-dragtarg = opti.parameter()
-weight_targ = opti.parameter()
-ducktarg = opti.parameter()
-opti.maximize(netScore - ((plane.ducks - ducktarg)**2 - (weight_M3 - weight_tot_targ)**4))
-# sweep_passengers = np.linspace(3, 3, 1)
-x_vals = []
-y_vals = []
-
 def to_percent_change(val):
     return (val - 1) * 100
 
-for i in sweep_weight:
-    print("Drag: ", i)
-
-    
-
-    #opti.set_value(duck_target, i)
-    opti.set_value(weight_targ, i)
-    opti.set_value(ducktarg, 3)
-    opti.set_value(weight_tot_targ, i+totalweight)
-
-    try:
-        sol = opti.solve(verbose=False)
-        #y_vals.append(to_percent_change(sol.value(netScore)))   # 5.81 for drag
-        y_vals.append(to_percent_change(sol.value(netScore)/5.9975))
-        x_vals.append(to_percent_change((sol.value(weight_M3)/totalweight)))
-        #x_vals.append(sol(plane.extra_weight))
-        print("Total weight for M3 ", sol(weight_M3))
-    except RuntimeError as e:
-        print(f"Solver failed for {i} passengers ")
-
-y_vals = y_vals
-x_vals = x_vals
-
-plt.plot(x_vals, y_vals)
-plt.xlabel("% Change in Variable (+/-)")
-plt.ylabel("% Change in Score (+/-)")
-plt.title("Score vs Drag: M3")
-plt.grid(True)
-plt.show()
-"""
-
-
-"""
-
-totalweight = 21.5
-
-totalDrag = 42 #N
-sweep_drag = np.linspace(0, totalDrag*0.6, 20)
-
-dragtarg = opti.parameter()
-weight_targ = opti.parameter()
-ducktarg = opti.parameter()
-opti.maximize(netScore - (plane.Drag_straight_M3_b - dragtarg)**2 - (plane.ducks - ducktarg)**2 - (plane.span - 1.524)**2)
-# sweep_passengers = np.linspace(3, 3, 1)
-x_vals = []
-y_vals = []
-
-def to_percent_change(val):
-    return (val - 1) * 100
-
-for i in sweep_drag:
-    print("Drag: ", i)
-
-    
-
-    #opti.set_value(duck_target, i)
-    opti.set_value(dragtarg, i)
-    opti.set_value(ducktarg, 3)
-
-    try:
-        sol = opti.solve(verbose=False)
-        #y_vals.append(to_percent_change(sol.value(netScore)))   # 5.81 for drag
-        y_vals.append(to_percent_change(sol.value(netScore)/5.667))
-        # y_vals.append(sol.value(netScore))
-        x_vals.append(sol(plane.Drag_straight_M3_f))
-        # x_vals.append(sol(plane.Drag_straight_M3_f))
-        #x_vals.append(sol(plane.extra_weight))
-        print("Total weight for M3 ", sol(plane.Drag_straight_M3_b))
-    except RuntimeError as e:
-        print(f"Solver failed for {i} passengers ")
-
-y_vals = y_vals
-x_vals = x_vals
-
-plt.plot(x_vals, y_vals)
-plt.xlabel("% Change in Variable (+/-)")
-plt.ylabel("% Change in Score (+/-)")
-plt.title("Score vs Drag: M3")
-plt.grid(True)
-plt.show()
-
-
-
-
-
-
-
-"""
-
 
+def wind_banner_sweep(design:Design, banner_list:np.ndarray=None, wind_speeds:np.ndarray=None,
+                      max_iter:int=100, writer:ColumnWriter=None, checkpoint:str=None, watchdog:Watchdog=None,
+                      ladder:Ladder=None, max_halvings:int=1) -> dict:
+    """
+    Net score against wind speed for a range of target banner lengths, warm started from the net design.
+
+    `writer` streams every point, with its banner target, as it is solved, see `sweep.sweep`.
+    `checkpoint` is a folder of one sweep checkpoint per banner, a rerun with it resumes.
+    `watchdog` solves every point in a supervised worker with a time and memory budget.
+    `ladder` retries the points that fail from their neighbour, see retry.py.
+
+    Each banner walks the wind outward from calm, a point that fails from its neighbour is
+    reached in steps halved up to `max_halvings` times, see `sweep.continuation`.
+
+    Returns
+    -------
+    dict[float, dict[float, float]]
+        Excess lap (fractional part of the M3 laps flown) at every banner size and wind speed,
+        None for failed solves.
+    """
+    if banner_list is None:
+        banner_list = np.linspace(5.5, 6.0, 6)
+    if wind_speeds is None:
+        wind_speeds = np.linspace(-20, 20, 35)
+
+    model, plane = design.model, design.model.plane
+    solNet = design.solve()
+    normalizedGM = design.normalizers[2]
+    realnormalizedM3 = design.stages["M3"](model.real_M_3Score())
+
+    model.opti.set_value(plane.wing_direction, 0)
+
+    plt.close()
+
+    # Store excess lap data as a dict: {banner_size: {wind_speed: excess_lap}}
+    excess_lap_data = {}
+
+    true_score = (model.GM_Score() / normalizedGM) + 1 + (1 + 0.02) + (2 + model.real_M_3Score() / realnormalizedM3)
+
+    if checkpoint is not None:
+        os.makedirs(checkpoint, exist_ok=True)
+
+    for k in banner_list:
+
+        model.opti.set_value(model.banner_target, k)
+
+        result = sw.sweep(model, "wind_speed", wind_speeds, {
+            "true_score": true_score,
+            "banner_length": plane.banner_length,
+            "laps_flown_M3": model.laps_flown_M3,
+            "banner_target": model.banner_target,
+        }, objective={"net": 1, "banner_target": 1}, start_from=solNet, verbose=True, writer=writer,
+            checkpoint=None if checkpoint is None else os.path.join(checkpoint, f"banner_{k:.4f}.jsonl"),
+            watchdog=watchdog, ladder=ladder, max_halvings=max_halvings, max_iter=max_iter)
+
+        solved = result["success"]
+
+        # fractional part of the laps flown = excess lap, None marks failed cases
+        excess_lap_data[k] = {i: float(laps) % 1.0 if ok else None for i, ok, laps in zip(wind_speeds, solved, result["laps_flown_M3"])}
+
+        plt.plot(result["wind_speed"][solved], result["true_score"][solved], marker='o', label=f"Banner = {k:.1f} m")
+
+    return excess_lap_data
+
+
+def print_excess_laps(excess_lap_data:dict) -> None:
+    # --- Report excess laps for every banner + wind speed ---
+    print("\n=== Excess Lap Report ===")
+    print(f"{'Banner':>8} | {'Wind Speed':>12} | {'Excess Lap':>12}")
+    print("-" * 40)
+    for banner, wind_dict in excess_lap_data.items():
+        for wind, excess in wind_dict.items():
+            if excess is not None:
+                print(f"{banner:>8.1f} | {wind:>12.1f} | {excess:>12.4f}")
+            else:
+                print(f"{banner:>8.1f} | {wind:>12.1f} | {'FAILED':>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize the aircraft for net score and report the design.")
+    parser.add_argument("--warm-start", action="store_true", help="Seed each stage with the previous solution")
+    parser.add_argument("--compare-warm-start", action="store_true", help="Also solve each stage cold and report the savings")
+    parser.add_argument("--parallel-normalization", action="store_true", help="Solve the normalizers in worker processes")
+    parser.add_argument("--no-sensitivity", action="store_true", help="Skip the d(netScore)/d(parameter) report")
+    parser.add_argument("--no-wind-sweep", action="store_true", help="Skip the banner/wind sweep")
+    parser.add_argument("--telemetry", metavar="PATH", help="Append a record of every solve to this JSON lines file")
+    parser.add_argument("--trace", metavar="PATH", help="Stream every IPOPT iteration to this JSON lines file")
+    parser.add_argument("--store", metavar="PATH", help="SQLite run store to save solves to and reuse them from")
+    parser.add_argument("--export", metavar="FOLDER", help="Stream the wind sweep points to chunked .npz files in this folder")
+    parser.add_argument("--checkpoint", metavar="FOLDER", help="Checkpoint the wind sweep here, resume from it if it exists")
+    parser.add_argument("--wall-time", type=float, help="Solve each wind sweep point in a supervised worker, killed after this many seconds")
+    parser.add_argument("--max-rss", type=float, metavar="MB", help="Solve each wind sweep point in a supervised worker, killed above this memory")
+    parser.add_argument("--max-halvings", type=int, default=1, help="Walk to failed wind sweep points in steps halved up to this many times")
+    parser.add_argument("--retry", nargs="+", choices=RUNGS, metavar="RUNG",
+                        help=f"Retry failed wind sweep points on these rungs in order, of {' '.join(RUNGS)}")
+    args = parser.parse_args()
+
+    design = Design(warm_start=args.warm_start, compare_warm_start=args.compare_warm_start,
+                    parallel_normalization=args.parallel_normalization,
+                    log=telemetry.Log(args.telemetry) if args.telemetry else None,
+                    trace=telemetry.Trace(args.trace) if args.trace else None,
+                    store=Store(args.store) if args.store else None)
+
+    print_normalization(design)
+
+    design.solve()
+
+    if args.compare_warm_start:
+        print_warm_start_report(design.warm_start_savings)
+
+    print_report(design)
+
+    if not args.no_sensitivity:
+        sensitivities = sensitivity.Sensitivity(design.model)
+        sensitivities.report(design.net)
+
+    if not args.no_wind_sweep:
+        writer = ColumnWriter(args.export) if args.export else None
+        watchdog = Watchdog(args.wall_time, args.max_rss) if args.wall_time or args.max_rss else None
+        excess_lap_data = wind_banner_sweep(design, writer=writer, checkpoint=args.checkpoint, watchdog=watchdog,
+                                            ladder=Ladder(args.retry) if args.retry else None,
+                                            max_halvings=args.max_halvings)
+        if writer is not None:
+            writer.close()
+        if watchdog is not None:
+            watchdog.close()
+        print_excess_laps(excess_lap_data)
+
+    if design.log is not None:
+        telemetry.print_summary(design.log.summary())
+
+    if not args.no_wind_sweep:
+        plt.xlabel("Wind Speed (m/s)")
+        plt.ylabel("Net Score")
+        plt.title("Net Score vs Wind Speed")
+        plt.grid(True)
+        plt.legend()
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
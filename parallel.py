@@ -0,0 +1,106 @@
+"""
+Process pool helpers for running independent solves of the aircraft model at the same time.
+
+Every worker builds its own `Model` once, in the pool initializer, and then only pays for IPOPT
+iterations on each task. Solutions come back as plain arrays and are rebuilt against the
+caller's model, which has the same structure.
+"""
+import multiprocessing
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+
+from model import Model
+from report import Report
+from solver import Solution
+from sweep import resolve
+
+_model = None
+_reports = {}
+
+
+def init_worker(normalizers:tuple=None) -> None:
+    """
+    Pool initializer, builds the worker's model.
+
+    Parameters
+    ----------
+    normalizers : tuple
+        (M1, M2, GM, M3) net score normalizers, for workers that solve the net objective.
+    """
+    global _model
+    _model = Model()
+
+    if normalizers is not None:
+        _model.set_normalizers(*normalizers)
+
+
+def _solve_stage(stage:str) -> tuple:
+    sol = _model.solver.solve(Model.stages[stage], verbose=False)
+
+    return stage, sol.x, sol.p, sol.lam_x, sol.lam_g, sol.f, sol.stats()
+
+
+def solve_point(values:dict, objective, outputs:list) -> tuple[dict, dict]:
+    """
+    Worker task: set aircraft parameters by name, solve and evaluate outputs by name.
+
+    Returns
+    -------
+    dict
+        IPOPT stats of the solve.
+    dict[str, list]
+        Value of each output (see `sweep.resolve`), None if the solve failed.
+    """
+    _model.set_parameters(**values)
+    sol = _model.solver.solve(objective, verbose=False, behavior_on_failure='return_last')
+    stats = sol.stats()
+
+    # compiled once per set of outputs, every later task only evaluates it
+    key = tuple(outputs)
+    if key not in _reports:
+        _reports[key] = Report(_model.opti, {name: resolve(_model, name) for name in outputs})
+
+    if stats['success']:
+        record = _reports[key](sol)
+        result = {name: np.asarray(record[name], dtype=float).tolist() for name in outputs}
+    else:
+        result = dict.fromkeys(outputs)
+
+    return {key: stats[key] for key in ['success', 'return_status', 'iter_count', 't_wall_solve']}, result
+
+
+def normalize_in_parallel(workers:int=None) -> tuple[Model, dict]:
+    """
+    Solve the normalization stages in worker processes while building the model for the net solve.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes, defaults to one per stage capped at the CPU count.
+
+    Returns
+    -------
+    Model
+        Model built in this process, with its normalizers set.
+    dict[str, Solution]
+        Solution of each stage, evaluated against the returned model.
+    """
+    if workers is None:
+        workers = min(len(Model.stages), multiprocessing.cpu_count())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(_solve_stage, stage) for stage in Model.stages]
+
+        # build our own copy while the workers are solving
+        model = Model()
+
+        solutions = {}
+        for future in futures:
+            stage, *result = future.result()
+            solutions[stage] = Solution(model.opti, *result)
+
+    model.set_normalizers(*(solutions[stage](model.stage_score(stage)) for stage in ["M1", "M2", "GM", "M3"]))
+
+    return model, solutions
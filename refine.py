@@ -0,0 +1,190 @@
+"""
+Coarse-to-fine continuation of the lap discretization.
+
+Solving a fine lap straight from the flat initial guesses takes many iterations and often fails.
+Instead the model is solved on a coarse lap first, its speed and load factor profiles are
+interpolated onto the next finer lap as the initial guess, and so on up to the target resolution.
+Every other variable carries over as it is.
+
+Example
+-------
+    python refine.py --meshes 5x2 20x8 50x20 --objective M3
+"""
+import argparse
+import time
+
+import numpy as np
+import casadi as ca
+
+import constants
+
+from typing import Callable, Union
+
+from model import Model
+from solver import Solution
+
+# (lap_breakdown, lap_breakdown_turn) of each level, ending at the constants.py resolution
+MESHES = [(5, 2), (constants.lap_breakdown, constants.lap_breakdown_turn)]
+
+# the interpolated guess is nearly feasible already, IPOPT's default push of the variables and
+# slacks into the interior throws that away and can leave it stuck
+TRANSFER_OPTIONS = {
+    'ipopt.bound_push': 1e-8,
+    'ipopt.bound_frac': 1e-8,
+    'ipopt.slack_bound_push': 1e-8,
+    'ipopt.slack_bound_frac': 1e-8,
+}
+
+
+def interpolate(values:np.ndarray, n:int) -> np.ndarray:
+    """
+    Resample a profile given at the centres of equal segments onto n equal segments.
+    """
+    old = (np.arange(len(values)) + 0.5) / len(values)
+    new = (np.arange(n) + 0.5) / n
+    return np.interp(new, old, values)
+
+
+def interpolate_straight(values:np.ndarray, n:int) -> np.ndarray:
+    """
+    Resample a straight speed profile, each heading on its own so no segment blends the way out
+    with the way back.
+    """
+    split = len(values) // 2
+    return np.concatenate([interpolate(values[:split], n // 2), interpolate(values[split:], n - n // 2)])
+
+
+def transfer(source:Model, sol:Solution, target:Model) -> None:
+    """
+    Set the initial guess of a model from a solution of the same model at another lap resolution.
+
+    Both models declare their variables in the same order, only the lap profiles differ in length.
+    """
+    source_symbols = ca.symvar(source.opti.x)
+    target_symbols = ca.symvar(target.opti.x)
+
+    straights = [symbol for mission in source.scenarios
+                 for speeds in [mission.plane.V_straight_M1, mission.plane.V_straight_M2, mission.plane.V_straight_M3]
+                 for symbol in ca.symvar(speeds)]
+
+    i = 0
+    for old, new in zip(source_symbols, target_symbols, strict=True):
+        values = sol.x[i:i + old.numel()]
+        i += old.numel()
+
+        if old.numel() != new.numel():
+            if any(ca.is_equal(old, straight) for straight in straights):
+                values = interpolate_straight(values, new.numel())
+            else:
+                values = interpolate(values, new.numel())
+
+        target.opti.set_initial(new, values)
+
+
+def refine(objective:Union[str, dict], meshes:list=None, scenarios:int=1, normalizers:tuple=None,
+           setup:Callable[[Model], None]=None, verbose:bool=False,
+           **solve_kwargs) -> tuple[Model, Solution, list[dict]]:
+    """
+    Solve at each lap resolution in turn, each from the interpolated solution of the one before.
+
+    Parameters
+    ----------
+    objective : Union[str, dict]
+        Objective, see `Solver.set_objective`.
+    meshes : list[tuple[int, int]]
+        (lap_breakdown, lap_breakdown_turn) of each level, coarse to fine. Defaults to `MESHES`.
+    scenarios : int
+        Wind scenarios of each model, see `Model`.
+    normalizers : tuple
+        (M1, M2, GM, M3) net score normalizers, for the net objective.
+    setup : Callable[[Model], None]
+        Sets parameters (e.g. the wind) on the model of every level before it is solved.
+    verbose : bool
+        Print a line per level.
+    **solve_kwargs
+        Passed to `Solver.solve` of the finest level. Coarser levels return their last iterate
+        when they fail, it is still a better start than the flat guess.
+
+    Returns
+    -------
+    Model
+        Model at the finest resolution.
+    Solution
+        Its solution.
+    list[dict]
+        Resolution, build time, iterations, solve time and success of each level.
+    """
+    if meshes is None:
+        meshes = MESHES
+
+    model, sol, history = None, None, []
+
+    for level, (lap_breakdown, lap_breakdown_turn) in enumerate(meshes):
+        start = time.time()
+        coarse, model = model, Model(scenarios, lap_breakdown, lap_breakdown_turn)
+        if normalizers is not None:
+            model.set_normalizers(*normalizers)
+        if setup is not None:
+            setup(model)
+        if coarse is not None:
+            transfer(coarse, sol, model)
+        t_build = time.time() - start
+
+        kwargs = dict(solve_kwargs)
+        if coarse is not None:
+            kwargs['options'] = {**TRANSFER_OPTIONS, **kwargs.get('options', {})}
+        if level < len(meshes) - 1:
+            kwargs.update(verbose=False, behavior_on_failure='return_last')
+        sol = model.solver.solve(objective, **kwargs)
+
+        stats = sol.stats()
+        history.append({
+            'lap_breakdown': lap_breakdown,
+            'lap_breakdown_turn': lap_breakdown_turn,
+            't_build': t_build,
+            'iter_count': stats['iter_count'],
+            't_wall_solve': stats['t_wall_solve'],
+            'success': stats['success'],
+        })
+
+        if verbose:
+            print(f"{lap_breakdown:>4} x {lap_breakdown_turn:<3} | {'solved' if stats['success'] else 'FAILED'} in "
+                  f"{stats['iter_count']} iterations, {stats['t_wall_solve']:.2f} s (build {t_build:.2f} s)")
+
+    return model, sol, history
+
+
+def parse_mesh(mesh:str) -> tuple[int, int]:
+    straight, turn = mesh.split("x")
+    return int(straight), int(turn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve the model coarse to fine over the lap resolution.")
+    parser.add_argument("--meshes", nargs="+", type=parse_mesh, default=MESHES, metavar="STRAIGHTxTURN",
+                        help="Resolutions, coarse to fine, e.g. 5x2 20x8 50x20")
+    parser.add_argument("--objective", nargs="+", default=["M3"], help="Objective terms, e.g. M3 ducks_penalty")
+    parser.add_argument("--max-iter", type=int, default=1000)
+    parser.add_argument("--direct", action="store_true", help="Also solve the finest mesh from the flat guess")
+    args = parser.parse_args()
+
+    objective = {term: 1 for term in args.objective}
+
+    print("Coarse to fine:")
+    start = time.time()
+    model, sol, history = refine(objective, args.meshes, verbose=True, max_iter=args.max_iter,
+                                 behavior_on_failure='return_last')
+    print(f"{sum(level['iter_count'] for level in history)} iterations, {time.time() - start:.2f} s, "
+          f"objective {-sol.f:.6g}")
+
+    if args.direct:
+        print("Direct:")
+        start = time.time()
+        direct = Model(1, *args.meshes[-1])
+        sol = direct.solver.solve(objective, verbose=False, max_iter=args.max_iter, behavior_on_failure='return_last')
+        print(f"{'solved' if sol.stats()['success'] else 'FAILED'} in {sol.stats()['iter_count']} iterations, "
+              f"{time.time() - start:.2f} s, objective {-sol.f:.6g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Batched evaluation of report quantities at a solution.
+
+`sol(expr)` substitutes the solution into the expression graph of every quantity separately,
+which for a full design report adds up to seconds. A `Report` declares its quantities once,
+compiles them into one CasADi Function of the decision variables and parameters, and evaluates
+that once per solution into a flat {name: value} record.
+
+Example
+-------
+    report = Report(model.opti, {"span": model.plane.span, "net": model.netScore})
+    record = report(sol)    # {"span": 1.524, "net": 5.92}
+"""
+import numpy as np
+import casadi as ca
+
+from typing import Union
+
+from solver import Solution
+
+
+class Report():
+    """
+    Named quantities compiled into a single Function of (x, p).
+
+    Attributes
+    ----------
+    names : list[str]
+        Quantity names, in declaration order.
+    shapes : list[tuple[int, int]]
+        Shape of each quantity.
+    function : casadi.Function
+        (x, p) -> one output per quantity.
+    """
+    def __init__(self, opti, quantities:dict):
+        """
+        Report __init__ method.
+
+        Parameters
+        ----------
+        opti : asb.Opti
+            Problem the quantities are expressions of.
+        quantities : dict[str, Union[casadi.MX, float, np.ndarray]]
+            Expressions of the problem's variables and parameters, or plain numbers.
+        """
+        expressions = [q if isinstance(q, ca.MX) else ca.MX(ca.DM(q)) for q in quantities.values()]
+
+        self.names = list(quantities)
+        self.shapes = [e.shape for e in expressions]
+        self.function = ca.Function('report', [opti.x, opti.p], expressions)
+
+    def __call__(self, sol:Solution) -> dict:
+        return self.evaluate(sol.x, sol.p)
+
+    def empty(self) -> dict[str, Union[float, np.ndarray]]:
+        """
+        Record of NaNs, shaped like the evaluated ones, for points without a solution.
+        """
+        return {name: np.nan if shape == (1, 1) else np.full(shape[0] * shape[1], np.nan)
+                for name, shape in zip(self.names, self.shapes)}
+
+    def evaluate(self, x:np.ndarray, p:np.ndarray) -> dict[str, Union[float, np.ndarray]]:
+        """
+        All quantities at one point, scalars as floats and the rest as flat arrays.
+        """
+        values = self.function.call([x, p])
+
+        return {name: float(value) if shape == (1, 1) else np.array(value, dtype=float).flatten()
+                for name, shape, value in zip(self.names, self.shapes, values)}
@@ -0,0 +1,142 @@
+"""
+Retry ladder for sweep points that fail to converge.
+
+A point that fails from its converged neighbour is not left as a gap. A `Ladder` climbs rungs in
+order until one converges, and the sweep records which one did:
+
+    neighbour   warm start from the nearest converged neighbour, the initial guess if there is
+                none (the sweep's usual attempt)
+    relaxed     the same start with looser IPOPT tolerances, see `RELAXED_OPTIONS`
+    coarse      solve a coarse lap first and start from its solution interpolated onto the lap
+                of the model, see refine.py
+    cold        the default initial guess
+
+Rungs can be left out or reordered.
+
+Example
+-------
+    result = sweep(model, "wind_speed", np.linspace(-20, 20, 35), ["netScore"], ladder=Ladder())
+    result["rung"]      # "neighbour", "relaxed", ... per point, "" where every rung failed
+
+    python sweep.py wind_speed -20 20 35 --retry neighbour relaxed coarse cold
+"""
+import numpy as np
+
+import refine
+
+from typing import Callable, Union
+
+from model import Model
+from solver import Solution
+from supervised import initial_guess, set_initial_guess, set_parameters
+
+RUNGS = ["neighbour", "relaxed", "coarse", "cold"]
+
+# accept a point IPOPT can only bring close to optimal, the sweep records the status it ended with
+RELAXED_OPTIONS = {
+    'ipopt.tol': 1e-5,
+    'ipopt.acceptable_tol': 1e-3,
+    'ipopt.acceptable_constr_viol_tol': 1e-3,
+    'ipopt.acceptable_iter': 5,
+    'ipopt.mu_strategy': 'adaptive',
+}
+
+
+class Ladder():
+    """
+    Rungs to climb, in order, until a point converges.
+
+    Attributes
+    ----------
+    rungs : list[str]
+        Rung names, a subset of `RUNGS` in any order.
+    relaxed_options : dict
+        IPOPT options of the "relaxed" rung.
+    mesh : tuple[int, int]
+        (lap_breakdown, lap_breakdown_turn) of the "coarse" rung's pre-solve.
+    successes : dict[str, int]
+        Points each rung converged, over all the sweeps the ladder was used for.
+    """
+    def __init__(self, rungs:list=None, relaxed_options:dict=None, mesh:tuple=refine.MESHES[0]):
+        self.rungs = list(RUNGS if rungs is None else rungs)
+        for rung in self.rungs:
+            if rung not in RUNGS:
+                raise ValueError(f"Unknown rung '{rung}', expected one of {RUNGS}")
+
+        self.relaxed_options = RELAXED_OPTIONS if relaxed_options is None else relaxed_options
+        self.mesh = tuple(mesh)
+        self.successes = {rung: 0 for rung in self.rungs}
+        self._coarse = {}
+
+    def solve(self, model:Model, objective:Union[str, dict], solve:Callable[..., Solution],
+              warm:Solution=None, **solve_kwargs) -> tuple[Solution, str]:
+        """
+        Climb the rungs at the model's current parameter values.
+
+        Parameters
+        ----------
+        model : Model
+            Model being swept.
+        objective : Union[str, dict]
+            Objective, see `Solver.set_objective`.
+        solve : Callable[..., Solution]
+            solve(warm, **solve_kwargs) solves the model from a warm start, or from its initial
+            guess if warm is None, and returns the last iterate if it fails.
+        warm : Solution
+            Nearest converged neighbour, None if there is none.
+        **solve_kwargs
+            Passed to every solve. "options" are merged under those of a rung.
+
+        Returns
+        -------
+        Solution
+            First converged solution, or the last rung's last iterate if none converged.
+        str
+            Rung that converged, None if none did.
+        """
+        sol = None
+        for rung in self.rungs:
+            if rung == "neighbour":
+                sol = solve(warm, **solve_kwargs)
+            elif rung == "relaxed":
+                sol = solve(warm, **with_options(solve_kwargs, self.relaxed_options))
+            elif rung == "coarse":
+                guess = initial_guess(model.opti)
+                self.presolve(model, objective, **solve_kwargs)
+                sol = solve(None, **with_options(solve_kwargs, refine.TRANSFER_OPTIONS))
+                set_initial_guess(model.opti, guess)
+            elif rung == "cold":
+                sol = solve(None, **solve_kwargs)
+
+            if sol.stats()['success']:
+                self.successes[rung] += 1
+                return sol, rung
+
+        return sol, None
+
+    def presolve(self, model:Model, objective:Union[str, dict], **solve_kwargs) -> None:
+        """
+        Solve a coarse lap at the model's parameter values and set the model's initial guess from it.
+
+        The coarse model is built the first time and reused, its parameters are copied over by name.
+        """
+        key = (len(model.scenarios), *self.mesh)
+        if key not in self._coarse:
+            self._coarse[key] = Model(len(model.scenarios), *self.mesh)
+        coarse = self._coarse[key]
+
+        values = dict(zip(model.solver.parameter_names, model.opti.value(model.opti.p, model.opti.value_parameters())))
+        p = coarse.opti.value(coarse.opti.p, coarse.opti.value_parameters())
+        p = np.array([values.get(name, value) for name, value in zip(coarse.solver.parameter_names, np.atleast_1d(p))])
+        set_parameters(coarse.opti, p)
+
+        kwargs = {name: value for name, value in solve_kwargs.items() if name != 'options'}
+        sol = coarse.solver.solve(objective, verbose=False, behavior_on_failure='return_last', **kwargs)
+        refine.transfer(coarse, sol, model)
+
+
+def with_options(solve_kwargs:dict, options:dict) -> dict:
+    """
+    Solve keyword arguments with the given IPOPT options merged over their own.
+    """
+    return {**solve_kwargs, 'options': {**solve_kwargs.get('options', {}), **options}}
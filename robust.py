@@ -0,0 +1,99 @@
+"""
+Wind-robust design by sample average approximation.
+
+Rather than optimizing the design separately for every wind sample and averaging the results,
+one NLP flies a single shared design (span, chord, fuselage, banner, cargo) through K wind
+samples, each with its own lap simulation, and maximizes the average net score. The scenario
+blocks only share the design variables, so the problem grows linearly with K.
+
+Example
+-------
+    python robust.py -k 16 --seed 0
+"""
+import argparse
+import time
+
+import numpy as np
+
+import normalDistribution as nd
+from model import Model, Mission
+from solver import Solution
+
+
+def robust_design(K:int, seed:int=0, normalizers:tuple=None, objective:dict=None,
+                  **solve_kwargs) -> tuple[Model, Solution]:
+    """
+    Maximize the expected net score over K wind samples.
+
+    Parameters
+    ----------
+    K : int
+        Number of wind scenarios.
+    seed : int
+        Seed of `normalDistribution.sample_wind`.
+    normalizers : tuple
+        (M1, M2, GM, M3) net score normalizers, from a nominal (no wind) model if not given.
+    objective : dict
+        Objective, see `Solver.set_objective`. Defaults to net score with the ducks penalty.
+    **solve_kwargs
+        Passed to `Solver.solve`.
+
+    Returns
+    -------
+    Model
+        Scenario model, with the winds and normalizers set.
+    Solution
+        Robust design.
+    """
+    if objective is None:
+        objective = {"net": 1, "ducks_penalty": 1}
+
+    if normalizers is None:
+        nominal = Model()
+        nominal.normalize(verbose=False)
+        normalizers = [nominal.opti.value(n) for n in
+                       [nominal.normalizer_M1, nominal.normalizer_M2, nominal.normalizer_GM, nominal.normalizer_M3]]
+
+    model = Model(scenarios=K)
+    model.set_normalizers(*normalizers)
+    model.set_winds(*nd.sample_wind(K, seed=seed))
+
+    sol = model.solver.solve(objective, **solve_kwargs)
+
+    return model, sol
+
+
+def print_design(model:Model, sol:Solution) -> None:
+    plane = model.plane
+    normalizers = [model.normalizer_M1, model.normalizer_M2, model.normalizer_GM, model.normalizer_M3]
+    scores = np.array([float(sol(Mission.Net_Score(scenario, *normalizers))) for scenario in model.scenarios])
+    winds = np.array([[float(sol(s.plane.wind_speed)), float(sol(s.plane.wing_direction))] for s in model.scenarios])
+
+    print(f"\n=== Robust Design over {len(model.scenarios)} winds ===")
+    print(f"Span:                {sol(plane.span):.3f} m")
+    print(f"Chord:               {sol(plane.chord):.3f} m")
+    print(f"Banner Length:       {sol(plane.banner_length):.3f} m")
+    print(f"Ducks / Pucks:       {sol(plane.ducks):.2f} / {sol(plane.pucks):.2f}")
+    print(f"Fuselage (l, w, h):  {sol(plane.fuselage_length):.3f}, {sol(plane.fuselage_width):.3f}, {sol(plane.fuselage_height):.3f} m")
+    print(f"Expected Net Score:  {sol(model.netScore):.5f}")
+    print(f"Net Score range:     {scores.min():.5f} - {scores.max():.5f} (std {scores.std():.5f})")
+    print(f"Wind speeds:         {winds[:, 0].min():.2f} - {winds[:, 0].max():.2f} m/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maximize the expected net score over sampled winds.")
+    parser.add_argument("-k", "--scenarios", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-iter", type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.time()
+    model, sol = robust_design(args.scenarios, args.seed, verbose=False, max_iter=args.max_iter)
+
+    print_design(model, sol)
+    print(f"nx = {model.opti.nx}, ng = {model.opti.ng}, {sol.stats()['iter_count']} iterations, "
+          f"{sol.stats()['t_wall_solve']:.2f} s solve, {time.time() - start:.2f} s total")
+
+
+if __name__ == "__main__":
+    main()
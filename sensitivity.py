@@ -0,0 +1,240 @@
+"""
+Post-optimal parametric sensitivities of the aircraft model.
+
+Instead of re-solving the NLP over a range of each parameter, the sensitivities are read off the
+KKT conditions of one converged solve. Differentiating
+
+    grad_x L(x, lam, p) = 0,    |lam| * s(x, p) = mu
+
+(s being each constraint's distance to the bound its multiplier points at) with respect to p gives
+the linear system
+
+    [ H            J'       ] [ dx/dp   ]     [ d(grad_x L)/dp          ]
+    [ |lam| J     -diag(s)  ] [ dlam/dp ] = - [ |lam| (dg/dp - db/dp)   ]
+
+from which the derivative of any output y(x, p) is dy/dx dx/dp + dy/dp. This is exact as long as
+the active set does not change, `check` re-solves around the point when that needs confirming.
+"""
+import numpy as np
+import casadi as ca
+
+import constants
+
+from typing import Union
+
+from model import Model
+from solver import Solution
+
+# parameters declared in initialization.sweepParm and lap_simulator.lap_sim
+PARAMETERS = [
+    "extra_weight",
+    "banner_CD_e",
+    "ground_tax",
+    "wind_speed",
+    "wing_direction",
+    "min_V3_speed",
+    "max_g",
+    "skin_friction_drag",
+    "oswaldEff",
+    "CLmax",
+    "PropEff",
+]
+
+
+def design_variables(model:Model) -> dict:
+    """
+    Aircraft attributes that are decision variables of the problem, e.g. span, chord, ducks.
+    """
+    variables = {id(v) for category in model.opti.variables_categorized.values() for v in category}
+    design = {name: value for name, value in vars(model.plane).items() if id(value) in variables}
+
+    # with constants.mirrored_turn the M2 load factor follows from a curvature variable, still
+    # reported as the variable it is without
+    if constants.mirrored_turn:
+        design["n_turn_M2"] = model.plane.n_turn_M2
+
+    return design
+
+
+class Sensitivity():
+    """
+    KKT sensitivity of a model, built once and evaluated at any converged solution.
+
+    Attributes
+    ----------
+    model : Model
+        Model the sensitivities are taken of.
+    """
+    def __init__(self, model:Model):
+        self.model = model
+
+        opti = model.opti
+        x, p = opti.x, opti.p
+        lam_g = ca.MX.sym('lam_g', opti.g.shape[0])
+
+        hessian, gradient = ca.hessian(opti.f + ca.dot(lam_g, opti.g), x)
+
+        self.kkt = ca.Function('kkt', [x, p, lam_g], [
+            opti.g,
+            hessian,
+            ca.jacobian(opti.g, x),
+            ca.jacobian(gradient, p),
+            ca.jacobian(opti.g, p),
+            ca.jacobian(opti.lbg, p),
+            ca.jacobian(opti.ubg, p),
+        ])
+
+        self._outputs = {}
+
+    def parameter_index(self, parameter:Union[str, ca.MX]) -> int:
+        """
+        Position of a scalar parameter in `opti.p`, by aircraft attribute name or the parameter itself.
+
+        None for parameters the problem does not depend on (e.g. ground_tax), `opti.p` leaves
+        those out.
+        """
+        if isinstance(parameter, str):
+            parameter = getattr(self.model.plane, parameter)
+
+        i = 0
+        for symbol in ca.symvar(self.model.opti.p):
+            if symbol.name() == parameter.name():
+                return i
+            i += symbol.numel()
+
+        if not parameter.is_symbolic():
+            raise ValueError(f"{parameter} is not a parameter of the model")
+
+        return None
+
+    def design_jacobian(self, sol:Solution) -> np.ndarray:
+        """
+        dx/dp of all decision variables with respect to all parameters, shape (nx, np).
+        """
+        g, hessian, jac_g, jac_grad_p, jac_g_p, jac_lbg_p, jac_ubg_p = (
+            np.array(m, dtype=float) for m in self.kkt(sol.x, sol.p, sol.lam_g))
+
+        lbg, ubg = (np.array(b, dtype=float).flatten() for b in self.model.solver.bounds(sol.p))
+
+        # casadi multipliers are negative on the lower bound and positive on the upper one
+        upper = sol.lam_g > 0
+        jac_b_p = np.where(upper[:, None], jac_ubg_p, jac_lbg_p)
+        slack = np.maximum(np.where(upper, ubg - g.flatten(), g.flatten() - lbg), 0)
+
+        # equalities and active inequalities (slack 0) get J dx = -(dg/dp - db/dp), inactive ones
+        # (multiplier 0) get dlam = 0, and the weakly active ones IPOPT leaves in between are
+        # weighted by the linearized complementarity |lam| ds + slack dlam = 0
+        weight = np.where(lbg == ubg, 1, np.abs(sol.lam_g))
+        slack = np.where(lbg == ubg, 0, slack)
+
+        nx = jac_g.shape[1]
+
+        kkt = np.block([[hessian, jac_g.T], [weight[:, None] * jac_g, -np.diag(slack)]])
+        rhs = -np.vstack([jac_grad_p, weight[:, None] * (jac_g_p - jac_b_p)])
+
+        # least squares so degenerate (e.g. redundant active) constraints don't make it singular
+        return np.linalg.lstsq(kkt, rhs, rcond=None)[0][:nx]
+
+    def output_jacobians(self, output:ca.MX) -> ca.Function:
+        # cached per expression, keeping the expression alive so its id stays unique
+        if id(output) not in self._outputs:
+            opti = self.model.opti
+            self._outputs[id(output)] = output, ca.Function('output_jacobians', [opti.x, opti.p],
+                                                            [ca.jacobian(ca.vec(output), opti.x), ca.jacobian(ca.vec(output), opti.p)])
+
+        return self._outputs[id(output)][1]
+
+    def evaluate(self, sol:Solution, outputs:Union[list, dict]=None, parameters:list=None) -> dict:
+        """
+        Sensitivities of outputs with respect to parameters at a converged solution.
+
+        Parameters
+        ----------
+        sol : Solution
+            Converged solution, of the objective the sensitivities should hold for.
+        outputs : Union[list, dict]
+            Model or aircraft attribute names, or a {name: expression} dict. Defaults to the net
+            score and every design variable.
+        parameters : list
+            Aircraft parameter names, defaults to `PARAMETERS`.
+
+        Returns
+        -------
+        dict[str, dict[str, Union[float, np.ndarray]]]
+            result[output][parameter] = d(output)/d(parameter).
+        """
+        if outputs is None:
+            outputs = {"netScore": self.model.netScore, **design_variables(self.model)}
+        elif not isinstance(outputs, dict):
+            outputs = {name: getattr(self.model, name) if hasattr(self.model, name) else getattr(self.model.plane, name)
+                       for name in outputs}
+        if parameters is None:
+            parameters = PARAMETERS
+
+        # unused parameters get a zero column
+        indices = [self.parameter_index(parameter) for parameter in parameters]
+        used = [j for j, i in enumerate(indices) if i is not None]
+        columns = [indices[j] for j in used]
+
+        dx_dp = np.zeros((sol.x.size, len(parameters)))
+        dx_dp[:, used] = self.design_jacobian(sol)[:, columns]
+
+        result = {}
+        for name, output in outputs.items():
+            jac_x, jac_p = (np.array(m, dtype=float) for m in self.output_jacobians(output)(sol.x, sol.p))
+            dy_dp = jac_x @ dx_dp
+            dy_dp[:, used] += jac_p[:, columns]
+
+            result[name] = {parameter: float(dy_dp[0, j]) if dy_dp.shape[0] == 1 else dy_dp[:, j]
+                            for j, parameter in enumerate(parameters)}
+
+        return result
+
+    def check(self, sol:Solution, parameter:str, output:Union[str, ca.MX]="netScore", relative_step:float=0.01,
+              **solve_kwargs) -> tuple[float, float]:
+        """
+        Compare the KKT sensitivity with a central difference of two warm started re-solves.
+
+        Returns
+        -------
+        tuple[float, float]
+            (KKT derivative, finite difference derivative).
+        """
+        model = self.model
+        expression = output if not isinstance(output, str) else (
+            getattr(model, output) if hasattr(model, output) else getattr(model.plane, output))
+        symbol = getattr(model.plane, parameter)
+
+        nominal = sol(symbol)
+        step = relative_step * max(abs(nominal), 1)
+
+        values = []
+        for value in [nominal + step, nominal - step]:
+            model.opti.set_value(symbol, value)
+            values.append(float(model.solver.solve(warm_start=sol, verbose=False, **solve_kwargs)(expression)))
+        model.opti.set_value(symbol, nominal)
+
+        kkt = self.evaluate(sol, {"output": expression}, [parameter])["output"][parameter]
+
+        return kkt, (values[0] - values[1]) / (2 * step)
+
+    def report(self, sol:Solution, output:str="netScore", parameters:list=None) -> dict:
+        """
+        Print d(output)/d(parameter) and the elasticity (% change of the output per % change of
+        the parameter) of each parameter, the slopes of the old "% change" sweep plots.
+        """
+        if parameters is None:
+            parameters = PARAMETERS
+
+        derivatives = self.evaluate(sol, [output], parameters)[output]
+        y = float(sol(getattr(self.model, output) if hasattr(self.model, output) else getattr(self.model.plane, output)))
+
+        print(f"\n=== Sensitivity of {output} ({y:.6g}) ===")
+        print(f"{'Parameter':>20} | {'Value':>10} | {'Derivative':>12} | {'Elasticity':>10}")
+        print("-" * 62)
+        for parameter, derivative in derivatives.items():
+            value = float(sol(getattr(self.model.plane, parameter)))
+            elasticity = derivative * value / y if y != 0 else np.nan
+            print(f"{parameter:>20} | {value:>10.4g} | {derivative:>12.6g} | {elasticity:>10.4g}")
+
+        return derivatives
@@ -0,0 +1,521 @@
+"""
+Persistent IPOPT solver for the aircraft optimization problem.
+
+`opti.solve()` rebuilds the CasADi `nlpsol` on every call, which for our problem costs about as
+much as the IPOPT iterations themselves. `Solver` builds the NLP once from an `asb.Opti` whose
+variables and constraints are already declared, then re-solves it with new parameter values,
+objective weights and initial guesses.
+"""
+import time
+
+import aerosandbox as asb
+import numpy as np
+import casadi as ca
+
+import codegen
+import telemetry
+
+from typing import Any, Union
+
+# IPOPT moves a warm start this far inside the bounds (and its multipliers off zero). Its defaults
+# (1e-3 / 1e-2) throw a converged point and its multipliers far enough off that the M1 -> M2 -> GM
+# -> M3 -> Net chain ran out of iterations on M2, M3 and Net
+WARM_START_OPTIONS = {
+    'ipopt.warm_start_bound_push': 1e-6,
+    'ipopt.warm_start_bound_frac': 1e-6,
+    'ipopt.warm_start_slack_bound_push': 1e-6,
+    'ipopt.warm_start_slack_bound_frac': 1e-6,
+    'ipopt.warm_start_mult_bound_push': 1e-6,
+}
+
+
+class Solution():
+    """
+    Values of one solve of a `Solver`.
+
+    Mirrors the `sol(expr)` interface of `asb.OptiSol` so the report code can use either.
+
+    Attributes
+    ----------
+    x : np.ndarray
+        Decision variables at the solution.
+    p : np.ndarray
+        Parameter values the problem was solved with.
+    lam_x : np.ndarray
+        Multipliers of the variable bounds.
+    lam_g : np.ndarray
+        Multipliers of the constraints.
+    f : float
+        Objective value (minimized form).
+    """
+    def __init__(self, opti:asb.Opti, x, p, lam_x, lam_g, f, stats:dict):
+        self.opti = opti
+        self.x = np.array(x, dtype=float).flatten()
+        self.p = np.array(p, dtype=float).flatten()
+        self.lam_x = np.array(lam_x, dtype=float).flatten()
+        self.lam_g = np.array(lam_g, dtype=float).flatten()
+        self.f = float(f)
+        self._stats = stats
+        self._assignments = None
+
+    def __call__(self, x:Any) -> Any:
+        return self.value(x)
+
+    def value(self, x:Any) -> Any:
+        """
+        Substitute the solution into an expression, or a list/tuple/dict of expressions.
+        """
+        if isinstance(x, (list, tuple)):
+            return type(x)(self.value(i) for i in x)
+        if isinstance(x, dict):
+            return {k: self.value(v) for k, v in x.items()}
+        if not isinstance(x, (ca.MX, ca.SX, ca.DM)):
+            return x
+
+        return self.opti.value(x, self.assignments())
+
+    def assignments(self) -> list:
+        """
+        Solution as a list of `symbol == value` equalities, the form `opti.value()` substitutes.
+        """
+        if self._assignments is None:
+            self._assignments = []
+            for vector, values in [(self.opti.x, self.x), (self.opti.p, self.p)]:
+                i = 0
+                for symbol in ca.symvar(vector):
+                    n = symbol.numel()
+                    self._assignments.append(symbol == values[i:i + n])
+                    i += n
+
+        return self._assignments
+
+    def stats(self) -> dict:
+        return self._stats
+
+    def record(self, label:str=None) -> dict:
+        """
+        Telemetry record of the solve, see `telemetry.record`.
+        """
+        return telemetry.record(self._stats, len(self.x), len(self.lam_g), len(self.p), self.f,
+                                self._stats['t_wall_solve'], label)
+
+
+class IterationCallback(ca.Callback):
+    """
+    nlpsol iteration callback that feeds the iterates of a solve to a `telemetry.Trace`.
+
+    One callback lives as long as its `Solver`, so the nlpsol built with it is reused across
+    solves and traces.
+    """
+    def __init__(self, solver:"Solver"):
+        ca.Callback.__init__(self)
+        self.opti = solver.opti
+        self.trace = None
+        self.p = self.lbg = self.ubg = None
+        self.values = None
+        self.iteration = 0
+        self._variables = None
+        self.construct('iteration_callback', {})
+
+    def start(self, trace:telemetry.Trace, p:np.ndarray, lbg:np.ndarray, ubg:np.ndarray) -> None:
+        """
+        Point the callback at a trace and at the parameters and bounds of the solve about to run.
+        """
+        if trace.variables is not self._variables:
+            self._variables = trace.variables
+            self.values = ca.Function('trace', [self.opti.x, self.opti.p], list(trace.variables.values()))
+        self.trace = trace
+        self.p, self.lbg, self.ubg = p, lbg, ubg
+        self.iteration = 0
+
+    def get_n_in(self) -> int:
+        return ca.nlpsol_n_out()
+
+    def get_n_out(self) -> int:
+        return 1
+
+    def get_name_in(self, i:int) -> str:
+        return ca.nlpsol_out(i)
+
+    def get_name_out(self, i:int) -> str:
+        return 'ret'
+
+    def get_sparsity_in(self, i:int) -> ca.Sparsity:
+        n = {'x': self.opti.nx, 'f': 1, 'g': self.opti.ng,
+             'lam_x': self.opti.nx, 'lam_g': self.opti.ng, 'lam_p': self.opti.np}[ca.nlpsol_out(i)]
+        return ca.Sparsity.dense(n, 1)
+
+    def eval(self, arg:list) -> list:
+        x = arg[0]
+        values = self.values.call([x, self.p])
+
+        self.trace.iteration(self.iteration, x, float(arg[1]), telemetry.infeasibility(arg[2], self.lbg, self.ubg),
+                             dict(zip(self._variables, values)))
+        self.iteration += 1
+
+        # 0 lets IPOPT carry on
+        return [0]
+
+
+class Solver():
+    """
+    IPOPT solver that is set up once and re-solved in place.
+
+    The objective is a weighted sum of named terms, each weight being an `opti.parameter()`, so
+    switching between e.g. the M1 and the net score objective is a parameter change and not a
+    new NLP.
+
+    Attributes
+    ----------
+    opti : asb.Opti
+        Problem the solver was built from.
+    weights : dict[str, casadi.MX]
+        Weight parameter of each objective term.
+    last : Solution
+        Most recent solution, converged or not.
+    warm : Solution
+        Most recent converged solution, used to warm start the next solve.
+    t_setup : float
+        Wall time spent building the NLP and the default nlpsol.
+    objective : dict[str, float]
+        Current objective weights.
+    log : telemetry.Log
+        If set, every solve appends its telemetry record to it, labelled with the objective.
+    trace : telemetry.Trace
+        If set, every solve streams its iterations to it, see `IterationCallback`.
+    store : store.Store
+        If set, every solve is stored in it and a converged solve of the same problem, parameters,
+        objective, start point and settings is returned from it instead of solving again.
+    parameter_names : list[str]
+        Name of every entry of `opti.p`, see `name_parameters`.
+    """
+    def __init__(self, opti:asb.Opti, objectives:dict, options:dict=None, expand:bool=True,
+                 compiled:bool=False, cache_dir:str=codegen.CACHE_DIR):
+        """
+        Solver __init__ method.
+
+        Parameters
+        ----------
+        opti : asb.Opti
+            Problem with all variables, parameters and constraints already declared.
+        objectives : dict[str, casadi.MX]
+            Named terms to be maximized.
+        options : dict
+            IPOPT/nlpsol options merged over the aerosandbox defaults.
+        expand : bool
+            Expand the NLP into a single SX graph before building the solver. Its derivatives,
+            the Hessian above all, are several times cheaper to evaluate than through MX calls.
+        compiled : bool
+            Evaluate the NLP from a C library compiled once and cached in `cache_dir`, see codegen.py.
+        cache_dir : str
+            Folder of the compiled libraries.
+        """
+        start = time.time()
+        self.opti = opti
+        self.options = {} if options is None else options
+        self.weights = {name: opti.parameter(value=0) for name in objectives}
+
+        opti.maximize(sum(self.weights[name] * f for name, f in objectives.items()))
+
+        self.nlp = {'x': opti.x, 'p': opti.p, 'f': opti.f, 'g': opti.g}
+        if expand:
+            # expanded once here, not by every nlpsol built from it
+            nlp = ca.Function('nlp', [opti.x, opti.p], [opti.f, opti.g]).expand()
+            x, p = ca.SX.sym('x', opti.nx), ca.SX.sym('p', opti.np)
+            f, g = nlp(x, p)
+            self.nlp = {'x': x, 'p': p, 'f': f, 'g': g}
+        self.bounds = ca.Function('bounds', [opti.p], [opti.lbg, opti.ubg])
+
+        self.compiled = compiled
+        self.cache_dir = cache_dir
+        self._library = None
+
+        self._solvers = {}
+        self.last = None
+        self.warm = None
+        self.objective = {}
+        self.log = None
+        self.trace = None
+        self.store = None
+        self._callback = None
+        self._structure = None
+
+        self.parameter_names = [f"p{i}" for i in range(opti.np)]
+        self.name_parameters({f"weight_{name}": weight for name, weight in self.weights.items()})
+
+        # build the default solver now so the first solve only pays for iterations
+        self.get_nlpsol()
+        self.t_setup = time.time() - start
+
+    def get_nlpsol(self, max_iter:int=1000, verbose:bool=False, warm_start:bool=False,
+                   options:dict=None) -> ca.Function:
+        """
+        Get the nlpsol for a set of options, building it only the first time it is asked for.
+
+        `options` are merged over the solver's own, e.g. {'ipopt.tol': 1e-6}.
+        """
+        options = {
+            'ipopt.sb': 'yes',
+            'ipopt.max_iter': max_iter,
+            'ipopt.mu_strategy': 'adaptive',
+            'ipopt.fast_step_computation': 'yes',
+            'ipopt.print_level': 5 if verbose else 0,
+            'print_time': verbose,
+            **self.options,
+            **({} if options is None else options),
+        }
+
+        # IPOPT ignores the multipliers we pass in unless told to use them
+        if warm_start:
+            options = {**WARM_START_OPTIONS, **options, 'ipopt.warm_start_init_point': 'yes'}
+        key = repr(sorted(options.items()))
+
+        if key not in self._solvers:
+            self._solvers[key] = ca.nlpsol('solver', 'ipopt', self.library() if self.compiled else self.nlp, options)
+
+        return self._solvers[key]
+
+    def library(self) -> str:
+        """
+        Compiled library of the NLP, compiled on the first call if it is not cached yet.
+        """
+        if self._library is None:
+            self._library = codegen.library(self.nlp, lambda: ca.nlpsol('solver', 'ipopt', self.nlp), self.cache_dir)
+
+        return self._library
+
+    def structure(self) -> str:
+        """
+        Hash of the NLP and `constants.py`, see `codegen.structure_hash`.
+        """
+        if self._structure is None:
+            self._structure = codegen.structure_hash(self.nlp)
+
+        return self._structure
+
+    def name_parameters(self, named:dict) -> None:
+        """
+        Name entries of `parameter_names` after the given {name: parameter} dict.
+
+        Anything that is not a parameter of the problem is skipped, so all the attributes of an
+        object can be passed. Vector parameters are named "name[i]".
+        """
+        offsets, i = [], 0
+        for symbol in ca.symvar(self.opti.p):
+            offsets.append((symbol, i))
+            i += symbol.numel()
+
+        for name, value in named.items():
+            if not isinstance(value, ca.MX) or not value.is_symbolic():
+                continue
+            for symbol, offset in offsets:
+                if ca.is_equal(value, symbol):
+                    n = symbol.numel()
+                    for j in range(n):
+                        self.parameter_names[offset + j] = name if n == 1 else f"{name}[{j}]"
+                    break
+
+    def set_value(self, parameter:ca.MX, value:Union[float, np.ndarray]) -> None:
+        self.opti.set_value(parameter, value)
+
+    def set_initial(self, variable:ca.MX, value:Union[float, np.ndarray]) -> None:
+        self.opti.set_initial(variable, value)
+
+    def set_objective(self, objective:Union[str, dict]) -> None:
+        """
+        Set the objective weights, either a single term name (weight 1) or a {name: weight} dict.
+        """
+        if isinstance(objective, str):
+            objective = {objective: 1}
+
+        for name in objective:
+            if name not in self.weights:
+                raise ValueError(f"Unknown objective '{name}', expected one of {list(self.weights)}")
+
+        for name, weight in self.weights.items():
+            self.opti.set_value(weight, objective.get(name, 0))
+        self.objective = dict(objective)
+
+    def solve(self, objective:Union[str, dict]=None, max_iter:int=1000, verbose:bool=True,
+              warm_start:Union[bool, Solution]=False, behavior_on_failure:str='raise',
+              options:dict=None, warm_duals:bool=True) -> Solution:
+        """
+        Solve from the current initial guess and parameter values.
+
+        Parameters
+        ----------
+        objective : Union[str, dict]
+            Objective to set before solving, see `set_objective`. Keeps the current one if None.
+        max_iter : int
+            IPOPT iteration limit.
+        verbose : bool
+            Print IPOPT progress.
+        warm_start : Union[bool, Solution]
+            Start from the variables of the last converged solve, or of the given solution,
+            instead of the initial guess.
+        warm_duals : bool
+            Also start from its multipliers, pushed off the bounds by `WARM_START_OPTIONS`. From
+            the calm solution to 4, 8, -8 and 12 m/s of wind this takes 12-24 iterations, where
+            the variables alone took 21-114 or failed, and it carries the stage chain, which the
+            variables alone do not.
+        behavior_on_failure : str
+            "raise" a RuntimeError like `opti.solve()`, or "return_last" to return the last iterate.
+        options : dict
+            IPOPT/nlpsol options for this solve only, see `get_nlpsol`.
+
+        Returns
+        -------
+        Solution
+            Solved values.
+        """
+        if objective is not None:
+            self.set_objective(objective)
+
+        start_from = warm_start if isinstance(warm_start, Solution) else self.warm
+        warm_start = bool(warm_start) and start_from is not None
+
+        p = self.opti.value(self.opti.p, self.opti.value_parameters())
+        lbg, ubg = self.bounds(p)
+
+        label = "+".join(name for name, weight in self.objective.items() if weight)
+
+        if warm_start and warm_duals:
+            start_point = {'x0': start_from.x, 'lam_x0': start_from.lam_x, 'lam_g0': start_from.lam_g}
+        elif warm_start:
+            start_point = {'x0': start_from.x}
+        else:
+            start_point = {'x0': self.opti.value(self.opti.x, self.opti.initial())}
+
+        if self.store is not None:
+            key = self.store.key(self, p, start_point, {'max_iter': max_iter, 'options': options or {}})
+            cached = self.store.fetch(key, self.opti)
+            if cached is not None:
+                self.last = self.warm = cached
+                if self.log is not None:
+                    self.log.append(cached.record(label))
+                return cached
+
+        if self.trace is not None:
+            if self._callback is None:
+                self._callback = IterationCallback(self)
+            self._callback.start(self.trace, p, lbg, ubg)
+            self.trace.start(label)
+            options = {'iteration_callback': self._callback, **({} if options is None else options)}
+
+        # the trace is ended (and its file closed) even if building or running the solver raises
+        stats = {'success': False, 'return_status': 'Exception', 'iter_count': None}
+        try:
+            nlpsol = self.get_nlpsol(max_iter, verbose, warm_start and warm_duals, options)
+
+            start = time.time()
+            result = nlpsol(p=p, lbg=lbg, ubg=ubg, **start_point)
+            stats = dict(nlpsol.stats())
+            stats['t_wall_solve'] = time.time() - start
+            stats['warm_start'] = warm_start
+            stats['warm_duals'] = warm_start and warm_duals
+        finally:
+            if self.trace is not None:
+                self.trace.end(stats)
+
+        self.last = Solution(self.opti, result['x'], p, result['lam_x'], result['lam_g'],
+                             result['f'], stats)
+
+        if self.log is not None:
+            self.log.append(self.last.record(label))
+        if self.store is not None:
+            self.store.put(key, self, self.last)
+
+        if stats['success']:
+            self.warm = self.last
+        elif behavior_on_failure == 'raise':
+            raise RuntimeError(f"Solver failed: {stats['return_status']}")
+
+        return self.last
+
+    def compare_warm_start(self, objective:Union[str, dict]=None, **kwargs) -> tuple[Solution, dict]:
+        """
+        Solve once cold, once warm started from the variables of the same previous solution and
+        once from its variables and multipliers.
+
+        A solve that does not converge is recorded with its return status, not raised.
+
+        Parameters
+        ----------
+        objective : Union[str, dict]
+            Objective, see `set_objective`.
+        **kwargs
+            Passed to `solve`. "behavior_on_failure" only applies if none of the three converged.
+
+        Returns
+        -------
+        Solution
+            The solution warm started with multipliers, so a chain of stages continues as it would
+            with warm starts, or the first other one that converged if it did not.
+        dict
+            Iterations, wall time, objective, success and return status of the cold, warm and warm with
+            multipliers ("dual") solves.
+        """
+        behavior_on_failure = kwargs.pop('behavior_on_failure', 'raise')
+        previous = self.warm
+
+        # the store would hand every one of them the first converged result
+        store, self.store = self.store, None
+        try:
+            cold = self.solve(objective, warm_start=False, behavior_on_failure='return_last', **kwargs)
+
+            self.warm = previous
+            dual = self.solve(objective, warm_start=True, warm_duals=True, behavior_on_failure='return_last', **kwargs)
+
+            self.warm = previous
+            warm = self.solve(objective, warm_start=True, behavior_on_failure='return_last', **kwargs)
+        finally:
+            self.store = store
+
+        savings = {}
+        for name, sol in [("cold", cold), ("warm", warm), ("dual", dual)]:
+            savings[f"{name}_iter"] = sol.stats()['iter_count']
+            savings[f"{name}_time"] = sol.stats()['t_wall_solve']
+            savings[f"{name}_objective"] = -sol.f
+            savings[f"{name}_success"] = bool(sol.stats()['success'])
+            savings[f"{name}_status"] = sol.stats()['return_status']
+
+        converged = [sol for sol in [dual, warm, cold] if sol.stats()['success']]
+        if not converged and behavior_on_failure == 'raise':
+            raise RuntimeError(f"Solver failed: {cold.stats()['return_status']}")
+
+        sol = self.last = converged[0] if converged else dual
+        self.warm = sol if converged else previous
+
+        return sol, savings
+
+
+def print_warm_start_report(savings:dict) -> None:
+    """
+    Print the per stage savings collected with `Solver.compare_warm_start`.
+
+    Warm starts can land in a different local optimum, so every objective is shown. Iterations of
+    a solve that did not converge are marked with "!" and its return status listed below.
+    """
+    print("\n=== Warm Start Savings ===")
+    print(f"{'Stage':>8} | {'Iter cold':>9} | {'Iter warm':>9} | {'Iter dual':>9} | {'Time cold':>9} | {'Time warm':>9}"
+          f" | {'Time dual':>9} | {'Obj cold':>12} | {'Obj warm':>12} | {'Obj dual':>12}")
+    print("-" * 131)
+    failures = []
+    for stage, row in savings.items():
+        iterations = {}
+        for name in ["cold", "warm", "dual"]:
+            iterations[name] = f"{row[f'{name}_iter']}{'' if row[f'{name}_success'] else '!'}"
+            if not row[f"{name}_success"]:
+                failures.append(f"{stage} {name}: {row[f'{name}_status']}")
+
+        print(f"{stage:>8} | {iterations['cold']:>9} | {iterations['warm']:>9} | {iterations['dual']:>9} | {row['cold_time']:>8.2f}s"
+              f" | {row['warm_time']:>8.2f}s | {row['dual_time']:>8.2f}s | {row['cold_objective']:>12.6g}"
+              f" | {row['warm_objective']:>12.6g} | {row['dual_objective']:>12.6g}")
+
+    for failure in failures:
+        print(f"! {failure}")
+
+    for name in ["warm", "dual"]:
+        saved_iter = sum(row['cold_iter'] - row[f"{name}_iter"] for row in savings.values())
+        saved_time = sum(row['cold_time'] - row[f"{name}_time"] for row in savings.values())
+        print(f"{name.capitalize()} start saved {saved_iter} iterations, {saved_time:.2f} s")
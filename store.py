@@ -0,0 +1,264 @@
+"""
+SQLite store of solves that doubles as a solve cache.
+
+Every solve of a `Solver` with a store is saved with its solution, its stats and its parameters,
+one indexed row per named parameter so past runs can be looked up by parameter range. A solve is
+keyed by the structure hash of the NLP (which covers `constants.py` and the CasADi version),
+the parameter values, the objective, the start point and the iteration limit and IPOPT options.
+When a converged solve with the same key is already stored it is returned instead of solving
+again: it is the result the same solve would come to. A warm start from another solution, or a
+retry with looser tolerances, is a different solve and runs.
+
+Example
+-------
+    python store.py runs.db                                 # everything stored
+    python store.py runs.db --where wind_speed=-5:5 --objective net
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+import codegen
+
+from solver import Solution
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solves (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    structure TEXT NOT NULL,
+    constants TEXT NOT NULL,
+    objective TEXT NOT NULL,
+    time REAL NOT NULL,
+    success INTEGER NOT NULL,
+    return_status TEXT,
+    iter_count INTEGER,
+    t_wall REAL,
+    f REAL,
+    x BLOB,
+    p BLOB,
+    lam_x BLOB,
+    lam_g BLOB,
+    stats TEXT
+);
+CREATE INDEX IF NOT EXISTS solves_key ON solves (key, success);
+CREATE TABLE IF NOT EXISTS parameters (
+    solve INTEGER NOT NULL REFERENCES solves (id),
+    name TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS parameters_name_value ON parameters (name, value);
+CREATE INDEX IF NOT EXISTS parameters_solve ON parameters (solve);
+"""
+
+
+def constants_hash() -> str:
+    """
+    Hash of the `constants.py` values alone, to tell runs of different constants apart.
+    """
+    return hashlib.sha256(repr(codegen.constants_values()).encode()).hexdigest()[:16]
+
+
+def to_blob(values:np.ndarray) -> bytes:
+    return np.asarray(values, dtype=np.float64).tobytes()
+
+
+def from_blob(blob:bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float64).copy()
+
+
+class Store():
+    """
+    Solves kept in a SQLite database.
+
+    Attributes
+    ----------
+    path : str
+        Database file, created if it does not exist.
+    connection : sqlite3.Connection
+        Open connection.
+    hits : int
+        Solves answered from the store in this process.
+    """
+    def __init__(self, path:str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.hits = 0
+        self._constants = constants_hash()
+
+    def key(self, solver, p:np.ndarray, start:dict=None, settings:dict=None) -> str:
+        """
+        Key of a solve: NLP structure, parameter values, objective, start point and settings.
+
+        Parameters
+        ----------
+        solver : solver.Solver
+            Solver of the problem.
+        p : np.ndarray
+            Parameter values.
+        start : dict[str, np.ndarray]
+            Start point handed to nlpsol, "x0" and, warm starting the multipliers, "lam_x0" and "lam_g0".
+        settings : dict
+            Anything else the result depends on, e.g. the iteration limit and IPOPT options.
+        """
+        digest = hashlib.sha256()
+        digest.update(solver.structure().encode())
+        digest.update(to_blob(np.array(p, dtype=float).flatten()))
+        digest.update(json.dumps(solver.objective, sort_keys=True).encode())
+        for name, values in sorted((start or {}).items()):
+            digest.update(name.encode())
+            digest.update(to_blob(np.array(values, dtype=float).flatten()))
+        digest.update(json.dumps(settings or {}, sort_keys=True, default=str).encode())
+
+        return digest.hexdigest()
+
+    def fetch(self, key:str, opti) -> Solution:
+        """
+        Converged solution stored under a key, None if there is none.
+        """
+        row = self.connection.execute(
+            "SELECT x, p, lam_x, lam_g, f, stats FROM solves WHERE key = ? AND success = 1 ORDER BY id DESC LIMIT 1",
+            (key,)).fetchone()
+        if row is None:
+            return None
+
+        start = time.time()
+        x, p, lam_x, lam_g, f, stats = row
+        stats = json.loads(stats)
+        sol = Solution(opti, from_blob(x), from_blob(p), from_blob(lam_x), from_blob(lam_g), f, stats)
+        stats['cached'] = True
+        stats['t_wall_solve'] = time.time() - start
+        self.hits += 1
+
+        return sol
+
+    def put(self, key:str, solver, sol:Solution) -> int:
+        """
+        Store a solve of a solver and its named parameters.
+
+        Returns
+        -------
+        int
+            Row id of the solve.
+        """
+        stats = sol.stats()
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO solves (key, structure, constants, objective, time, success, return_status, iter_count,"
+                " t_wall, f, x, p, lam_x, lam_g, stats) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, solver.structure(), self._constants, json.dumps(solver.objective, sort_keys=True), time.time(),
+                 int(bool(stats['success'])), stats['return_status'], int(stats['iter_count']), stats['t_wall_solve'],
+                 sol.f, to_blob(sol.x), to_blob(sol.p), to_blob(sol.lam_x), to_blob(sol.lam_g),
+                 json.dumps(stats, default=float)))
+            solve = cursor.lastrowid
+            self.connection.executemany("INSERT INTO parameters (solve, name, value) VALUES (?, ?, ?)",
+                                        [(solve, name, float(value)) for name, value in zip(solver.parameter_names, sol.p)])
+
+        return solve
+
+    def query(self, objective:dict=None, structure:str=None, success:bool=None, **ranges) -> list[dict]:
+        """
+        Stored solves matching all the given conditions.
+
+        Parameters
+        ----------
+        objective : dict
+            Objective weights, e.g. {"net": 1}.
+        structure : str
+            Structure hash, see `Solver.structure`.
+        success : bool
+            Only converged (True) or failed (False) solves.
+        **ranges
+            Parameter name = value, or = (low, high) for a closed range, e.g. wind_speed=(-5, 5).
+
+        Returns
+        -------
+        list[dict]
+            Id, time, structure, objective, status, iterations, objective value and every named
+            parameter of each solve, oldest first.
+        """
+        conditions, arguments = [], []
+        if objective is not None:
+            conditions.append("objective = ?")
+            arguments.append(json.dumps(objective, sort_keys=True))
+        if structure is not None:
+            conditions.append("structure = ?")
+            arguments.append(structure)
+        if success is not None:
+            conditions.append("success = ?")
+            arguments.append(int(success))
+        for name, bounds in ranges.items():
+            low, high = bounds if isinstance(bounds, (tuple, list)) else (bounds, bounds)
+            conditions.append("id IN (SELECT solve FROM parameters WHERE name = ? AND value BETWEEN ? AND ?)")
+            arguments += [name, low, high]
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.connection.execute(
+            "SELECT id, time, structure, objective, success, return_status, iter_count, t_wall, f FROM solves"
+            f"{where} ORDER BY id", arguments).fetchall()
+
+        records = []
+        for id_, time_, structure_, objective_, success_, return_status, iter_count, t_wall, f in rows:
+            parameters = self.connection.execute("SELECT name, value FROM parameters WHERE solve = ?", (id_,)).fetchall()
+            records.append({
+                'id': id_,
+                'time': time_,
+                'structure': structure_,
+                'objective': json.loads(objective_),
+                'success': bool(success_),
+                'return_status': return_status,
+                'iter_count': iter_count,
+                't_wall': t_wall,
+                'f': f,
+                **dict(parameters),
+            })
+
+        return records
+
+    def solution(self, id_:int, opti) -> Solution:
+        """
+        Stored solve as a `Solution` of a model with the same structure.
+        """
+        x, p, lam_x, lam_g, f, stats = self.connection.execute(
+            "SELECT x, p, lam_x, lam_g, f, stats FROM solves WHERE id = ?", (id_,)).fetchone()
+
+        return Solution(opti, from_blob(x), from_blob(p), from_blob(lam_x), from_blob(lam_g), f, json.loads(stats))
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def parse_range(condition:str) -> tuple[str, tuple[float, float]]:
+    name, bounds = condition.split("=")
+    low, _, high = bounds.partition(":")
+    return name, (float(low), float(high if high else low))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the solves in a run store.")
+    parser.add_argument("path")
+    parser.add_argument("--where", nargs="+", default=[], metavar="NAME=LOW:HIGH", help="Parameter ranges, e.g. wind_speed=-5:5")
+    parser.add_argument("--objective", nargs="+", help="Objective terms, e.g. net banner_target")
+    parser.add_argument("--failed", action="store_true", help="Only failed solves")
+    args = parser.parse_args()
+
+    store = Store(args.path)
+    records = store.query(objective={term: 1 for term in args.objective} if args.objective else None,
+                          success=False if args.failed else None, **dict(map(parse_range, args.where)))
+
+    names = [name for name, _ in (parse_range(condition) for condition in args.where)]
+    print(f"{'id':>6} | {'objective':>20} | {'status':>26} | {'iter':>5} | {'f':>12}" + "".join(f" | {name:>14}" for name in names))
+    for r in records:
+        objective = "+".join(name for name, weight in r['objective'].items() if weight)
+        print(f"{r['id']:>6} | {objective:>20} | {r['return_status']:>26} | {r['iter_count']:>5} | {r['f']:>12.6g}"
+              + "".join(f" | {r.get(name, float('nan')):>14.6g}" for name in names))
+    print(f"{len(records)} solves")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Supervised solves with a wall time and memory budget.
+
+A `Watchdog` keeps one worker process with its own `Model` and hands it one solve at a time. While
+the worker solves, the watchdog checks its wall time and resident memory. A worker over either
+budget is killed and replaced by a fresh one, and the solve comes back as failed with the status
+"Wall_Time_Exceeded" or "Memory_Exceeded", so one pathological point cannot hold up a sweep.
+
+Example
+-------
+    with Watchdog(wall_time=30, max_rss_mb=2000) as watchdog:
+        result = sweep(model, "wind_speed", np.linspace(-20, 20, 35), ["netScore"], watchdog=watchdog)
+"""
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import casadi as ca
+
+from typing import Union
+
+from solver import Solution
+
+POLL_SECONDS = 0.05
+
+
+def rss_mb(pid:int) -> float:
+    """
+    Resident memory of a process, None where /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def set_parameters(opti, p:np.ndarray) -> None:
+    """
+    Set every parameter of a problem from a flat parameter vector of a problem of the same structure.
+    """
+    i = 0
+    for symbol in ca.symvar(opti.p):
+        n = symbol.numel()
+        opti.set_value(symbol, p[i:i + n] if n > 1 else p[i])
+        i += n
+
+
+def initial_guess(opti) -> np.ndarray:
+    """
+    Current initial guess of a problem as a flat vector.
+    """
+    return np.array(opti.value(opti.x, opti.initial()), dtype=float).flatten()
+
+
+def set_initial_guess(opti, x0:np.ndarray) -> None:
+    """
+    Set the initial guess of every variable of a problem from a flat vector, see `initial_guess`.
+    """
+    i = 0
+    for symbol in ca.symvar(opti.x):
+        n = symbol.numel()
+        opti.set_initial(symbol, x0[i:i + n] if n > 1 else x0[i])
+        i += n
+
+
+def worker(connection, model_args:tuple) -> None:
+    """
+    Worker loop: build a model, then solve the tasks sent over the connection until it is closed.
+    """
+    from model import Model
+
+    model = Model(*model_args)
+    connection.send("ready")
+
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+
+        p, x0, objective, warm, solve_kwargs = task
+        set_parameters(model.opti, p)
+        set_initial_guess(model.opti, x0)
+        if warm is not None:
+            warm = Solution(model.opti, *warm, {})
+
+        try:
+            sol = model.solver.solve(objective, warm_start=False if warm is None else warm, verbose=False,
+                                     behavior_on_failure='return_last', **solve_kwargs)
+            connection.send((sol.x, sol.p, sol.lam_x, sol.lam_g, sol.f, sol.stats()))
+        except Exception as e:
+            connection.send(f"{type(e).__name__}: {e}")
+
+
+class Watchdog():
+    """
+    One supervised worker process solving with a wall time and memory budget.
+
+    Attributes
+    ----------
+    wall_time : float
+        Seconds a solve may take, None for no limit.
+    max_rss_mb : float
+        Resident memory the worker may reach, in MB, None for no limit.
+    model_args : tuple
+        (scenarios, lap_breakdown, lap_breakdown_turn) of the worker's model, which must match the
+        model the solutions are returned against.
+    restarts : int
+        Workers killed for going over budget or found dead.
+    """
+    def __init__(self, wall_time:float=None, max_rss_mb:float=None, scenarios:int=1,
+                 lap_breakdown:int=None, lap_breakdown_turn:int=None):
+        self.wall_time = wall_time
+        self.max_rss_mb = max_rss_mb
+        self.model_args = (scenarios, lap_breakdown, lap_breakdown_turn)
+        self.restarts = 0
+
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._connection = None
+
+    def start(self) -> None:
+        """
+        Start a worker and wait until its model is built, which is not counted against the budget.
+        """
+        self._connection, child = self._context.Pipe()
+        self._process = self._context.Process(target=worker, args=(child, self.model_args), daemon=True)
+        self._process.start()
+        child.close()
+
+        if self._connection.recv() != "ready":
+            raise RuntimeError("Watchdog worker failed to start")
+
+    def kill(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._connection.close()
+        self._process = self._connection = None
+
+    def close(self) -> None:
+        if self._process is not None:
+            try:
+                self._connection.send(None)
+                self._process.join(timeout=5)
+            except (BrokenPipeError, OSError):
+                pass
+            self.kill()
+
+    def __enter__(self) -> "Watchdog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def solve(self, model, objective:Union[str, dict]=None, warm_start:Solution=None, **solve_kwargs) -> Solution:
+        """
+        Solve a model's problem, at its current parameter values and initial guess, in the worker.
+
+        Parameters
+        ----------
+        model : Model
+            Model whose parameters are solved at and against which the solution is returned.
+        objective : Union[str, dict]
+            Objective, see `Solver.set_objective`. The model's current one if None.
+        warm_start : Solution
+            Solution to warm start from, None for the initial guess.
+        **solve_kwargs
+            Passed to `Solver.solve` in the worker.
+
+        Returns
+        -------
+        Solution
+            Solved values. A killed solve returns NaNs with stats "success" False, "return_status"
+            "Wall_Time_Exceeded", "Memory_Exceeded" or, for a worker that died on its own,
+            "Worker_Died", "iter_count" -1 and its "t_wall_solve".
+        """
+        if self._process is None or not self._process.is_alive():
+            self.start()
+
+        opti = model.opti
+        p = np.array(opti.value(opti.p, opti.value_parameters()), dtype=float).flatten()
+        x0 = initial_guess(opti)
+        if objective is None:
+            objective = dict(model.solver.objective)
+        warm = None if warm_start is None else (warm_start.x, warm_start.p, warm_start.lam_x, warm_start.lam_g, warm_start.f)
+
+        start = time.time()
+        self._connection.send((p, x0, objective, warm, solve_kwargs))
+
+        status = None
+        while not self._connection.poll(POLL_SECONDS):
+            if not self._process.is_alive():
+                status = "Worker_Died"
+            elif self.wall_time is not None and time.time() - start > self.wall_time:
+                status = "Wall_Time_Exceeded"
+            elif self.max_rss_mb is not None and (rss_mb(self._process.pid) or 0) > self.max_rss_mb:
+                status = "Memory_Exceeded"
+
+            if status is not None:
+                self.kill()
+                self.restarts += 1
+                break
+
+        if status is None:
+            try:
+                result = self._connection.recv()
+            except (EOFError, OSError):
+                # a dead worker (OOM killer, segfault) leaves the pipe at EOF, which polls as ready
+                result = "Worker_Died"
+                self.kill()
+                self.restarts += 1
+            if isinstance(result, str):
+                status = result
+            else:
+                return Solution(opti, *result)
+
+        nan_x, nan_g = np.full(opti.nx, np.nan), np.full(opti.ng, np.nan)
+        stats = {'success': False, 'return_status': status, 'iter_count': -1, 't_wall_solve': time.time() - start}
+
+        return Solution(opti, nan_x, p, nan_x, nan_g, np.nan, stats)
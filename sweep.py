@@ -0,0 +1,481 @@
+"""
+Parametric sweeps of the aircraft model.
+
+One engine for every "set a parameter, solve, record some outputs" study. The model is built
+once, the points are solved in an order where each one can warm start from an already converged
+neighbour, and the results come back as columnar arrays.
+
+Given a checkpoint file, every finished point is appended to it with the solution it hands on as a
+warm start. Running the same sweep again with the file skips the points in it and carries on
+from their converged neighbours, so a killed sweep ends with the results it would have had.
+
+With continuation, a point that fails from its neighbour is walked to from the neighbour's
+value instead, in steps that are halved on every failure, see `continuation`.
+
+With symmetry, a point posing the same problem as one already solved (an equivalent wind, see
+symmetry.py) is not solved again but takes that point's solution.
+
+Example
+-------
+    python sweep.py wind_speed -20 20 35 --outputs netScore banner_length laps_flown_M3
+    python sweep.py wind_speed -20 20 35 --checkpoint wind.jsonl     # resumes if wind.jsonl exists
+    python sweep.py wind_speed -20 20 35 --retry neighbour relaxed coarse cold
+    python sweep.py wind_speed -20 20 35 --max-halvings 4
+    python sweep.py wing_direction -3.14159 3.14159 37 --set wind_speed=10 --symmetry
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import casadi as ca
+
+from typing import Callable, Union
+
+from export import ColumnWriter
+from model import Model
+from report import Report
+from solver import Solution
+from store import Store
+from retry import RUNGS, Ladder
+from supervised import Watchdog
+from symmetry import canonical
+
+
+def resolve(model:Model, output:Union[str, ca.MX]) -> ca.MX:
+    """
+    Look up an output by name on the model (e.g. "netScore", "laps_flown_M3") or on the aircraft
+    (e.g. "banner_length", "V_straight_M3"). Expressions are returned as they are.
+    """
+    if not isinstance(output, str):
+        return output
+    if hasattr(model, output):
+        return getattr(model, output)
+    if hasattr(model.plane, output):
+        return getattr(model.plane, output)
+
+    raise ValueError(f"Unknown output '{output}'")
+
+
+def solve_order(values:np.ndarray, start:float) -> list[tuple[int, int]]:
+    """
+    Order sweep points so each is solved next to one that is already done.
+
+    Starts at the value closest to `start` and walks outward to each end.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        (index, neighbour index) pairs, the neighbour is None for the first point.
+    """
+    order = np.argsort(values, kind='stable')
+    first = int(np.argmin(np.abs(values[order] - start)))
+
+    sequence = [(order[first], None)]
+    sequence += [(order[i], order[i - 1]) for i in range(first + 1, len(order))]
+    sequence += [(order[i], order[i + 1]) for i in range(first - 1, -1, -1)]
+
+    return [(int(i), None if j is None else int(j)) for i, j in sequence]
+
+
+def sweep(model:Model, parameter:Union[str, ca.MX], values:np.ndarray, outputs:Union[list, dict],
+          objective:Union[str, dict]="net", warm_start:bool=True, start_from:Solution=None,
+          verbose:bool=False, writer:ColumnWriter=None, checkpoint:str=None, watchdog:Watchdog=None,
+          ladder:Ladder=None, max_halvings:int=0, symmetry:bool=False, **solve_kwargs) -> dict:
+    """
+    Solve the model over a range of one parameter.
+
+    Parameters
+    ----------
+    model : Model
+        Built (and normalized, for the net objective) model.
+    parameter : Union[str, casadi.MX]
+        Aircraft parameter name, e.g. "wind_speed", or the parameter itself.
+    values : np.ndarray
+        Values to solve at.
+    outputs : Union[list, dict]
+        Output names (see `resolve`) or a {name: expression} dict.
+    objective : Union[str, dict]
+        Objective, see `Solver.set_objective`.
+    warm_start : bool
+        Start each point from its converged neighbour, and from the initial guess if that fails.
+    start_from : Solution
+        Solution to warm start the first point from, e.g. the nominal design.
+    verbose : bool
+        Print a line per point.
+    writer : ColumnWriter
+        Also stream a row per point to it as soon as the point is solved, in solve order, with
+        the "return_status" as well. Points restored from a checkpoint are not streamed again.
+    checkpoint : str
+        JSON lines file of the finished points, resumed from if it holds points of the same sweep:
+        the same parameter, values, objective, problem structure and every other parameter value
+        (see `setup_hash`).
+    watchdog : Watchdog
+        Solve every point in its supervised worker, a point over its time or memory budget fails
+        with the budget as its return status.
+    ladder : Ladder
+        Retry a point that fails from its neighbour on the ladder's rungs until one converges.
+    max_halvings : int
+        Walk to a point that fails from a warm start in ever shorter steps, giving up after this
+        many failed steps, see `continuation`. 0 solves every point directly.
+    symmetry : bool
+        Solve each distinct problem once, see `symmetry.canonical`. Its equivalents take its
+        solution, with their own parameters, as "mirror" points of 0 iterations. A failed one
+        fails them too, retries belong to `ladder` and `max_halvings`.
+    **solve_kwargs
+        Passed to `Solver.solve`.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        One column per output plus the parameter, "success", "iter_count" and "t_wall" (of all the
+        solves of the point, rungs and steps included), "objective" (as maximized) and "rung"
+        (that converged, "neighbour" or "cold" without a ladder, "mirror" if taken from an
+        equivalent point, "" if the point failed), in the order of `values`. Outputs of failed
+        points are NaN.
+    """
+    if isinstance(parameter, str):
+        name, parameter = parameter, getattr(model.plane, parameter)
+    else:
+        name = "parameter"
+
+    if not isinstance(outputs, dict):
+        outputs = {output if isinstance(output, str) else f"output_{i}": output for i, output in enumerate(outputs)}
+    report = Report(model.opti, {key: resolve(model, output) for key, output in outputs.items()})
+
+    values = np.asarray(values, dtype=float)
+    solver = model.solver
+    start = float(model.opti.value(parameter))
+
+    done = {}
+    if checkpoint is not None:
+        header = {'parameter': name, 'values': values.tolist(), 'start': start, 'objective': objective,
+                  'structure': solver.structure(), 'setup': setup_hash(model)}
+        done = load_checkpoint(checkpoint, header)
+        if done and verbose:
+            print(f"Resuming {checkpoint}: {len(done)} of {len(values)} points done")
+
+    records = [None] * len(values)
+    stats = [None] * len(values)
+
+    # closest converged solution at or behind each point along its branch of the walk
+    warm_points = [None] * len(values)
+
+    # solution and stats of every distinct problem solved, by canonical parameters
+    solved = {}
+
+    spent = {'iter_count': 0, 'solves': 0}
+
+    def solve_once(warm:Solution, **kwargs) -> Solution:
+        if watchdog is None:
+            sol = solver.solve(objective, warm_start=False if warm is None else warm, verbose=False,
+                               behavior_on_failure='return_last', **kwargs)
+        else:
+            sol = watchdog.solve(model, objective, warm, **kwargs)
+        spent['iter_count'] += max(int(sol.stats()['iter_count']), 0)
+        spent['solves'] += 1
+        return sol
+
+    def attempt(warm:Solution, **kwargs) -> Solution:
+        if max_halvings and warm is not None:
+            return continuation(model, parameter, solve_once, warm, max_halvings, **kwargs)
+        return solve_once(warm, **kwargs)
+
+    for i, neighbour in solve_order(values, start):
+        model.opti.set_value(parameter, values[i])
+
+        if i in done:
+            sol, stats[i] = restore(model, done[i])
+            if stats[i][0]:
+                warm_points[i] = sol
+                records[i] = report(sol)
+            else:
+                warm_points[i] = start_from if neighbour is None else warm_points[neighbour]
+            # failed points too, their equivalents fail with them as they would have without the resume
+            if symmetry:
+                solved.setdefault(canonical(solver.parameter_names, sol.p), (sol, stats[i]))
+            continue
+
+        warm = start_from if neighbour is None else warm_points[neighbour]
+        if not warm_start:
+            warm = None
+
+        start_time = time.time()
+        spent.update(iter_count=0, solves=0)
+        key = None
+        if symmetry:
+            key = canonical(solver.parameter_names, model.opti.value(model.opti.p, model.opti.value_parameters()))
+        if key in solved:
+            sol, rung = mirror(model, solved[key][0]), "mirror" if solved[key][0].stats()['success'] else None
+        elif ladder is None:
+            sol = attempt(warm, **solve_kwargs)
+            rung = "neighbour" if sol.stats()['success'] else None
+            if rung is None and warm is not None:
+                sol = solve_once(None, **solve_kwargs)
+                rung = "cold" if sol.stats()['success'] else None
+        else:
+            sol, rung = ladder.solve(model, objective, attempt, warm, **solve_kwargs)
+        success = sol.stats()['success']
+        stats[i] = (success, spent['iter_count'], time.time() - start_time, -sol.f if success else np.nan, rung or "")
+        if symmetry and key not in solved:
+            solved[key] = (sol, stats[i])
+
+        if checkpoint is not None:
+            save_point(checkpoint, i, sol, stats[i])
+
+        if success:
+            warm_points[i] = sol
+            records[i] = report(sol)
+        else:
+            warm_points[i] = start_from if neighbour is None else warm_points[neighbour]
+
+        if writer is not None:
+            writer.append({name: values[i], "success": success, "return_status": sol.stats()['return_status'],
+                           "iter_count": stats[i][1], "t_wall": stats[i][2], "objective": stats[i][3], "rung": stats[i][4],
+                           **(records[i] if success else report.empty())})
+
+        if verbose:
+            status = f"solved ({rung})" if stats[i][0] else f"FAILED ({sol.stats()['return_status']})"
+            solves = f" over {spent['solves']} solves" if spent['solves'] > 1 else ""
+            print(f"{name} = {values[i]:10.5g} | {status} in {stats[i][1]} iterations{solves}, {stats[i][2]:.2f} s")
+
+    model.opti.set_value(parameter, start)
+
+    return columns(name, values, records, stats, report)
+
+
+def mirror(model:Model, sol:Solution) -> Solution:
+    """
+    Solution of an equivalent problem at the model's current parameters.
+    """
+    p = model.opti.value(model.opti.p, model.opti.value_parameters())
+    return Solution(model.opti, sol.x, p, sol.lam_x, sol.lam_g, sol.f, {**sol.stats(), 'mirrored': True})
+
+
+def continuation(model:Model, parameter:ca.MX, solve:Callable[..., Solution], warm:Solution, max_halvings:int,
+                 **solve_kwargs) -> Solution:
+    """
+    Solve at the parameter's current value by walking to it from a converged solution at another.
+
+    The first step goes all the way. A failed step is halved and tried again from the last
+    converged solution, a converged one doubles the next step, and the walk gives up after
+    `max_halvings` failures. A solution already at the value is solved from once, there is no
+    walk to halve.
+
+    Parameters
+    ----------
+    solve : Callable[..., Solution]
+        solve(warm, **solve_kwargs) solves from a warm start and returns the last iterate if it fails.
+    warm : Solution
+        Converged solution to start from.
+
+    Returns
+    -------
+    Solution
+        Solution at the parameter's value. If the walk gave up, a failed one with the parameters
+        of the value, the last iterate and "reached" in its stats, the value of the last converged
+        step. Its return status is "Continuation_Stalled" if the last iterate is of a step short
+        of the value.
+    """
+    value = float(model.opti.value(parameter))
+    current, at = warm, float(np.squeeze(warm(parameter)))
+    step, halvings = value - at, 0
+
+    if step == 0:
+        return solve(current, **solve_kwargs)
+
+    while True:
+        target = value if abs(step) >= abs(value - at) else at + step
+        model.opti.set_value(parameter, target)
+        sol = solve(current, **solve_kwargs)
+
+        if sol.stats()['success']:
+            if target == value:
+                break
+            current, at, step = sol, target, 2 * step
+        else:
+            halvings += 1
+            if halvings > max_halvings:
+                break
+            step /= 2
+
+    model.opti.set_value(parameter, value)
+
+    if not sol.stats()['success']:
+        stats = {**sol.stats(), 'reached': at}
+        if target != value:
+            stats['return_status'] = "Continuation_Stalled"
+        p = model.opti.value(model.opti.p, model.opti.value_parameters())
+        sol = Solution(model.opti, sol.x, p, sol.lam_x, sol.lam_g, sol.f, stats)
+
+    return sol
+
+
+def setup_hash(model:Model) -> str:
+    """
+    Hash of every parameter value of the model but the objective weights, which each solve sets.
+
+    Tells apart sweeps of the same parameter run on different setups, e.g. another `--set`, banner
+    target or wind scenarios.
+    """
+    p = np.atleast_1d(model.opti.value(model.opti.p, model.opti.value_parameters())).astype(float).flatten()
+    setup = [value for name, value in zip(model.solver.parameter_names, p) if not name.startswith("weight_")]
+
+    return hashlib.sha256(np.array(setup, dtype=np.float64).tobytes()).hexdigest()[:16]
+
+
+def load_checkpoint(path:str, header:dict) -> dict[int, dict]:
+    """
+    Finished points of a sweep checkpoint, starting the file with the header if it is new.
+
+    Raises a ValueError if the file holds another sweep (any difference in the header).
+
+    Returns
+    -------
+    dict[int, dict]
+        Checkpoint line of every finished point by index. A line cut short by a kill is dropped.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, "w") as f:
+            f.write(json.dumps(header) + "\n")
+        return {}
+
+    with open(path) as f:
+        lines = f.readlines()
+
+    stored, header = json.loads(lines[0]), json.loads(json.dumps(header))
+    if stored != header:
+        differ = sorted(key for key in {**stored, **header} if stored.get(key) != header.get(key))
+        raise ValueError(f"{path} holds another sweep (different {', '.join(differ)})")
+
+    done, kept = {}, [lines[0]]
+    for line in lines[1:]:
+        try:
+            point = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        done[point['index']] = point
+        kept.append(line if line.endswith("\n") else line + "\n")
+
+    # drop the cut line, or the next point would be appended to it
+    if kept != lines:
+        with open(path, "w") as f:
+            f.writelines(kept)
+
+    return done
+
+
+def save_point(path:str, i:int, sol:Solution, stats:tuple) -> None:
+    """
+    Append a finished point to a checkpoint, with its solution if it converged.
+    """
+    success, iter_count, t_wall, objective, rung = stats
+    point = {'index': i, 'success': bool(success), 'iter_count': int(iter_count), 't_wall': t_wall, 'objective': objective,
+             'rung': rung, 'return_status': sol.stats()['return_status']}
+    if success:
+        point.update(x=sol.x.tolist(), p=sol.p.tolist(), lam_x=sol.lam_x.tolist(), lam_g=sol.lam_g.tolist(), f=sol.f)
+
+    # one complete line per point, flushed so a kill loses at most the one being written
+    with open(path, "a") as f:
+        f.write(json.dumps(point) + "\n")
+        f.flush()
+
+
+def restore(model:Model, point:dict) -> tuple[Solution, tuple]:
+    """
+    Solution and stats of a checkpointed point. A failed point is not stored, its solution is
+    NaN at the model's current parameters.
+    """
+    stats = (point['success'], point['iter_count'], point['t_wall'], point['objective'], point.get('rung', ""))
+    if not point['success']:
+        opti = model.opti
+        p = opti.value(opti.p, opti.value_parameters())
+        nan_x, nan_g = np.full(opti.nx, np.nan), np.full(opti.ng, np.nan)
+        return Solution(opti, nan_x, p, nan_x, nan_g, np.nan, {
+            'success': False, 'iter_count': point['iter_count'], 'return_status': point.get('return_status', "Failed")}), stats
+
+    sol = Solution(model.opti, point['x'], point['p'], point['lam_x'], point['lam_g'], point['f'],
+                   {'success': True, 'iter_count': point['iter_count'], 'return_status': 'Solve_Succeeded'})
+    return sol, stats
+
+
+def columns(name:str, values:np.ndarray, records:list, stats:list, report:Report) -> dict:
+    """
+    Stack the report records of the converged points and the solve stats into arrays.
+    """
+    result = {
+        name: values,
+        "success": np.array([s[0] for s in stats], dtype=bool),
+        "iter_count": np.array([s[1] for s in stats], dtype=int),
+        "t_wall": np.array([s[2] for s in stats], dtype=float),
+        "objective": np.array([s[3] for s in stats], dtype=float),
+        "rung": np.array([s[4] for s in stats], dtype=str),
+    }
+
+    for key in report.names:
+        evaluated = [None if record is None else np.atleast_1d(record[key]) for record in records]
+        shape = next((v.shape for v in evaluated if v is not None), (1,))
+        column = np.array([np.full(shape, np.nan) if v is None else v for v in evaluated])
+        result[key] = column[:, 0] if shape == (1,) else column
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep one aircraft parameter and record outputs.")
+    parser.add_argument("parameter", help="Aircraft parameter, e.g. wind_speed, max_g, oswaldEff, CLmax, PropEff")
+    parser.add_argument("start", type=float)
+    parser.add_argument("stop", type=float)
+    parser.add_argument("num", type=int)
+    parser.add_argument("-o", "--outputs", nargs="+", default=["netScore"], help="Model or aircraft attributes to record")
+    parser.add_argument("--objective", nargs="+", default=["net"], help="Objective terms, e.g. net ducks_penalty")
+    parser.add_argument("--set", nargs="+", default=[], metavar="NAME=VALUE", help="Other parameters to fix first")
+    parser.add_argument("--max-iter", type=int, default=1000)
+    parser.add_argument("--cold", action="store_true", help="Solve every point from the default initial guess")
+    parser.add_argument("--save", help="Write the columns to this .npz file")
+    parser.add_argument("--export", metavar="FOLDER", help="Stream every point to chunked .npz files in this folder")
+    parser.add_argument("--checkpoint", metavar="PATH", help="Save finished points to this JSON lines file, resume from it if it exists")
+    parser.add_argument("--store", metavar="PATH", help="SQLite run store to save solves to and reuse them from")
+    parser.add_argument("--wall-time", type=float, help="Solve each point in a supervised worker, killed after this many seconds")
+    parser.add_argument("--max-rss", type=float, metavar="MB", help="Solve each point in a supervised worker, killed above this memory")
+    parser.add_argument("--max-halvings", type=int, default=0, help="Walk to failed points in steps halved up to this many times")
+    parser.add_argument("--symmetry", action="store_true", help="Solve equivalent wind cases once, see symmetry.py")
+    parser.add_argument("--retry", nargs="+", choices=RUNGS, metavar="RUNG",
+                        help=f"Retry failed points on these rungs in order, of {' '.join(RUNGS)}")
+    args = parser.parse_args()
+
+    model = Model()
+    if args.store:
+        model.solver.store = Store(args.store)
+    for assignment in args.set:
+        key, value = assignment.split("=")
+        model.set_parameters(**{key: float(value)})
+
+    model.normalize(verbose=False)
+    nominal = model.solver.solve({term: 1 for term in args.objective}, verbose=False)
+
+    writer = ColumnWriter(args.export) if args.export else None
+    watchdog = Watchdog(args.wall_time, args.max_rss) if args.wall_time or args.max_rss else None
+    result = sweep(model, args.parameter, np.linspace(args.start, args.stop, args.num), args.outputs,
+                   objective={term: 1 for term in args.objective}, warm_start=not args.cold,
+                   start_from=nominal, verbose=True, writer=writer, checkpoint=args.checkpoint,
+                   watchdog=watchdog, ladder=Ladder(args.retry) if args.retry else None,
+                   max_halvings=args.max_halvings, symmetry=args.symmetry, max_iter=args.max_iter)
+    if writer is not None:
+        writer.close()
+    if watchdog is not None:
+        watchdog.close()
+
+    keys = [args.parameter, "success", "rung", "iter_count"] + [key for key in args.outputs if result[key].ndim == 1]
+    print(" | ".join(f"{key:>14}" for key in keys))
+    for row in zip(*(result[key] for key in keys)):
+        print(" | ".join(f"{str(value):>14}" if isinstance(value, (bool, np.bool_, str)) else f"{value:>14.6g}" for value in row))
+
+    if args.save:
+        np.savez(args.save, **result)
+
+
+if __name__ == "__main__":
+    main()
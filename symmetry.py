@@ -0,0 +1,62 @@
+"""
+Equivalent wind cases of the lap.
+
+The wind enters the lap only through its components along the track, Vwx = wind_speed *
+cos(wing_direction), and across it, Vwy = wind_speed * sin(wing_direction). The straights fly
+along the track (headings 0 and -pi), so Vwy only counts through its square. Two points with the
+same Vwx and |Vwy|, and every other parameter equal, are the same problem:
+
+    (s, d) == (-s, d + pi)      the same wind vector
+    (s, d) == (s, -d)           the crosswind mirrored
+
+A wind speed sweep at a fixed direction has no such pairs. -s at direction 0 is the wind of s
+with the straights swapped, and the lap does not treat its two straights alike: the turns join
+them at different ends. A full-circle direction sweep, or a speed and direction grid, has every
+case twice, and `sweep.sweep(..., symmetry=True)` solves each one once.
+
+Example
+-------
+    python sweep.py wing_direction -3.14159 3.14159 37 --set wind_speed=10 --symmetry
+"""
+import numpy as np
+
+# wind components are compared to this many decimals (m/s), cos and sin of the same angle
+# written two ways differ in the last bits
+WIND_DECIMALS = 9
+
+
+def canonical(parameter_names:list, p:np.ndarray) -> tuple:
+    """
+    Key of the problem a parameter vector poses, equal for equivalent wind cases.
+
+    Parameters
+    ----------
+    parameter_names : list[str]
+        Name of every parameter, see `Solver.parameter_names`. Extra wind scenarios are
+        "scenarioN.wind_speed" and "scenarioN.wing_direction".
+    p : np.ndarray
+        Parameter values.
+
+    Returns
+    -------
+    tuple[float, ...]
+        The parameter values with the wind speed and direction of every scenario replaced by
+        Vwx and |Vwy|.
+    """
+    p = np.array(p, dtype=float).flatten()
+    values = dict(zip(parameter_names, p))
+
+    key = list(p)
+    for i, name in enumerate(parameter_names):
+        prefix, _, attribute = name.rpartition(".")
+        if attribute not in ("wind_speed", "wing_direction"):
+            continue
+
+        scope = f"{prefix}." if prefix else ""
+        speed, direction = values[f"{scope}wind_speed"], values[f"{scope}wing_direction"]
+        if attribute == "wind_speed":
+            key[i] = round(speed * np.cos(direction), WIND_DECIMALS) + 0.0
+        else:
+            key[i] = abs(round(speed * np.sin(direction), WIND_DECIMALS))
+
+    return tuple(key)
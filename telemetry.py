@@ -0,0 +1,261 @@
+"""
+Structured records of IPOPT solves.
+
+Every solve, from `solver.Solver` or from `Optimization.Optimizer`, can leave one flat record:
+return status, iterations, objective, final infeasibilities, problem dimensions and where the
+wall time went. A `Log` keeps them in memory and appends them to a JSON lines file, so the
+records of thousands of sweep solves can be aggregated afterwards.
+
+A `Trace` streams a solve while it runs instead: one line per IPOPT iteration with the objective,
+the constraint violation, the step and chosen design variables, flushed as it comes so another
+process can follow it with `tail -f` and kill a run that is going nowhere.
+
+Example
+-------
+    python telemetry.py telemetry.jsonl     # summarize a log
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+
+def record(stats:dict, nx:int, ng:int, np_:int, objective:float, t_wall:float, label:str=None) -> dict:
+    """
+    Flat record of one solve.
+
+    Parameters
+    ----------
+    stats : dict
+        nlpsol stats of the solve.
+    nx, ng, np_ : int
+        Number of variables, constraints and parameters.
+    objective : float
+        Objective at the returned point, as IPOPT minimized it.
+    t_wall : float
+        Wall time of the solve.
+    label : str
+        What was solved, e.g. the objective name.
+
+    Returns
+    -------
+    dict
+        JSON serializable record. `t_function_evals` is the time spent evaluating the NLP and its
+        derivatives, `t_outside_evals` the rest of the wall time: the linear solves together with
+        everything else IPOPT does. CasADi does not report the linear solve time on its own.
+    """
+    iterations = stats.get('iterations') or {}
+    t_function_evals = sum(value for key, value in stats.items() if key.startswith('t_wall_nlp_'))
+
+    return {
+        'label': label,
+        'time': time.time(),
+        'success': bool(stats['success']),
+        'return_status': stats['return_status'],
+        'iter_count': int(stats['iter_count']),
+        'objective': float(objective),
+        'inf_pr': float(iterations['inf_pr'][-1]) if iterations.get('inf_pr') else None,
+        'inf_du': float(iterations['inf_du'][-1]) if iterations.get('inf_du') else None,
+        'nx': int(nx),
+        'ng': int(ng),
+        'np': int(np_),
+        'warm_start': bool(stats.get('warm_start', False)),
+        'cached': bool(stats.get('cached', False)),
+        't_wall': float(t_wall),
+        't_function_evals': float(t_function_evals),
+        't_outside_evals': float(max(t_wall - t_function_evals, 0)),
+        **{key[len('t_wall_'):]: float(value) for key, value in stats.items() if key.startswith('t_wall_nlp_')},
+    }
+
+
+class Log():
+    """
+    Solve records kept in memory and, if given a path, appended to a JSON lines file as they come.
+
+    Attributes
+    ----------
+    path : str
+        JSON lines file, None to keep the records in memory only.
+    records : list[dict]
+        Records of this process.
+    """
+    def __init__(self, path:str=None):
+        self.path = path
+        self.records = []
+
+    def append(self, record:dict) -> None:
+        self.records.append(record)
+
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def summary(self) -> dict:
+        return summarize(self.records)
+
+
+class Trace():
+    """
+    Iterations of running solves, appended to a JSON lines file and flushed one by one.
+
+    Every solve writes a "start" line, an "iteration" line per IPOPT iteration and an "end" line
+    with its return status.
+
+    Attributes
+    ----------
+    path : str
+        JSON lines file.
+    variables : dict[str, casadi.MX]
+        Expressions recorded at every iterate, e.g. {"span": plane.span}. Set by whoever builds
+        the problem, see `solver.Solver` and `Optimization.Optimizer`.
+    label : str
+        What is being solved.
+    """
+    def __init__(self, path:str, variables:dict=None):
+        self.path = path
+        self.variables = {} if variables is None else variables
+        self.label = None
+        self._file = None
+        self._previous = None
+
+    def start(self, label:str=None) -> None:
+        self.label = label
+        self._previous = None
+        self._file = open(self.path, "a")
+        self._write({'event': 'start', 'label': label, 'time': time.time()})
+
+    def iteration(self, iteration:int, x:np.ndarray, objective:float, inf_pr:float, values:dict) -> None:
+        """
+        Record one iterate.
+
+        Parameters
+        ----------
+        iteration : int
+            Iteration number, 0 being the initial point.
+        x : np.ndarray
+            Decision variables. IPOPT does not hand out its step size, so `step` is the largest
+            change of a variable since the previous iterate instead.
+        objective : float
+            Objective as IPOPT minimizes it.
+        inf_pr : float
+            Largest constraint violation.
+        values : dict
+            Value of each of `variables`.
+        """
+        x = np.array(x, dtype=float).flatten()
+        step = None if self._previous is None or len(x) == 0 else float(np.max(np.abs(x - self._previous)))
+        self._previous = x
+
+        self._write({
+            'event': 'iteration',
+            'label': self.label,
+            'time': time.time(),
+            'iteration': int(iteration),
+            'objective': float(objective),
+            'inf_pr': float(inf_pr),
+            'step': step,
+            **{name: float(value) if np.size(value) == 1 else np.array(value, dtype=float).flatten().tolist()
+               for name, value in values.items()},
+        })
+
+    def end(self, stats:dict) -> None:
+        self._write({
+            'event': 'end',
+            'label': self.label,
+            'time': time.time(),
+            'success': bool(stats.get('success', False)),
+            'return_status': stats.get('return_status'),
+            'iter_count': stats.get('iter_count'),
+        })
+        self._file.close()
+        self._file = None
+
+    def _write(self, line:dict) -> None:
+        self._file.write(json.dumps(line) + "\n")
+        self._file.flush()
+
+
+def infeasibility(g:np.ndarray, lbg:np.ndarray, ubg:np.ndarray) -> float:
+    """
+    Largest violation of lbg <= g <= ubg, 0 if all hold.
+    """
+    g, lbg, ubg = (np.array(v, dtype=float).flatten() for v in (g, lbg, ubg))
+    if len(g) == 0:
+        return 0.0
+    return float(max(np.max(lbg - g), np.max(g - ubg), 0))
+
+
+def load(path:str) -> list[dict]:
+    """
+    Read a log, skipping a line cut short by a killed run.
+    """
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    return records
+
+
+def summarize(records:list) -> dict:
+    """
+    Solves, failures, iterations and time per label, and where the time went.
+
+    Returns
+    -------
+    dict[str, dict]
+        One entry per label plus "total".
+    """
+    groups = {}
+    for r in records:
+        groups.setdefault(str(r['label']), []).append(r)
+    groups["total"] = list(records)
+
+    summary = {}
+    for label, group in groups.items():
+        iterations = np.array([r['iter_count'] for r in group])
+        t_wall = sum(r['t_wall'] for r in group)
+        t_function_evals = sum(r['t_function_evals'] for r in group)
+
+        summary[label] = {
+            'solves': len(group),
+            'failures': sum(not r['success'] for r in group),
+            'iter_total': int(iterations.sum()),
+            'iter_mean': float(iterations.mean()) if len(group) else np.nan,
+            't_wall': t_wall,
+            't_function_evals': t_function_evals,
+            't_outside_evals': sum(r['t_outside_evals'] for r in group),
+            't_hess_l': sum(r.get('nlp_hess_l', 0) for r in group),
+            't_jac_g': sum(r.get('nlp_jac_g', 0) for r in group),
+        }
+
+    return summary
+
+
+def print_summary(summary:dict) -> None:
+    print("\n=== Solve Telemetry ===")
+    print(f"{'Label':>16} | {'Solves':>6} | {'Failed':>6} | {'Iter':>7} | {'Iter/solve':>10} | {'Wall':>9} | {'Evals':>9} | {'Hessian':>9} | {'Other':>9}")
+    print("-" * 104)
+    for label, row in summary.items():
+        print(f"{label:>16} | {row['solves']:>6} | {row['failures']:>6} | {row['iter_total']:>7} | {row['iter_mean']:>10.1f}"
+              f" | {row['t_wall']:>8.2f}s | {row['t_function_evals']:>8.2f}s | {row['t_hess_l']:>8.2f}s | {row['t_outside_evals']:>8.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a solve telemetry log.")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    print_summary(summarize(load(args.path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# the modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import Model
+
+
+@pytest.fixture(scope="module")
+def model() -> Model:
+    """
+    Normalized model of the default mesh, built once per test module.
+    """
+    model = Model()
+    model.normalize(verbose=False)
+    return model
@@ -0,0 +1,44 @@
+"""
+The M2 turn with one curvature variable per mirrored segment pair (`constants.mirrored_turn`)
+against the load factor variables and pairwise equalities it replaces.
+"""
+import numpy as np
+import pytest
+
+import constants
+from model import Model
+from sweep import sweep
+
+WIND_SPEEDS = [-16, -8, 0, 4, 8, 12, 16]
+
+
+def wind_scores(mirrored:bool) -> dict:
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(constants, "mirrored_turn", mirrored)
+        model = Model()
+
+    model.normalize(verbose=False)
+    nominal = model.solver.solve("net", verbose=False)
+
+    return sweep(model, "wind_speed", WIND_SPEEDS, ["netScore"], start_from=nominal)
+
+
+@pytest.fixture(scope="module")
+def scores() -> dict:
+    return {mirrored: wind_scores(mirrored) for mirrored in [False, True]}
+
+
+def test_every_wind_converges(scores):
+    for mirrored, result in scores.items():
+        assert result["success"].all(), f"mirrored_turn={mirrored}: {result['rung']}"
+
+
+def test_same_nominal_score(scores):
+    calm = WIND_SPEEDS.index(0)
+    assert scores[True]["netScore"][calm] == pytest.approx(scores[False]["netScore"][calm], rel=1e-8)
+
+
+def test_no_worse_score(scores):
+    # from the calm design the pairwise formulation lands in a worse local optimum in headwinds
+    # (4.93 against 5.76 at -8 m/s), the reverse would be a regression
+    assert np.all(scores[True]["netScore"] >= scores[False]["netScore"] - 1e-6)
@@ -0,0 +1,14 @@
+"""
+Regression of the nominal design.
+"""
+import pytest
+
+# net score of the nominal design at the default mesh, calm wind
+NOMINAL_NET_SCORE = 5.920672
+
+
+def test_nominal_net_score(model):
+    sol = model.solver.solve("net", verbose=False)
+
+    assert sol.stats()['success']
+    assert float(sol(model.netScore)) == pytest.approx(NOMINAL_NET_SCORE, abs=1e-6)
@@ -0,0 +1,53 @@
+"""
+A stored solve is only returned for the solve that would reproduce it.
+"""
+import numpy as np
+import pytest
+
+from retry import RELAXED_OPTIONS
+from store import Store
+
+
+@pytest.fixture
+def store(model, tmp_path):
+    store = Store(str(tmp_path / "runs.db"))
+    model.solver.store = store
+    yield store
+    model.solver.store = None
+    store.close()
+
+
+def test_key(model, store):
+    solver = model.solver
+    p = model.opti.value(model.opti.p, model.opti.value_parameters())
+    x0 = {'x0': np.ones(model.opti.nx)}
+    key = store.key(solver, p, x0, {'max_iter': 1000})
+
+    assert key == store.key(solver, np.array(p), dict(x0), {'max_iter': 1000})
+    assert key != store.key(solver, p + 1, x0, {'max_iter': 1000})
+    assert key != store.key(solver, p, {'x0': 2 * np.ones(model.opti.nx)}, {'max_iter': 1000})
+    assert key != store.key(solver, p, {**x0, 'lam_x0': np.zeros(model.opti.nx)}, {'max_iter': 1000})
+    assert key != store.key(solver, p, x0, {'max_iter': 100})
+    assert key != store.key(solver, p, x0, {'max_iter': 1000, 'options': RELAXED_OPTIONS})
+
+
+def test_repeated_solve_hits(model, store):
+    first = model.solver.solve("net", verbose=False)
+    again = model.solver.solve("net", verbose=False)
+
+    assert store.hits == 1
+    assert again.stats()['cached']
+    assert again.f == first.f
+
+
+def test_other_solves_run(model, store):
+    cold = model.solver.solve("net", verbose=False)
+
+    warm = model.solver.solve("net", verbose=False, warm_start=cold)
+    relaxed = model.solver.solve("net", verbose=False, options=RELAXED_OPTIONS)
+    limited = model.solver.solve("net", verbose=False, max_iter=999)
+
+    assert store.hits == 0
+    for sol in [warm, relaxed, limited]:
+        assert not sol.stats().get('cached', False)
+        assert sol.stats()['iter_count'] > 0
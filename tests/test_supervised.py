@@ -0,0 +1,52 @@
+"""
+A worker that dies in the middle of a solve comes back as a failed point, `supervised.Watchdog`.
+"""
+import os
+import signal
+
+import numpy as np
+import pytest
+
+from supervised import Watchdog
+
+
+@pytest.fixture
+def watchdog():
+    watchdog = Watchdog(wall_time=60)
+    yield watchdog
+    watchdog.close()
+
+
+def kill_after_send(watchdog:Watchdog) -> None:
+    """
+    Kill the worker (as the OOM killer would) as soon as the next task is sent to it.
+    """
+    watchdog.start()
+    connection, process = watchdog._connection, watchdog._process
+    send = connection.send
+
+    def send_and_kill(task):
+        send(task)
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+
+    connection.send = send_and_kill
+
+
+def test_killed_worker_fails_the_point(model, watchdog):
+    kill_after_send(watchdog)
+    sol = watchdog.solve(model, "net")
+
+    assert not sol.stats()['success']
+    assert sol.stats()['return_status'] == "Worker_Died"
+    assert np.isnan(sol.f)
+    assert watchdog.restarts == 1
+
+
+def test_next_point_gets_a_new_worker(model, watchdog):
+    kill_after_send(watchdog)
+    watchdog.solve(model, "net")
+    sol = watchdog.solve(model, "net")
+
+    assert sol.stats()['success']
+    assert float(sol(model.netScore)) == pytest.approx(5.920672, abs=1e-6)
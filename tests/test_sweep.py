@@ -0,0 +1,84 @@
+"""
+Checkpointed sweeps resume to the results of an uninterrupted one.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from sweep import sweep
+
+WIND_SPEEDS = np.linspace(-8, 8, 5)
+
+
+@pytest.fixture(scope="module")
+def nominal(model):
+    return model.solver.solve("net", verbose=False)
+
+
+def run(model, nominal, checkpoint=None) -> dict:
+    return sweep(model, "wind_speed", WIND_SPEEDS, ["netScore", "banner_length"], start_from=nominal,
+                 checkpoint=checkpoint)
+
+
+def test_resume_round_trip(model, nominal, tmp_path):
+    path = tmp_path / "wind.jsonl"
+    full = run(model, nominal, str(path))
+
+    # killed after two points, in the middle of writing the third
+    lines = path.read_text().splitlines(keepends=True)
+    path.write_text("".join(lines[:3]) + lines[3][:len(lines[3]) // 2])
+
+    resumed = run(model, nominal, str(path))
+
+    assert resumed["success"].all()
+    for column in ["success", "rung"]:
+        np.testing.assert_array_equal(resumed[column], full[column])
+    for column in ["netScore", "banner_length", "objective"]:
+        np.testing.assert_allclose(resumed[column], full[column], rtol=1e-8)
+    assert len(path.read_text().splitlines()) == 1 + len(WIND_SPEEDS)
+
+
+def test_restored_points_not_solved_again(model, nominal, tmp_path):
+    path = tmp_path / "wind.jsonl"
+    run(model, nominal, str(path))
+    resumed = run(model, nominal, str(path))
+
+    points = sorted((json.loads(line) for line in path.read_text().splitlines()[1:]), key=lambda point: point["index"])
+    assert [point["index"] for point in points] == list(range(len(WIND_SPEEDS)))
+    np.testing.assert_array_equal(resumed["iter_count"], [point["iter_count"] for point in points])
+
+
+def test_refuses_another_setup(model, nominal, tmp_path):
+    path = tmp_path / "wind.jsonl"
+    run(model, nominal, str(path))
+
+    direction = float(model.opti.value(model.plane.wing_direction))
+    model.opti.set_value(model.plane.wing_direction, direction + 0.5)
+    try:
+        with pytest.raises(ValueError, match="setup"):
+            run(model, nominal, str(path))
+    finally:
+        model.opti.set_value(model.plane.wing_direction, direction)
+
+
+def test_resumed_failure_fails_its_mirror(model, nominal, tmp_path):
+    path = tmp_path / "direction.jsonl"
+    speed = float(model.opti.value(model.plane.wind_speed))
+    model.opti.set_value(model.plane.wind_speed, 10)
+    try:
+        # two iterations are not enough for either point, the second is the mirror of the first
+        def run_directions():
+            return sweep(model, "wing_direction", [0.5, -0.5], ["netScore"], start_from=nominal, checkpoint=str(path),
+                         symmetry=True, max_iter=2)
+
+        full = run_directions()
+        lines = path.read_text().splitlines(keepends=True)
+        path.write_text("".join(lines[:2]))
+        resumed = run_directions()
+    finally:
+        model.opti.set_value(model.plane.wind_speed, speed)
+
+    assert not full["success"].any() and not resumed["success"].any()
+    np.testing.assert_array_equal(resumed["iter_count"], full["iter_count"])
+    assert 0 in resumed["iter_count"]
@@ -0,0 +1,34 @@
+"""
+Equivalent wind cases share a key, `symmetry.canonical`.
+"""
+import numpy as np
+
+from symmetry import canonical
+
+NAMES = ["banner_target", "wind_speed", "wing_direction", "scenario2.wind_speed", "scenario2.wing_direction"]
+
+
+def key(speed:float, direction:float, banner:float=5.5, second:tuple=(3, 0.5)) -> tuple:
+    return canonical(NAMES, [banner, speed, direction, *second])
+
+
+def test_same_wind_vector():
+    assert key(10, 0.3) == key(-10, 0.3 + np.pi)
+
+
+def test_mirrored_crosswind():
+    assert key(10, 0.3) == key(10, -0.3)
+
+
+def test_reversed_wind_differs():
+    # the two straights are joined to the turns at different ends, -s at direction 0 is another lap
+    assert key(10, 0) != key(-10, 0)
+
+
+def test_other_parameters_count():
+    assert key(10, 0.3, banner=5.5) != key(10, 0.3, banner=6.0)
+    assert key(10, 0.3, second=(3, 0.5)) != key(10, 0.3, second=(4, 0.5))
+
+
+def test_scenarios_reduced_on_their_own():
+    assert key(10, 0.3, second=(3, 0.5)) == key(10, 0.3, second=(-3, 0.5 + np.pi))